@@ -4,7 +4,6 @@ from PyQt6.QtGui import QCursor, QPolygonF
 from PyQt6.QtWidgets import QApplication
 from app_ui.choose_moon import highlight_moon, min_shape_moon, selected_rect_item, choose_your
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # 全局变量，用于跟踪平移状态
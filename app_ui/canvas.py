@@ -1,5 +1,6 @@
 from typing import Optional
 import logging
+import os
 from PyQt6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QGraphicsRectItem
 from PyQt6.QtGui import QPainter, QPixmap, QImage, QPen, QColor, QCursor
 from PyQt6.QtCore import Qt, QPoint
@@ -60,6 +61,9 @@ class GraphicsCanvas(QGraphicsView):
 
             self.image_item: Optional[QGraphicsPixmapItem] = None
             self.current_pixmap: Optional[QPixmap] = None
+            # 最近一次load_image的(路径, mtime_ns, 文件大小)及其生成的QPixmap，用于跳过重复加载
+            self._loaded_key: Optional[tuple] = None
+            self._loaded_pixmap: Optional[QPixmap] = None
 
             self.drawing = False
             self.rect_start: Optional[QPoint] = None
@@ -89,9 +93,7 @@ class GraphicsCanvas(QGraphicsView):
             self.mouse_decorator_manager = MouseDecoratorManager(self)  # 十字准星等装饰
             
         except Exception as e:
-            logger.error(f"初始化GraphicsCanvas时发生错误: {e}")
-            import traceback
-            logger.error(f"错误堆栈信息: {traceback.format_exc()}")
+            logger.error(f"初始化GraphicsCanvas时发生错误: {e}", exc_info=True)
 
     def update_rects(self) -> None:
         """刷新并重绘当前矩形框。"""
@@ -429,9 +431,27 @@ class GraphicsCanvas(QGraphicsView):
         except Exception as e:
             logger.error(f"更新矩形框时发生错误: {e}")
 
+    @staticmethod
+    def _file_key(file_path: str) -> Optional[tuple]:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return (os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+
+    def is_image_current(self, file_path: str) -> bool:
+        """画布当前显示的正是该文件且未被修改（文件未变、贴图未被替换）"""
+        return (self.image_item is not None
+                and self._loaded_key is not None
+                and self.current_pixmap is self._loaded_pixmap
+                and self._file_key(file_path) == self._loaded_key)
+
     def load_image(self, file_path: str) -> bool:
         """加载图片到场景并重置视图。"""
         try:
+            # 同一文件已在画布上且未变化时不再重复解码
+            if self.is_image_current(file_path):
+                return True
             image = self.main_window.resource_manager.load_image_safe(file_path)
             if not image:
                 logger.warning(f"无法加载图片: {file_path}")
@@ -448,6 +468,8 @@ class GraphicsCanvas(QGraphicsView):
             self.image_item.setZValue(-1)
             self.scene.addItem(self.image_item)
             self.current_pixmap = pixmap
+            self._loaded_pixmap = pixmap
+            self._loaded_key = self._file_key(file_path)
             self.scene.setSceneRect(0, 0, pixmap.width(), pixmap.height())
             self.resetTransform()
             if hasattr(self, 'mouse_decorator_manager') and self.mouse_decorator_manager:
@@ -458,7 +480,5 @@ class GraphicsCanvas(QGraphicsView):
             self.update_rects()
             return True
         except Exception as e:
-            logger.error(f"加载图片到画布时发生错误 {file_path}: {e}")
-            import traceback
-            logger.error(f"错误堆栈信息: {traceback.format_exc()}")
+            logger.error(f"加载图片到画布时发生错误 {file_path}: {e}", exc_info=True)
             return False
@@ -6,7 +6,6 @@ from PyQt6.QtWidgets import QGraphicsRectItem, QGraphicsPolygonItem, QGraphicsEl
 from app_ui.labelsgl import ParentLabel, ChildLabel
 from algorithms.calculate_anyone_polygoon_area import calculate_polygon_area
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # 全局变量，用于跟踪当前选中的矩形框
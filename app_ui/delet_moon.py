@@ -2,7 +2,6 @@ import logging
 from PyQt6.QtWidgets import QGraphicsRectItem, QGraphicsTextItem
 from app_ui.labelsgl import ChildLabel
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 def I_deleted_you(canvas, x, y):
@@ -417,6 +417,17 @@ class LabelDrawManager(QObject):
             if not inference_result or isinstance(inference_result, dict) and inference_result.get("status") == "inference_started":
                 logger.info("推理已启动，等待结果...")
                 return
+
+            if isinstance(inference_result, dict) and inference_result.get("cancelled"):
+                # 推理已被切换图片取代，结果属于上一张图片，只停止扫描动画
+                logger.info("推理已取消，忽略结果")
+                try:
+                    mgr = get_scan_animation_manager(self.canvas_view)
+                    if mgr:
+                        mgr.stop_scan_animation()
+                except Exception as e:
+                    logger.error(f"停止扫描动画失败: {e}")
+                return
                 
             if isinstance(inference_result, dict) and "error" in inference_result:
                 logger.error(f"推理出错: {inference_result['error']}")
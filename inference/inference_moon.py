@@ -4,17 +4,90 @@ inference_moon.py - 调用yoloe_moon.py中的推理方法进行推理
 
 import logging
 import threading
-import queue
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Optional, Dict, Any
+import numpy as np
 from algorithms.polygon_bounding_rectangle import calculate_bounding_rectangle
 from inference.yoloe_moon import yoloe_inference, yoloe_semantic_inference
-from inference.yolov_moon import yolov_inference
+from inference.yolov_moon import yolov_inference, YOLOV_CANCELLED
 from app_ui.set import get_settings_manager
 
 logger = logging.getLogger(__name__)
 
-# 创建一个全局队列用于存储推理结果
-inference_results_queue = queue.Queue()
+# 模块级线程池，用于并行执行 YOLOV 推理与推测性的 YOLOE 准备工作（YOLOE 的 predict 等待 YOLOV 结果后才决定是否执行）
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="moon_inference")
+
+
+def _deliver(result: Dict[str, Any], callback=None) -> None:
+    """
+    投递推理结果：提供回调时通知回调，否则直接丢弃（已无轮询结果的消费方）
+    
+    Args:
+        result: 推理结果
+        callback: 回调函数，可选
+    """
+    if callback is not None:
+        callback(result)
+
+
+def _fill_child_bbox(buf: np.ndarray, i: int, child: Any, shape_type: str) -> bool:
+    """
+    计算单个子标签的边界框 (x_min, y_min, x_max, y_max) 并写入 buf[i]
+    
+    Args:
+        buf: 边界框缓冲区
+        i: 写入的行号
+        child: 子标签
+        shape_type: 形状类型，'rectangle'表示矩形框，'polygon'表示多边形
+    
+    Returns:
+        bool: 是否得到有效的边界框
+    """
+    # 跳过占位符标签
+    if getattr(child, 'is_placeholder', False):
+        return False
+    
+    points = getattr(child, 'points', None)
+    if not points:
+        return False
+    
+    # 矩形框，直接使用四个顶点坐标
+    if shape_type == 'rectangle':
+        if len(points) < 8:
+            return False
+        x_coords = points[0::2]
+        y_coords = points[1::2]
+        buf[i] = (min(x_coords), min(y_coords), max(x_coords), max(y_coords))
+        return True
+    
+    # 多边形，计算外接矩形
+    if shape_type == 'polygon' and len(points) >= 3:
+        try:
+            # 检查多边形点的数据类型
+            if isinstance(points[0], (list, tuple)) and len(points[0]) >= 2:
+                # 点已经是列表或元组格式
+                polygon_coords = [(point[0], point[1]) for point in points]
+            elif isinstance(points[0], int) and len(points) >= 6:
+                # 点是整数格式，需要两两配对
+                polygon_coords = list(zip(points[0::2], points[1::2]))
+            else:
+                logger.warning("多边形点数据格式不支持: %s", type(points[0]))
+                return False
+            
+            bounding_rect = calculate_bounding_rectangle(polygon_coords)
+            if not bounding_rect or len(bounding_rect) < 4:
+                return False
+            
+            # 取外接矩形四个顶点的极值
+            xs = [pt[0] for pt in bounding_rect[:4]]
+            ys = [pt[1] for pt in bounding_rect[:4]]
+            buf[i] = (min(xs), min(ys), max(xs), max(ys))
+            return True
+        except Exception as e:
+            logger.error("处理多边形点时发生错误: %s", e)
+            return False
+    
+    return False
 
 def run_inference_with_manual_label(
     get_image_info_func,
@@ -22,7 +95,8 @@ def run_inference_with_manual_label(
     child_labels: List[Any] = None,
     shape_type: str = 'rectangle',
     callback=None,
-    main_window=None
+    main_window=None,
+    _single: bool = False
 ) -> Dict[str, Any]:
     """
     使用手动绘制的矩形框或多边形的外接矩形进行推理
@@ -33,6 +107,7 @@ def run_inference_with_manual_label(
         child_labels: 子标签列表，如果为None则使用选中的父标签下的所有子标签
         shape_type: 形状类型，'rectangle'表示矩形框，'polygon'表示多边形
         callback: 回调函数，用于在推理完成后处理结果
+        _single: 内部标志，为True时child_labels是单个子标签而非列表
     
     Returns:
         Dict[str, Any]: 推理结果，包含检测框和置信度等信息
@@ -43,18 +118,14 @@ def run_inference_with_manual_label(
             image_path = get_image_info_func()
             if not image_path:
                 result = {"error": "无法获取图片地址"}
-                if callback:
-                    callback(result)
-                inference_results_queue.put(result)
+                _deliver(result, callback)
                 return
             
             # 获取选中的父标签
             selected_parent = parent_label_list.get_selected()
             if not selected_parent:
                 result = {"error": "没有选中的父标签"}
-                if callback:
-                    callback(result)
-                inference_results_queue.put(result)
+                _deliver(result, callback)
                 return
             
             # 获取类别ID和父标签名称
@@ -65,89 +136,46 @@ def run_inference_with_manual_label(
             settings_manager = get_settings_manager()
             semantic_enabled = settings_manager.is_semantic_enabled()
             
-            # 获取边界框坐标
-            bounding_boxes = []
-            category_ids = []
-            
-            # 获取要处理的子标签列表
-            local_child_labels = child_labels
-            if local_child_labels is None:
-                # 获取当前图片的子标签
-                image_info = image_path
-                if hasattr(selected_parent, 'children_by_image') and image_info in selected_parent.children_by_image:
-                    local_child_labels = selected_parent.children_by_image[image_info]
-                else:
+            if _single:
+                # 单个子标签快速路径：不构造单元素列表，直接计算其边界框
+                scratch = np.empty((1, 4), dtype=np.float64)
+                n = 0
+                if _fill_child_bbox(scratch, 0, child_labels, shape_type):
+                    n = 1
+            else:
+                # 获取要处理的子标签列表
+                local_child_labels = child_labels
+                if local_child_labels is None:
+                    # 获取当前图片的子标签
+                    image_info = image_path
+                    if hasattr(selected_parent, 'children_by_image') and image_info in selected_parent.children_by_image:
+                        local_child_labels = selected_parent.children_by_image[image_info]
+                    else:
+                        local_child_labels = []
+                
+                # 确保local_child_labels是列表类型
+                if not isinstance(local_child_labels, list):
                     local_child_labels = []
-            
-            # 确保local_child_labels是列表类型
-            if not isinstance(local_child_labels, list):
-                local_child_labels = []
-            
-            # 处理每个子标签
-            for child in local_child_labels:
-                # 跳过占位符标签
-                if getattr(child, 'is_placeholder', False):
-                    continue
-                    
-                # 根据形状类型获取边界框
-                if shape_type == 'rectangle' and hasattr(child, 'points') and len(child.points) >= 8:
-                    # 矩形框，直接使用四个顶点坐标
-                    points = child.points
-                    # 确保是四个点
-                    if len(points) >= 8:
-                        # 直接使用顶点坐标计算边界框 (x_min, y_min, x_max, y_max)
-                        x_coords = [points[i] for i in range(0, len(points), 2)]
-                        y_coords = [points[i+1] for i in range(0, len(points), 2)]
-                        
-                        x_min = round(min(x_coords), 2)
-                        y_min = round(min(y_coords), 2)
-                        x_max = round(max(x_coords), 2)
-                        y_max = round(max(y_coords), 2)
-                        
-                        bounding_boxes.append([x_min, y_min, x_max, y_max])
-                        category_ids.append(category_id)
                 
-                elif shape_type == 'polygon' and hasattr(child, 'points') and len(child.points) >= 3:
-                    # 多边形，计算外接矩形
-                    try:
-                        # 检查多边形点的数据类型
-                        if isinstance(child.points[0], (list, tuple)) and len(child.points[0]) >= 2:
-                            # 点已经是列表或元组格式
-                            polygon_coords = [(point[0], point[1]) for point in child.points]
-                        elif isinstance(child.points[0], int) and len(child.points) >= 6:
-                            # 点是整数格式，需要两两配对
-                            polygon_coords = [(child.points[i], child.points[i+1]) for i in range(0, len(child.points), 2)]
-                        else:
-                            logger.warning(f"多边形点数据格式不支持: {type(child.points[0])}")
-                            continue
-                        
-                        bounding_rect = calculate_bounding_rectangle(polygon_coords)
-                        
-                        if bounding_rect and len(bounding_rect) >= 4:
-                            # 获取外接矩形的四个顶点
-                            x1, y1 = bounding_rect[0]
-                            x2, y2 = bounding_rect[1]
-                            x3, y3 = bounding_rect[2]
-                            x4, y4 = bounding_rect[3]
-                            
-                            # 计算边界框 (x_min, y_min, x_max, y_max)
-                            x_min = round(min(x1, x2, x3, x4), 2)
-                            y_min = round(min(y1, y2, y3, y4), 2)
-                            x_max = round(max(x1, x2, x3, x4), 2)
-                            y_max = round(max(y1, y2, y3, y4), 2)
-                            
-                            bounding_boxes.append([x_min, y_min, x_max, y_max])
-                            category_ids.append(category_id)
-                    except Exception as e:
-                        logger.error(f"处理多边形点时发生错误: {e}")
-                        continue
+                # 边界框直接写入本次推理独占的float64数组，下游接收其视图
+                scratch = np.empty((len(local_child_labels), 4), dtype=np.float64)
+                n = 0
+                
+                # 处理每个子标签
+                for child in local_child_labels:
+                    if _fill_child_bbox(scratch, n, child, shape_type):
+                        n += 1
+            
+            bounding_boxes = scratch[:n]
+            # 统一保留两位小数（一次向量化取整，代替逐坐标调用round）
+            np.round(bounding_boxes, 2, out=bounding_boxes)
+            # 所有边界框共享同一个类别ID，按数量一次性生成
+            category_ids = np.full(n, category_id, dtype=np.int32)
             
             # 如果没有有效的边界框，返回错误
-            if not bounding_boxes:
+            if n == 0:
                 result = {"error": "没有找到有效的边界框"}
-                if callback:
-                    callback(result)
-                inference_results_queue.put(result)
+                _deliver(result, callback)
                 return
             
             # 检查是否跳过yolov推理
@@ -158,23 +186,61 @@ def run_inference_with_manual_label(
             yolov_two_results = []
             filtered_results = []
             yolov_boxes = []
+            yoloe_future = None
+
+            def run_yoloe(bboxes, before_predict=None):
+                """根据语义激活开关状态选择YOLOE推理方法；before_predict返回False时不执行predict"""
+                if semantic_enabled:
+                    # 使用语义激活推理
+                    logger.info("使用语义激活推理，语义描述: %s", parent_label_name)
+                    return yoloe_semantic_inference(
+                        semantic_description=parent_label_name,
+                        bboxes=bboxes,
+                        cls_ids=category_ids,
+                        image_path=image_path,
+                        main_window=main_window,
+                        before_predict=before_predict
+                    )
+                # 使用普通推理
+                return yoloe_inference(bboxes, category_ids, image_path, main_window=main_window, before_predict=before_predict)
 
             if skip_yolov:
                 logger.info("设置中已启用跳过YOLOV推理，直接使用YOLOE进行推理")
                 use_yoloe = True
             else:
                 # 使用新的 yolov_inference 包装函数进行推理
-                logger.info(f"开始YOLOV推理（通过 yolov_inference），图片路径: {image_path}, 边界框数量: {len(bounding_boxes)}")
+                logger.info("开始YOLOV推理（通过 yolov_inference），图片路径: %s, 边界框数量: %d", image_path, n)
+                # 推测执行：YOLOV 推理的同时提交 YOLOE，YOLOE 只并行完成裁剪和提示构建，
+                # 在 predict 前等待 YOLOV 结果，仅当 YOLOV 失败时才真正执行，避免两个模型同时争用GPU
+                yolov_future = _executor.submit(yolov_inference, bounding_boxes, image_path, main_window=main_window)
+
+                def yoloe_gate():
+                    # YOLOE总是排在同一请求的YOLOV之后出队，等待时YOLOV已在运行或已完成，不会占满线程池造成死锁
+                    try:
+                        _, ok = yolov_future.result()
+                    except Exception:
+                        return True
+                    # 仅YOLOV明确失败（False）时执行；成功（True）或被取消（YOLOV_CANCELLED）时放弃
+                    return ok is False
+
+                yoloe_future = _executor.submit(run_yoloe, bounding_boxes, yoloe_gate)
                 try:
-                    bbox_list, yolov_success = yolov_inference(bounding_boxes, image_path, main_window=main_window)
+                    bbox_list, yolov_success = yolov_future.result()
                 except Exception as e:
-                    logger.error(f"调用 yolov_inference 失败: {e}")
+                    logger.error("调用 yolov_inference 失败: %s", e)
                     bbox_list, yolov_success = [], False
 
+                if yolov_success is YOLOV_CANCELLED:
+                    # 已切换到其他图片：旧图片的结果不能回退到YOLOE后投递到新图片上
+                    logger.info("yolov推理已被取代或取消，丢弃本次推理")
+                    yoloe_future.cancel()
+                    _deliver({"cancelled": True}, callback)
+                    return
                 if not yolov_success:
                     logger.info("yolov_inference 返回失败标志，将使用yoloe进行推理")
                     use_yoloe = True
                 else:
+                    yoloe_future.cancel()
                     # 将返回的 bbox 列表包装为与原逻辑兼容的筛选结果格式
                     filtered_results = [{"bbox": bbox} for bbox in bbox_list]
                     yolov_boxes = [bbox for bbox in bbox_list]
@@ -190,66 +256,46 @@ def run_inference_with_manual_label(
                         "filtered_results": filtered_results
                     }
                 }
-                if callback:
-                    callback(result)
-                inference_results_queue.put(result)
+                _deliver(result, callback)
                 return
             
             # 调用yoloe_moon.py中的推理方法
-            logger.info(f"开始YOLOE推理，图片路径: {image_path}, 边界框数量: {len(bounding_boxes)}")
-            
-            # 根据语义激活开关状态选择推理方法
-            if semantic_enabled:
-                # 使用语义激活推理
-                logger.info(f"使用语义激活推理，语义描述: {parent_label_name}")
-                yoloe_result = yoloe_semantic_inference(
-                    semantic_description=parent_label_name,
-                    bboxes=bounding_boxes,
-                    cls_ids=category_ids,  # category_ids已经是列表
-                    image_path=image_path,
-                    main_window=main_window
-                )
+            logger.info("开始YOLOE推理，图片路径: %s, 边界框数量: %d", image_path, n)
+            if yoloe_future is not None:
+                # 取回推测执行的 YOLOE 结果（通常已在 YOLOV 推理期间完成大部分工作）
+                yoloe_result = yoloe_future.result()
             else:
-                # 使用普通推理
-                yoloe_result = yoloe_inference(bounding_boxes, category_ids, image_path, main_window=main_window)
+                yoloe_result = run_yoloe(bounding_boxes)
             
             # 检查YOLOE推理结果
             if not yoloe_result:
                 result = {"error": "YOLOE推理未返回有效结果"}
-                if callback:
-                    callback(result)
-                inference_results_queue.put(result)
+                _deliver(result, callback)
                 return
             
             # 仅返回 YOLOE 的 bbox，统一形态供上层驱动 SAM 分割
             yoloe_boxes = [item["bbox"] for item in yoloe_result if "bbox" in item]
             if not yoloe_boxes:
                 result = {"error": "YOLOE推理结果中未找到有效的边界框"}
-                if callback:
-                    callback(result)
-                inference_results_queue.put(result)
+                _deliver(result, callback)
                 return
 
             result = {
                 "filtered_results": [{"bbox": bbox} for bbox in yoloe_boxes]
             }
-            if callback:
-                callback(result)
-            inference_results_queue.put(result)
+            _deliver(result, callback)
             return
         except Exception as e:
             error_result = {"error": str(e)}
-            logger.error(f"推理过程中发生错误: {e}")
-            if callback:
-                callback(error_result)
-            inference_results_queue.put(error_result)
+            logger.error("推理过程中发生错误: %s", e)
+            _deliver(error_result, callback)
     
     # 创建并启动后台线程执行推理
     thread = threading.Thread(target=inference_thread)
     thread.daemon = True  # 设置为守护线程，主程序退出时自动结束
     thread.start()
     
-    # 返回一个占位结果，实际结果将通过回调函数或队列获取
+    # 返回一个占位结果，实际结果将通过回调函数获取
     return {"status": "inference_started", "message": "推理已在后台线程中启动"}
 
 
@@ -277,20 +323,9 @@ def run_inference_with_specific_child(
     return run_inference_with_manual_label(
         get_image_info_func,
         parent_label_list,
-        [child_label],
+        child_label,
         shape_type,
         callback,
-        main_window
+        main_window,
+        _single=True
     )
-
-def get_latest_inference_result():
-    """
-    获取最新的推理结果
-    
-    Returns:
-        Dict[str, Any]: 最新的推理结果，如果没有结果则返回None
-    """
-    try:
-        return inference_results_queue.get_nowait()
-    except queue.Empty:
-        return None
@@ -1,13 +1,31 @@
 #单独直觉提示
 import os
 import logging
-import time
+import contextlib
 import numpy as np
 import cv2
+import torch
+import torch.nn.functional as F
+from ultralytics.engine.results import Boxes
 from ultralytics.models.yolo.yoloe import YOLOEVPSegPredictor
 from services.global_model_loader import get_global_model_loader
 from app_ui.remote_sensing import is_remote_sensing_enabled
 
+try:
+    from app_ui.draw_jk import _get_visible_image_rect
+except Exception:
+    _get_visible_image_rect = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
 logger = logging.getLogger(__name__)
 
 # 获取全局模型加载器
@@ -21,23 +39,406 @@ YOLOE_NMS_IOU_THRESHOLD = 0.1
 YOLOE_SEMANTIC_THRESHOLD_DEFAULT = 0.8
 # 默认提示权重
 YOLOE_DEFAULT_PROMPT_WEIGHT = 0.8
+# 半精度推理开关（环境变量 YOLOE_FP16=1 启用，仅在CUDA可用时生效）
+YOLOE_FP16 = os.environ.get("YOLOE_FP16", "0") == "1"
+
+
+def _as_bbox_array(bboxes):
+    """
+    将边界框转换为(N, 4)的float32数组；已是float32的ndarray直接返回，其他dtype（如调用方的float64边界框）转换为新数组，不修改输入
+    """
+    return np.asarray(bboxes, dtype=np.float32)
+
+
+def _read_image_size(image_path):
+    """
+    只解析文件头获取图片尺寸，不解码像素
+
+    Args:
+        image_path: 图片路径
+
+    Returns:
+        tuple: (width, height)，无法读取时返回None
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(image_path) as im:
+            return im.size
+    except Exception:
+        return None
+
+
+def _clip_bboxes_np(arr, shift_x, shift_y, crop_w, crop_h):
+    """
+    将边界框平移到裁剪图坐标系并与裁剪区域求交集（NumPy实现，原地修改arr）
+
+    Args:
+        arr: (N, 4)的float32边界框数组
+        shift_x, shift_y: 裁剪区域左上角在原图中的坐标
+        crop_w, crop_h: 裁剪区域尺寸
+
+    Returns:
+        tuple: (arr, valid)，valid为宽高均大于0的布尔掩码
+    """
+    arr -= (shift_x, shift_y, shift_x, shift_y)
+    np.clip(arr, 0, (crop_w, crop_h, crop_w, crop_h), out=arr)
+    valid = (arr[:, 2] > arr[:, 0]) & (arr[:, 3] > arr[:, 1])
+    return arr, valid
+
+
+_clip_bboxes = _clip_bboxes_np
+if njit is not None:
+    @njit(cache=True)
+    def _clip_bboxes_jit(arr, shift_x, shift_y, crop_w, crop_h):
+        """_clip_bboxes_np的numba实现，框数较少时避免NumPy逐次调度开销"""
+        n = arr.shape[0]
+        valid = np.empty(n, dtype=np.bool_)
+        for i in range(n):
+            x1 = min(max(arr[i, 0] - shift_x, 0.0), crop_w)
+            y1 = min(max(arr[i, 1] - shift_y, 0.0), crop_h)
+            x2 = min(max(arr[i, 2] - shift_x, 0.0), crop_w)
+            y2 = min(max(arr[i, 3] - shift_y, 0.0), crop_h)
+            arr[i, 0] = x1
+            arr[i, 1] = y1
+            arr[i, 2] = x2
+            arr[i, 3] = y2
+            valid[i] = x2 > x1 and y2 > y1
+        return arr, valid
+
+    try:
+        # 导入时预热编译，失败则回退到NumPy实现
+        _clip_bboxes_jit(np.zeros((1, 4), dtype=np.float32), 0.0, 0.0, 1.0, 1.0)
+        _clip_bboxes = _clip_bboxes_jit
+    except Exception as e:
+        logger.warning(f"numba编译边界框裁剪函数失败，使用NumPy实现: {e}")
+
+
+def _prepare_remote_crop(image_path, bboxes, cls_ids, prompt_weights=None, main_window=None):
+    """
+    遥感模式下按画布可见区域裁剪原图，并将边界框、类别ID和提示权重调整到裁剪图坐标系
 
-def inference_with_semantic_prompts(image_path, semantic_descriptions, bboxes, cls_ids, prompt_weights=None, semantic_threshold=YOLOE_SEMANTIC_THRESHOLD_DEFAULT, main_window=None):
+    Args:
+        image_path: 图片路径
+        bboxes: 边界框坐标列表，格式为[[x1, y1, x2, y2], ...]
+        cls_ids: 类别ID列表，格式为[id1, id2, ...]
+        prompt_weights: 提示权重列表，可选，裁剪后按保留的边界框数量重新对齐
+        main_window: 主窗口对象，用于获取画布信息
+
+    Returns:
+        tuple: (run_image, bboxes, cls_ids, prompt_weights, crop)
+            未裁剪时run_image与crop为None，其余参数原样返回；
+            裁剪时crop为包含shift_x、shift_y、crop_w、crop_h、orig_h、orig_w的字典
+    """
+    try:
+        remote_enabled = bool(is_remote_sensing_enabled())
+    except Exception:
+        remote_enabled = False
+
+    no_crop = (None, bboxes, cls_ids, prompt_weights, None)
+    if _get_visible_image_rect is None:
+        return no_crop
+    if not (remote_enabled and main_window and hasattr(main_window, 'canvas') and main_window.canvas):
+        return no_crop
+
+    try:
+        view = main_window.canvas
+        pixmap = None
+        if hasattr(view, 'image_item') and view.image_item:
+            try:
+                pixmap = view.image_item.pixmap()
+            except Exception:
+                pixmap = None
+        if pixmap is None and hasattr(view, 'current_pixmap'):
+            pixmap = getattr(view, 'current_pixmap', None)
+        if pixmap is None or pixmap.isNull():
+            return no_crop
+
+        crop_rect = _get_visible_image_rect(view)
+        if not crop_rect or crop_rect.width() <= 0 or crop_rect.height() <= 0:
+            return no_crop
+        img_w = int(pixmap.width())
+        img_h = int(pixmap.height())
+        if crop_rect.width() >= img_w and crop_rect.height() >= img_h:
+            return no_crop
+
+        def _fit(w, h):
+            """按原图尺寸计算裁剪区域并调整边界框，无需裁剪时返回None"""
+            shift_x = max(0, min(crop_rect.x(), w - 1))
+            shift_y = max(0, min(crop_rect.y(), h - 1))
+            crop_w = min(crop_rect.width(), w - shift_x)
+            crop_h = min(crop_rect.height(), h - shift_y)
+            if crop_w <= 0 or crop_h <= 0:
+                return None
+
+            # 调整边界框坐标到裁剪图：平移后与裁剪区域求交集（拷贝一份，避免改写调用方的缓冲区）
+            arr = np.array(bboxes, dtype=np.float32).reshape(-1, 4)
+            arr, valid = _clip_bboxes(arr, float(shift_x), float(shift_y), float(crop_w), float(crop_h))
+
+            # 只保留有效边界框
+            adjusted_bboxes = arr[valid].tolist()
+            cls_arr = np.asarray(cls_ids)
+            m = min(len(cls_arr), len(valid))
+            adjusted_cls_ids = cls_arr[:m][valid[:m]].tolist()
+
+            if not adjusted_bboxes:
+                # 如果没有有效的边界框，取消裁剪
+                return None
+            return shift_x, shift_y, crop_w, crop_h, adjusted_bboxes, adjusted_cls_ids
+
+        # 先从文件头读取尺寸，无需裁剪时不必解码整图
+        size = _read_image_size(image_path)
+        if size is not None and _fit(*size) is None:
+            return no_crop
+
+        # 文件级裁剪原图
+        img = cv2.imread(image_path)
+        if img is None:
+            return no_crop
+        h, w = img.shape[:2]
+        # 以解码后的实际尺寸为准（文件头尺寸可能因EXIF方向与解码结果不一致）
+        fit = _fit(w, h)
+        if fit is None:
+            return no_crop
+        shift_x, shift_y, crop_w, crop_h, adjusted_bboxes, adjusted_cls_ids = fit
+
+        # 拷贝为连续内存，避免切片视图在推理期间一直持有整张原图
+        crop = np.ascontiguousarray(img[shift_y:shift_y + crop_h, shift_x:shift_x + crop_w])
+        del img
+
+        # 调整提示权重
+        if prompt_weights:
+            prompt_weights = _align_prompt_weights(prompt_weights, len(adjusted_bboxes))
+
+        return crop, adjusted_bboxes, adjusted_cls_ids, prompt_weights, dict(
+            shift_x=shift_x,
+            shift_y=shift_y,
+            crop_w=crop_w,
+            crop_h=crop_h,
+            orig_h=h,
+            orig_w=w,
+        )
+    except Exception as e:
+        logger.warning(f"遥感模式裁剪失败，使用原图: {e}")
+        return no_crop
+
+
+def _align_prompt_weights(prompt_weights, n):
+    """裁剪后按边界框数量重新对齐提示权重，不足部分使用默认权重"""
+    return [prompt_weights[i] if i < len(prompt_weights) else YOLOE_DEFAULT_PROMPT_WEIGHT for i in range(n)]
+
+
+def _is_quantized():
+    """YOLOE模型是否已由模型加载器做了INT8量化（量化模型只能在CPU上以FP32接口运行）"""
+    return getattr(model_loader, "yoloe_quant", None) == "int8"
+
+
+def _autocast():
+    """YOLOE_FP16开启且CUDA可用时返回float16 autocast上下文，否则返回空上下文"""
+    if YOLOE_FP16 and not _is_quantized():
+        try:
+            if torch.cuda.is_available():
+                return torch.autocast(device_type='cuda', dtype=torch.float16)
+        except Exception:
+            pass
+    return contextlib.nullcontext()
+
+
+def _predict(model, inp, visual_prompts):
+    """
+    运行YOLOE推理，优先尝试指定VP Seg预测器，失败则回退；推理在torch.inference_mode()下进行，不记录自动求导信息
+
+    Args:
+        model: YOLOE模型
+        inp: 图片路径、ndarray，或其列表（批量推理）
+        visual_prompts: 视觉提示字典
+
+    Returns:
+        YOLOE推理结果，均失败时返回None
+    """
+    # 量化模型固定在CPU上运行，且不能再叠加半精度
+    extra = dict(device="cpu", half=False) if _is_quantized() else dict(half=YOLOE_FP16)
+    try:
+        with torch.inference_mode(), _autocast():
+            return model.predict(
+                inp,
+                visual_prompts=visual_prompts,
+                predictor=YOLOEVPSegPredictor,
+                conf=YOLOE_CONFIDENCE_THRESHOLD,
+                iou=YOLOE_NMS_IOU_THRESHOLD,
+                **extra,
+            )
+    except Exception as e:
+        logger.warning(f"YOLOE predictor 覆盖失败，采用回退路径: {e}")
+        try:
+            with torch.inference_mode(), _autocast():
+                return model.predict(
+                    inp,
+                    visual_prompts=visual_prompts,
+                    conf=YOLOE_CONFIDENCE_THRESHOLD,
+                    iou=YOLOE_NMS_IOU_THRESHOLD,
+                    **extra,
+                )
+        except Exception as e2:
+            logger.error(f"YOLOE predict 调用失败: {e2}")
+            return None
+
+
+def _remap_masks(mask_data, crop):
+    """
+    在设备上整体将裁剪图上的掩码缩放到裁剪区域尺寸（crop_h, crop_w），再贴回原图尺寸的空白掩码中
+    全部掩码共用一次分配的(N, orig_h, orig_w)缓冲区，避免逐个目标分配整幅掩码；掩码按0.5阈值二值化为uint8
+
+    Args:
+        mask_data: 裁剪图上的掩码张量，形状为(N, h, w)
+        crop: _prepare_remote_crop返回的裁剪信息
+
+    Returns:
+        原图尺寸的uint8掩码张量（0/1），形状为(N, orig_h, orig_w)
+    """
+    orig_h = crop["orig_h"]
+    orig_w = crop["orig_w"]
+    target_w = int(crop["crop_w"])
+    target_h = int(crop["crop_h"])
+    m = mask_data.unsqueeze(1).float()
+    if m.shape[-2] != target_h or m.shape[-1] != target_w:
+        m = F.interpolate(m, size=(target_h, target_w), mode='nearest')
+
+    x_start = int(crop["shift_x"])
+    y_start = int(crop["shift_y"])
+    if x_start == 0 and y_start == 0 and target_w == orig_w and target_h == orig_h:
+        # 裁剪区域即整幅原图，无需分配整幅缓冲区再粘贴
+        return (m[:, 0] > 0.5).to(torch.uint8)
+
+    full = torch.zeros((m.shape[0], orig_h, orig_w), dtype=torch.uint8, device=mask_data.device)
+    x_end = min(x_start + target_w, orig_w)
+    y_end = min(y_start + target_h, orig_h)
+    paste_h = max(0, y_end - y_start)
+    paste_w = max(0, x_end - x_start)
+    if paste_h > 0 and paste_w > 0:
+        full[:, y_start:y_end, x_start:x_end] = m[:, 0, :paste_h, :paste_w] > 0.5
+    return full
+
+
+def _has_bboxes(bboxes):
+    """判断是否提供了至少一个边界框（兼容列表与ndarray）"""
+    return bboxes is not None and len(bboxes) > 0
+
+
+def _empty_soa():
+    """返回不含任何目标的SoA结果"""
+    return {
+        "bboxes": np.zeros((0, 4), dtype=np.float64),
+        "confidences": np.zeros((0,), dtype=np.float32),
+        "masks": None,
+    }
+
+
+def _results_to_soa(result, crop=None):
+    """
+    将单张图片的YOLOE推理结果转换为SoA形式的数组字典；若经过裁剪，则将坐标和掩码映射回原图
+
+    Args:
+        result: 单张图片的推理结果（results[i]）
+        crop: _prepare_remote_crop返回的裁剪信息，未裁剪时为None
+
+    Returns:
+        dict: {"bboxes": (N, 4)数组, "confidences": (N,)数组, "masks": (N, H, W)的uint8数组或None}
+    """
+    boxes = result.boxes
+    masks = result.masks
+    if boxes is None or len(boxes) == 0:
+        return _empty_soa()
+
+    # 一次性取回全部置信度与坐标，避免逐框的设备同步；坐标保留两位小数
+    confs = boxes.conf.cpu().numpy()
+    xyxys = np.round(boxes.xyxy.cpu().numpy().astype(np.float64), 2)
+    if crop is not None:
+        # 使用了裁剪图，将坐标映射回原图
+        xyxys += (crop["shift_x"], crop["shift_y"], crop["shift_x"], crop["shift_y"])
+
+    # 保留置信度过滤逻辑，但模型已经过滤过一次，这里作为双重保障
+    keep = confs >= YOLOE_CONFIDENCE_THRESHOLD
+
+    # 掩码在设备上二值化为uint8后整体取回一次（裁剪时先贴回原图）
+    mask_arr = None
+    if masks is not None and len(masks.data) == len(confs):
+        if crop is not None:
+            mask_tensor = _remap_masks(masks.data, crop)
+        else:
+            mask_tensor = (masks.data > 0.5).to(torch.uint8)
+        mask_arr = mask_tensor.cpu().numpy()
+        if not keep.all():
+            mask_arr = mask_arr[keep]
+
+    return {
+        "bboxes": xyxys[keep],
+        "confidences": confs[keep],
+        "masks": mask_arr,
+    }
+
+
+def _soa_to_output(soa):
+    """
+    将SoA结果转换为字典列表
+
+    Args:
+        soa: _results_to_soa返回的数组字典
+
+    Returns:
+        包含矩形框坐标、置信度和掩码的列表，格式为[{"bbox": [x1, y1, x2, y2], "confidence": 置信度, "mask": 掩码数据}, ...]
+    """
+    output_data = []
+    masks = soa["masks"]
+    for i, (bbox, confidence) in enumerate(zip(soa["bboxes"].tolist(), soa["confidences"].tolist())):
+        result_item = {
+            "bbox": bbox,
+            "confidence": confidence
+        }
+        # 如果有掩码数据，添加掩码信息（整块掩码数组的视图）
+        if masks is not None:
+            result_item["mask"] = masks[i]
+        output_data.append(result_item)
+    return output_data
+
+
+def _results_to_output(result, crop=None):
+    """
+    将单张图片的YOLOE推理结果转换为字典列表；若经过裁剪，则将坐标和掩码映射回原图
+
+    Args:
+        result: 单张图片的推理结果（results[i]）
+        crop: _prepare_remote_crop返回的裁剪信息，未裁剪时为None
+
+    Returns:
+        包含矩形框坐标、置信度和掩码的列表，格式为[{"bbox": [x1, y1, x2, y2], "confidence": 置信度, "mask": 掩码数据}, ...]
+    """
+    return _soa_to_output(_results_to_soa(result, crop))
+
+
+def inference_with_semantic_prompts(image_path, semantic_descriptions, bboxes, cls_ids, prompt_weights=None, semantic_threshold=YOLOE_SEMANTIC_THRESHOLD_DEFAULT, main_window=None, _skip_remote=False, before_predict=None):
     """
     使用语义激活视觉提示进行YOLOE模型推理
     
     Args:
         image_path: 图片路径
         semantic_descriptions: 语义描述列表，如["a person standing"]
-        bboxes: 边界框坐标列表，格式为[[x1, y1, x2, y2], ...]
+        bboxes: 边界框坐标列表，格式为[[x1, y1, x2, y2], ...]，也可直接传入(N, 4)的数值数组
         cls_ids: 类别ID列表，格式为[id1, id2, ...]
         prompt_weights: 提示权重列表，可选，默认为None
         semantic_threshold: 语义阈值，默认为0.3
         main_window: 主窗口对象，用于获取画布信息（遥感模式使用）
+        _skip_remote: 调用方已完成遥感裁剪（image_path为裁剪图）时为True，跳过遥感模式处理
+        before_predict: 可选，输入和提示准备完成、执行predict前调用；返回False时放弃推理
     
     Returns:
         YOLOE推理结果
     """
+    # 没有视觉提示框时直接返回，避免构建提示数组和一次无意义的推理
+    if not _has_bboxes(bboxes):
+        logger.debug("no bboxes, skip YOLOE")
+        return []
+
     # 检查YOLOE模型是否已加载，如果未加载则等待或返回空结果
     if not model_loader.is_model_loaded("yoloe"):
         logger.warning("YOLOE模型尚未加载完成，请稍后再试")
@@ -46,99 +447,14 @@ def inference_with_semantic_prompts(image_path, semantic_descriptions, bboxes, c
     # 获取YOLOE模型
     model = model_loader.get_model("yoloe")
     
-    # 检查是否启用遥感模式
-    remote_enabled = False
-    use_cropped_path = None
-    run_image = None
-    shift_x = 0
-    shift_y = 0
-    crop_w = None
-    crop_h = None
-    
-    try:
-        remote_enabled = bool(is_remote_sensing_enabled())
-    except Exception:
-        remote_enabled = False
-    
-    # 遥感模式处理
-    if remote_enabled and main_window and hasattr(main_window, 'canvas') and main_window.canvas:
-        try:
-            from draw_jk import _get_visible_image_rect
-            view = main_window.canvas
-            pixmap = None
-            if hasattr(view, 'image_item') and view.image_item:
-                try:
-                    pixmap = view.image_item.pixmap()
-                except Exception:
-                    pixmap = None
-            if pixmap is None and hasattr(view, 'current_pixmap'):
-                pixmap = getattr(view, 'current_pixmap', None)
-
-            if pixmap is not None and not pixmap.isNull():
-                crop_rect = _get_visible_image_rect(view)
-                if crop_rect and crop_rect.width() > 0 and crop_rect.height() > 0:
-                    img_w = int(pixmap.width())
-                    img_h = int(pixmap.height())
-                    if not (crop_rect.width() >= img_w and crop_rect.height() >= img_h):
-                            # 文件级裁剪原图
-                            img = cv2.imread(image_path)
-                            if img is not None:
-                                h, w = img.shape[:2]
-                                shift_x = max(0, min(crop_rect.x(), w - 1))
-                                shift_y = max(0, min(crop_rect.y(), h - 1))
-                                crop_w = min(crop_rect.width(), w - shift_x)
-                                crop_h = min(crop_rect.height(), h - shift_y)
-                                
-                                if crop_w > 0 and crop_h > 0:
-                                    x1 = shift_x
-                                    y1 = shift_y
-                                    x2 = shift_x + crop_w
-                                    y2 = shift_y + crop_h
-                                    crop = img[y1:y2, x1:x2]
-                                    ts = int(time.time() * 1000)
-                                    temp_dir = os.path.join(os.getcwd(), 'temp_crops')
-                                    os.makedirs(temp_dir, exist_ok=True)
-                                    use_cropped_path = os.path.join(temp_dir, f'yoloe_semantic_prompt_crop_{ts}.png')
-                                    run_image = crop
-                                    
-                                    # 调整边界框坐标到裁剪图
-                                    adjusted_bboxes = []
-                                    adjusted_cls_ids = []
-                                    for i, bbox in enumerate(bboxes):
-                                        x1, y1, x2, y2 = bbox
-                                        # 计算边界框与裁剪区域的交集
-                                        new_x1 = max(0, x1 - shift_x)
-                                        new_y1 = max(0, y1 - shift_y)
-                                        new_x2 = min(crop_w, x2 - shift_x)
-                                        new_y2 = min(crop_h, y2 - shift_y)
-                                        
-                                        # 只保留有效边界框
-                                        if new_x2 > new_x1 and new_y2 > new_y1:
-                                            adjusted_bboxes.append([new_x1, new_y1, new_x2, new_y2])
-                                            if i < len(cls_ids):
-                                                adjusted_cls_ids.append(cls_ids[i])
-                                    
-                                    if adjusted_bboxes:
-                                        bboxes = adjusted_bboxes
-                                        cls_ids = adjusted_cls_ids
-                                        # 调整提示权重
-                                        if prompt_weights:
-                                            adjusted_prompt_weights = []
-                                            for i, bbox in enumerate(adjusted_bboxes):
-                                                if i < len(prompt_weights):
-                                                    adjusted_prompt_weights.append(prompt_weights[i])
-                                                else:
-                                                    adjusted_prompt_weights.append(YOLOE_DEFAULT_PROMPT_WEIGHT)
-                                            prompt_weights = adjusted_prompt_weights
-                                    else:
-                                        # 如果没有有效的边界框，取消裁剪
-                                        use_cropped_path = None
-        except Exception as e:
-            logger.warning(f"遥感模式裁剪失败，使用原图: {e}")
-            use_cropped_path = None
+    # 遥感模式处理（调用方已裁剪时跳过）
+    if _skip_remote:
+        run_image, crop = None, None
+    else:
+        run_image, bboxes, cls_ids, prompt_weights, crop = _prepare_remote_crop(image_path, bboxes, cls_ids, prompt_weights, main_window)
     
-    # 使用裁剪图路径或原图路径进行推理
-    run_path = use_cropped_path if use_cropped_path else image_path
+    # 裁剪图以ndarray直接传入推理，否则使用原图路径
+    run_input = run_image if run_image is not None else image_path
     
     # 如果没有提供提示权重，则使用默认值
     if prompt_weights is None:
@@ -159,441 +475,209 @@ def inference_with_semantic_prompts(image_path, semantic_descriptions, bboxes, c
         else:
             prompt_weights = (prompt_weights + prompt_weights[:len(bboxes)])[:len(bboxes)]
 
+    # 数组只构建一次，兼容键名直接复用同一对象
+    bb = _as_bbox_array(bboxes)
+    cc = np.asarray(cls_ids, dtype=np.int64)
+    pw = np.asarray(prompt_weights, dtype=np.float32)
+
     # 定义视觉提示字典，包含语义描述，并提供可能的键名同义以提升兼容性
     visual_prompts = dict(
-        bboxes=np.array(bboxes),
-        cls=np.array(cls_ids),
+        bboxes=bb,
+        cls=cc,
         prompts=semantic_descriptions,
-        prompt_weights=np.array(prompt_weights),
+        prompt_weights=pw,
         # 兼容键名（部分版本可能使用这些键）
         texts=semantic_descriptions,
-        text_weights=np.array(prompt_weights),
-        vp_bboxes=np.array(bboxes),
-        vp_cls=np.array(cls_ids),
+        text_weights=pw,
+        vp_bboxes=bb,
+        vp_cls=cc,
     )
 
-    logger.info(f"YOLOE visual_prompts: keys={list(visual_prompts.keys())}, bboxes={len(bboxes)}, texts={len(semantic_descriptions)}")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("YOLOE visual_prompts: keys=%s, bboxes=%d, texts=%d", list(visual_prompts.keys()), len(bboxes), len(semantic_descriptions))
+
+    if before_predict is not None and not before_predict():
+        logger.debug("before_predict returned False, skip YOLOE predict")
+        return []
 
     # 运行推理，优先尝试指定VP Seg预测器，失败则回退
-    try:
-            inp = run_image if run_image is not None else run_path
-            results = model.predict(
-                inp,
-                visual_prompts=visual_prompts,
-                predictor=YOLOEVPSegPredictor,
-                conf=YOLOE_CONFIDENCE_THRESHOLD,
-                iou=YOLOE_NMS_IOU_THRESHOLD,
-            )
-    except Exception as e:
-        logger.warning(f"YOLOE predictor 覆盖失败，采用回退路径: {e}")
-        try:
-            inp = run_image if run_image is not None else run_path
-            results = model.predict(
-                inp,
-                visual_prompts=visual_prompts,
-                conf=YOLOE_CONFIDENCE_THRESHOLD,
-                iou=YOLOE_NMS_IOU_THRESHOLD,
-            )
-        except Exception as e2:
-            logger.error(f"YOLOE predict 调用失败: {e2}")
-            return []
+    results = _predict(model, run_input, visual_prompts)
+    if results is None:
+        return []
     
     # 如果使用了裁剪图，将结果坐标映射回原图
-    if run_image is not None and crop_w and crop_h and results and len(results) > 0:
+    if crop is not None and results and len(results) > 0:
+        shift_x = crop["shift_x"]
+        shift_y = crop["shift_y"]
+        orig_h = crop["orig_h"]
+        orig_w = crop["orig_w"]
         # 获取检测结果
         boxes = results[0].boxes
         masks = results[0].masks
         
         if boxes is not None:
-            # 转换边界框坐标
-            adjusted_boxes = []
-            for box in boxes:
-                # 获取边界框坐标
-                bbox = box.xyxy[0].cpu().numpy()
-                # 将坐标映射回原图
-                orig_x1 = bbox[0] + shift_x
-                orig_y1 = bbox[1] + shift_y
-                orig_x2 = bbox[2] + shift_x
-                orig_y2 = bbox[3] + shift_y
-                
-                # 更新边界框坐标
-                box.xyxy[0] = torch.tensor([orig_x1, orig_y1, orig_x2, orig_y2], device=box.xyxy[0].device)
-                adjusted_boxes.append(box)
+            # 在设备上整体平移边界框坐标，映射回原图（拷贝数据，推理张量不允许原地修改）
+            data = boxes.data.clone()
+            data[:, :4] += data.new_tensor([shift_x, shift_y, shift_x, shift_y])
             
             # 更新结果中的边界框
-            results[0].boxes = adjusted_boxes
+            results[0].boxes = Boxes(data, (orig_h, orig_w))
             
             # 如果有掩码数据，需要调整掩码坐标
-            if masks is not None:
-                adjusted_masks = []
-                # 预先读取原图尺寸，避免每次循环重复 I/O
-                img0 = cv2.imread(image_path)
-                orig_h, orig_w = (img0.shape[:2] if img0 is not None else (None, None))
-                for i, mask in enumerate(masks.data):
-                    mask_data = mask.cpu().numpy()
-                    if orig_h is None or orig_w is None:
-                        # 无法获取原图尺寸则跳过回映射
-                        adjusted_masks.append(mask)
-                        continue
-                    # 将掩码先缩放到裁剪图尺寸（crop_h, crop_w），再贴回原图偏移位置
-                    target_w = int(crop_w)
-                    target_h = int(crop_h)
-                    if mask_data.shape[1] != target_w or mask_data.shape[0] != target_h:
-                        try:
-                            mask_resized = cv2.resize(mask_data, (target_w, target_h), interpolation=cv2.INTER_NEAREST)
-                        except Exception:
-                            mask_resized = mask_data
-                    else:
-                        mask_resized = mask_data
-
-                    full_mask = np.zeros((orig_h, orig_w), dtype=mask_resized.dtype)
-                    x_start = int(shift_x)
-                    y_start = int(shift_y)
-                    x_end = min(x_start + target_w, orig_w)
-                    y_end = min(y_start + target_h, orig_h)
-
-                    paste_h = max(0, y_end - y_start)
-                    paste_w = max(0, x_end - x_start)
-                    if paste_h > 0 and paste_w > 0:
-                        full_mask[y_start:y_end, x_start:x_end] = mask_resized[:paste_h, :paste_w]
-                    # 转换回tensor
-                    adjusted_masks.append(torch.tensor(full_mask, device=mask.device))
-
-                # 更新结果中的掩码
-                if adjusted_masks:
-                    masks.data = torch.stack(adjusted_masks)
+            if masks is not None and len(masks.data) > 0:
+                # 在设备上整体将掩码缩放到裁剪图尺寸，再贴回原图偏移位置，更新结果中的掩码
+                masks.data = _remap_masks(masks.data, crop).to(masks.data.dtype)
     
     return results
 
-def yoloe_inference(bboxes, cls_ids, image_path, main_window=None):
+def yoloe_inference_soa(bboxes, cls_ids, image_path, main_window=None, before_predict=None):
     """
-    使用YOLOE模型进行推理
+    使用YOLOE模型进行推理，以SoA数组形式返回结果，便于下游做向量化处理
     
     Args:
-        bboxes: 边界框坐标列表，格式为[[x1, y1, x2, y2], ...]
+        bboxes: 边界框坐标列表，格式为[[x1, y1, x2, y2], ...]，也可直接传入(N, 4)的数值数组
         cls_ids: 类别ID列表，格式为[id1, id2, ...]
         image_path: 图片路径
         main_window: 主窗口对象，用于获取画布信息（遥感模式使用）
+        before_predict: 可选，输入和提示准备完成、执行predict前调用；返回False时放弃推理
     
     Returns:
-        包含矩形框坐标、置信度和掩码的列表，格式为[{"bbox": [x1, y1, x2, y2], "confidence": 置信度, "mask": 掩码数据}, ...]
+        dict: {"bboxes": (N, 4)数组, "confidences": (N,)数组, "masks": (N, H, W)的uint8数组或None}
     """
+    # 没有视觉提示框时直接返回，避免构建提示数组和一次无意义的推理
+    if not _has_bboxes(bboxes):
+        logger.debug("no bboxes, skip YOLOE")
+        return _empty_soa()
+
     # 检查YOLOE模型是否已加载，如果未加载则等待或返回空结果
     if not model_loader.is_model_loaded("yoloe"):
         logger.warning("YOLOE模型尚未加载完成，请稍后再试")
-        return []
+        return _empty_soa()
     
     # 获取YOLOE模型
     model = model_loader.get_model("yoloe")
     
-    # 检查是否启用遥感模式
-    remote_enabled = False
-    use_cropped_path = None
-    run_image = None
-    shift_x = 0
-    shift_y = 0
-    crop_w = None
-    crop_h = None
-    
-    try:
-        remote_enabled = bool(is_remote_sensing_enabled())
-    except Exception:
-        remote_enabled = False
-    
     # 遥感模式处理
-    if remote_enabled and main_window and hasattr(main_window, 'canvas') and main_window.canvas:
-        try:
-            from draw_jk import _get_visible_image_rect
-            view = main_window.canvas
-            pixmap = None
-            if hasattr(view, 'image_item') and view.image_item:
-                try:
-                    pixmap = view.image_item.pixmap()
-                except Exception:
-                    pixmap = None
-            if pixmap is None and hasattr(view, 'current_pixmap'):
-                pixmap = getattr(view, 'current_pixmap', None)
-
-            if pixmap is not None and not pixmap.isNull():
-                crop_rect = _get_visible_image_rect(view)
-                if crop_rect and crop_rect.width() > 0 and crop_rect.height() > 0:
-                    img_w = int(pixmap.width())
-                    img_h = int(pixmap.height())
-                    if not (crop_rect.width() >= img_w and crop_rect.height() >= img_h):
-                            # 文件级裁剪原图
-                            img = cv2.imread(image_path)
-                            if img is not None:
-                                h, w = img.shape[:2]
-                                shift_x = max(0, min(crop_rect.x(), w - 1))
-                                shift_y = max(0, min(crop_rect.y(), h - 1))
-                                crop_w = min(crop_rect.width(), w - shift_x)
-                                crop_h = min(crop_rect.height(), h - shift_y)
-                                
-                                if crop_w > 0 and crop_h > 0:
-                                    x1 = shift_x
-                                    y1 = shift_y
-                                    x2 = shift_x + crop_w
-                                    y2 = shift_y + crop_h
-                                    crop = img[y1:y2, x1:x2]
-                                    ts = int(time.time() * 1000)
-                                    temp_dir = os.path.join(os.getcwd(), 'temp_crops')
-                                    os.makedirs(temp_dir, exist_ok=True)
-                                    use_cropped_path = os.path.join(temp_dir, f'yoloe_crop_{ts}.png')
-                                    run_image = crop
-                                    
-                                    # 调整边界框坐标到裁剪图
-                                    adjusted_bboxes = []
-                                    adjusted_cls_ids = []
-                                    for i, bbox in enumerate(bboxes):
-                                        x1, y1, x2, y2 = bbox
-                                        # 计算边界框与裁剪区域的交集
-                                        new_x1 = max(0, x1 - shift_x)
-                                        new_y1 = max(0, y1 - shift_y)
-                                        new_x2 = min(crop_w, x2 - shift_x)
-                                        new_y2 = min(crop_h, y2 - shift_y)
-                                        
-                                        # 只保留有效边界框
-                                        if new_x2 > new_x1 and new_y2 > new_y1:
-                                            adjusted_bboxes.append([new_x1, new_y1, new_x2, new_y2])
-                                            if i < len(cls_ids):
-                                                adjusted_cls_ids.append(cls_ids[i])
-                                    
-                                    if adjusted_bboxes:
-                                        bboxes = adjusted_bboxes
-                                        cls_ids = adjusted_cls_ids
-                                    else:
-                                        # 如果没有有效的边界框，取消裁剪
-                                        use_cropped_path = None
-        except Exception as e:
-            logger.warning(f"遥感模式裁剪失败，使用原图: {e}")
-            use_cropped_path = None
+    run_image, bboxes, cls_ids, _, crop = _prepare_remote_crop(image_path, bboxes, cls_ids, main_window=main_window)
     
-    # 使用裁剪图路径或原图路径进行推理
-    run_path = use_cropped_path if use_cropped_path else image_path
+    # 裁剪图以ndarray直接传入推理，否则使用原图路径
+    run_input = run_image if run_image is not None else image_path
     
     # 定义视觉提示字典
     visual_prompts = dict(
-        bboxes=np.array(bboxes),
-        cls=np.array(cls_ids),
+        bboxes=_as_bbox_array(bboxes),
+        cls=np.asarray(cls_ids, dtype=np.int64),
     )
 
+    if before_predict is not None and not before_predict():
+        logger.debug("before_predict returned False, skip YOLOE predict")
+        return _empty_soa()
+
     # 运行推理，显式传递置信度阈值，失败时回退
-    try:
-        inp = run_image if run_image is not None else run_path
-        results = model.predict(
-            inp,
-            visual_prompts=visual_prompts,
-            predictor=YOLOEVPSegPredictor,
-            conf=YOLOE_CONFIDENCE_THRESHOLD,
-            iou=YOLOE_NMS_IOU_THRESHOLD,
-        )
-    except Exception as e:
-        logger.warning(f"YOLOE predictor 覆盖失败，采用回退路径: {e}")
-        try:
-            inp = run_image if run_image is not None else run_path
-            results = model.predict(
-                inp,
-                visual_prompts=visual_prompts,
-                conf=YOLOE_CONFIDENCE_THRESHOLD,
-                iou=YOLOE_NMS_IOU_THRESHOLD,
-            )
-        except Exception as e2:
-            logger.error(f"YOLOE predict 调用失败: {e2}")
-            return []
+    results = _predict(model, run_input, visual_prompts)
+    if not results:
+        return _empty_soa()
 
-    # 提取矩形框坐标、置信度和掩码
-    output_data = []
-    if results and len(results) > 0:
-        # 获取检测结果
-        boxes = results[0].boxes
-        masks = results[0].masks
-        
-        if boxes is not None:
-            for i, box in enumerate(boxes):
-                # 获取置信度
-                confidence = float(box.conf[0].cpu().numpy())
-                
-                # 保留置信度过滤逻辑，但模型已经过滤过一次，这里作为双重保障
-                if confidence >= YOLOE_CONFIDENCE_THRESHOLD:
-                    # 获取边界框坐标
-                    bbox = box.xyxy[0].cpu().numpy().tolist()
-                    # 保留两位小数
-                    bbox = [round(coord, 2) for coord in bbox]
-                    
-                    # 创建结果字典
-                    result_item = {
-                        "bbox": bbox,
-                        "confidence": confidence
-                    }
-                    
-                    # 如果有掩码数据，添加掩码信息
-                    if masks is not None and i < len(masks.data):
-                        mask_data = masks.data[i].cpu().numpy()
-                        result_item["mask"] = mask_data
-                    
-                    output_data.append(result_item)
+    return _results_to_soa(results[0], crop)
+
+def yoloe_inference(bboxes, cls_ids, image_path, main_window=None, before_predict=None):
+    """
+    使用YOLOE模型进行推理
     
-    # 如果使用了裁剪图，将结果坐标映射回原图
-    if run_image is not None and crop_w and crop_h:
-        adjusted_results = []
-        for item in output_data:
-            bbox = item["bbox"]
-            x1, y1, x2, y2 = bbox
-            # 将坐标映射回原图
-            orig_x1 = x1 + shift_x
-            orig_y1 = y1 + shift_y
-            orig_x2 = x2 + shift_x
-            orig_y2 = y2 + shift_y
-            
-            adjusted_item = {
-                "bbox": [orig_x1, orig_y1, orig_x2, orig_y2],
-                "confidence": item["confidence"]
-            }
-            
-            # 如果有掩码数据，需要调整掩码坐标
-            if "mask" in item:
-                mask = item["mask"]
-                # 预先读取原图尺寸以避免重复 I/O
-                img0 = cv2.imread(image_path)
-                if img0 is not None:
-                    orig_h, orig_w = img0.shape[:2]
-                    # 将掩码缩放到裁剪图尺寸（crop_h, crop_w），再贴回原图
-                    target_w = int(crop_w)
-                    target_h = int(crop_h)
-                    if mask.shape[1] != target_w or mask.shape[0] != target_h:
-                        try:
-                            mask_resized = cv2.resize(mask, (target_w, target_h), interpolation=cv2.INTER_NEAREST)
-                        except Exception:
-                            mask_resized = mask
-                    else:
-                        mask_resized = mask
-
-                    full_mask = np.zeros((orig_h, orig_w), dtype=mask_resized.dtype)
-                    x_start = int(shift_x)
-                    y_start = int(shift_y)
-                    x_end = min(x_start + target_w, orig_w)
-                    y_end = min(y_start + target_h, orig_h)
-                    paste_h = max(0, y_end - y_start)
-                    paste_w = max(0, x_end - x_start)
-                    if paste_h > 0 and paste_w > 0:
-                        full_mask[y_start:y_end, x_start:x_end] = mask_resized[:paste_h, :paste_w]
-                    adjusted_item["mask"] = full_mask
-            
-            adjusted_results.append(adjusted_item)
-        
-        return adjusted_results
+    Args:
+        bboxes: 边界框坐标列表，格式为[[x1, y1, x2, y2], ...]，也可直接传入(N, 4)的数值数组
+        cls_ids: 类别ID列表，格式为[id1, id2, ...]
+        image_path: 图片路径
+        main_window: 主窗口对象，用于获取画布信息（遥感模式使用）
+        before_predict: 可选，输入和提示准备完成、执行predict前调用；返回False时放弃推理
     
-    return output_data
+    Returns:
+        包含矩形框坐标、置信度和掩码的列表，格式为[{"bbox": [x1, y1, x2, y2], "confidence": 置信度, "mask": 掩码数据}, ...]
+    """
+    return _soa_to_output(yoloe_inference_soa(bboxes, cls_ids, image_path, main_window, before_predict))
 
-def yoloe_semantic_inference(semantic_description, bboxes, cls_ids, image_path, prompt_weights=None, semantic_threshold=YOLOE_SEMANTIC_THRESHOLD_DEFAULT, main_window=None):
+def yoloe_inference_batch(items, main_window=None):
+    """
+    批量YOLOE推理：将多张图片及其视觉提示合并为一次predict调用
+    
+    Args:
+        items: 列表，每项为(image_path, bboxes, cls_ids)
+        main_window: 主窗口对象，用于获取画布信息（遥感模式使用）
+    
+    Returns:
+        与items一一对应的结果列表，每项格式同yoloe_inference的返回值
+    """
+    if not items:
+        return []
+
+    # 检查YOLOE模型是否已加载，如果未加载则等待或返回空结果
+    if not model_loader.is_model_loaded("yoloe"):
+        logger.warning("YOLOE模型尚未加载完成，请稍后再试")
+        return [[] for _ in items]
+
+    # 获取YOLOE模型
+    model = model_loader.get_model("yoloe")
+
+    # 逐张准备输入（遥感模式下裁剪），批量模式下视觉提示以每张图片一个数组的列表形式传入；没有提示框的图片不参与推理
+    outputs = [[] for _ in items]
+    indices = []
+    inputs = []
+    crops = []
+    batch_bboxes = []
+    batch_cls = []
+    for idx, (image_path, bboxes, cls_ids) in enumerate(items):
+        if not _has_bboxes(bboxes):
+            continue
+        indices.append(idx)
+        run_image, bboxes, cls_ids, _, crop = _prepare_remote_crop(image_path, bboxes, cls_ids, main_window=main_window)
+        inputs.append(run_image if run_image is not None else image_path)
+        crops.append(crop)
+        batch_bboxes.append(_as_bbox_array(bboxes))
+        batch_cls.append(np.asarray(cls_ids, dtype=np.int64))
+
+    if not inputs:
+        return outputs
+
+    visual_prompts = dict(
+        bboxes=batch_bboxes,
+        cls=batch_cls,
+    )
+
+    results = _predict(model, inputs, visual_prompts)
+    if not results:
+        return outputs
+
+    for idx, result, crop in zip(indices, results, crops):
+        outputs[idx] = _results_to_output(result, crop)
+    return outputs
+
+def yoloe_semantic_inference(semantic_description, bboxes, cls_ids, image_path, prompt_weights=None, semantic_threshold=YOLOE_SEMANTIC_THRESHOLD_DEFAULT, main_window=None, before_predict=None):
     """
     使用语义激活视觉提示进行YOLOE模型推理
     
     Args:
         semantic_description: 语义描述字符串，如"a person standing"
-        bboxes: 边界框坐标列表，格式为[[x1, y1, x2, y2], ...]
+        bboxes: 边界框坐标列表，格式为[[x1, y1, x2, y2], ...]，也可直接传入(N, 4)的数值数组
         cls_ids: 类别ID列表，格式为[id1, id2, ...]
         image_path: 图片路径
         prompt_weights: 提示权重列表，可选，默认为None
         semantic_threshold: 语义阈值，默认为0.3
         main_window: 主窗口对象，用于获取画布信息（遥感模式使用）
+        before_predict: 可选，输入和提示准备完成、执行predict前调用；返回False时放弃推理
     
     Returns:
         包含矩形框坐标、置信度和掩码的列表，格式为[{"bbox": [x1, y1, x2, y2], "confidence": 置信度, "mask": 掩码数据}, ...]
     """
-    # 检查是否启用遥感模式
-    remote_enabled = False
-    use_cropped_path = None
-    run_image = None
-    shift_x = 0
-    shift_y = 0
-    crop_w = None
-    crop_h = None
-    
-    try:
-        remote_enabled = bool(is_remote_sensing_enabled())
-    except Exception:
-        remote_enabled = False
-    
+    # 没有视觉提示框时直接返回，跳过裁剪和语义描述对齐
+    if not _has_bboxes(bboxes):
+        logger.debug("no bboxes, skip YOLOE")
+        return []
+
     # 遥感模式处理
-    if remote_enabled and main_window and hasattr(main_window, 'canvas') and main_window.canvas:
-        try:
-            from draw_jk import _get_visible_image_rect
-            view = main_window.canvas
-            pixmap = None
-            if hasattr(view, 'image_item') and view.image_item:
-                try:
-                    pixmap = view.image_item.pixmap()
-                except Exception:
-                    pixmap = None
-            if pixmap is None and hasattr(view, 'current_pixmap'):
-                pixmap = getattr(view, 'current_pixmap', None)
-
-            if pixmap is not None and not pixmap.isNull():
-                crop_rect = _get_visible_image_rect(view)
-                if crop_rect and crop_rect.width() > 0 and crop_rect.height() > 0:
-                    img_w = int(pixmap.width())
-                    img_h = int(pixmap.height())
-                    if not (crop_rect.width() >= img_w and crop_rect.height() >= img_h):
-                            # 文件级裁剪原图
-                            img = cv2.imread(image_path)
-                            if img is not None:
-                                h, w = img.shape[:2]
-                                shift_x = max(0, min(crop_rect.x(), w - 1))
-                                shift_y = max(0, min(crop_rect.y(), h - 1))
-                                crop_w = min(crop_rect.width(), w - shift_x)
-                                crop_h = min(crop_rect.height(), h - shift_y)
-                                
-                                if crop_w > 0 and crop_h > 0:
-                                    x1 = shift_x
-                                    y1 = shift_y
-                                    x2 = shift_x + crop_w
-                                    y2 = shift_y + crop_h
-                                    crop = img[y1:y2, x1:x2]
-                                    ts = int(time.time() * 1000)
-                                    temp_dir = os.path.join(os.getcwd(), 'temp_crops')
-                                    os.makedirs(temp_dir, exist_ok=True)
-                                    use_cropped_path = os.path.join(temp_dir, f'yoloe_semantic_crop_{ts}.png')
-                                    run_image = crop
-                                    
-                                    # 调整边界框坐标到裁剪图
-                                    adjusted_bboxes = []
-                                    adjusted_cls_ids = []
-                                    for i, bbox in enumerate(bboxes):
-                                        x1, y1, x2, y2 = bbox
-                                        # 计算边界框与裁剪区域的交集
-                                        new_x1 = max(0, x1 - shift_x)
-                                        new_y1 = max(0, y1 - shift_y)
-                                        new_x2 = min(crop_w, x2 - shift_x)
-                                        new_y2 = min(crop_h, y2 - shift_y)
-                                        
-                                        # 只保留有效边界框
-                                        if new_x2 > new_x1 and new_y2 > new_y1:
-                                            adjusted_bboxes.append([new_x1, new_y1, new_x2, new_y2])
-                                            if i < len(cls_ids):
-                                                adjusted_cls_ids.append(cls_ids[i])
-                                    
-                                    if adjusted_bboxes:
-                                        bboxes = adjusted_bboxes
-                                        cls_ids = adjusted_cls_ids
-                                        # 调整提示权重
-                                        if prompt_weights:
-                                            adjusted_prompt_weights = []
-                                            for i, bbox in enumerate(adjusted_bboxes):
-                                                if i < len(prompt_weights):
-                                                    adjusted_prompt_weights.append(prompt_weights[i])
-                                                else:
-                                                    adjusted_prompt_weights.append(YOLOE_DEFAULT_PROMPT_WEIGHT)
-                                            prompt_weights = adjusted_prompt_weights
-                                    else:
-                                        # 如果没有有效的边界框，取消裁剪
-                                        use_cropped_path = None
-        except Exception as e:
-            logger.warning(f"遥感模式裁剪失败，使用原图: {e}")
-            use_cropped_path = None
+    run_image, bboxes, cls_ids, prompt_weights, crop = _prepare_remote_crop(image_path, bboxes, cls_ids, prompt_weights, main_window)
     
-    # 使用裁剪图路径或原图路径进行推理
-    run_path = use_cropped_path if use_cropped_path else image_path
+    # 裁剪图以ndarray直接传入推理，否则使用原图路径
+    run_input = run_image if run_image is not None else image_path
     
     # 如果没有提供提示权重，则使用默认值
     if prompt_weights is None:
@@ -604,105 +688,29 @@ def yoloe_semantic_inference(semantic_description, bboxes, cls_ids, image_path,
     
     # 使用语义激活视觉提示进行推理
     semantic_results = inference_with_semantic_prompts(
-        image_path=(run_image if run_image is not None else run_path),
+        image_path=run_input,
         semantic_descriptions=semantic_descriptions,
         bboxes=bboxes,
         cls_ids=cls_ids,
         prompt_weights=prompt_weights,
-        semantic_threshold=semantic_threshold
+        semantic_threshold=semantic_threshold,
+        _skip_remote=True,
+        before_predict=before_predict,
     )
 
-    # 提取矩形框坐标、置信度和掩码
+    # 提取矩形框坐标、置信度和掩码，若使用了裁剪图则映射回原图
     output_data = []
     if semantic_results and len(semantic_results) > 0:
-        # 获取检测结果
-        boxes = semantic_results[0].boxes
-        masks = semantic_results[0].masks
-        
-        if boxes is not None:
-            for i, box in enumerate(boxes):
-                # 获取置信度
-                confidence = float(box.conf[0].cpu().numpy())
-                
-                # 保留置信度过滤逻辑，但模型已经过滤过一次，这里作为双重保障
-                if confidence >= YOLOE_CONFIDENCE_THRESHOLD:
-                    # 获取边界框坐标
-                    bbox = box.xyxy[0].cpu().numpy().tolist()
-                    # 保留两位小数
-                    bbox = [round(coord, 2) for coord in bbox]
-                    
-                    # 创建结果字典
-                    result_item = {
-                        "bbox": bbox,
-                        "confidence": confidence
-                    }
-                    
-                    # 如果有掩码数据，添加掩码信息
-                    if masks is not None and i < len(masks.data):
-                        mask_data = masks.data[i].cpu().numpy()
-                        result_item["mask"] = mask_data
-                    
-                    output_data.append(result_item)
-    
-    # 如果使用了裁剪图，将结果坐标映射回原图
-    if run_image is not None and crop_w and crop_h:
-        adjusted_results = []
-        for item in output_data:
-            bbox = item["bbox"]
-            x1, y1, x2, y2 = bbox
-            # 将坐标映射回原图
-            orig_x1 = x1 + shift_x
-            orig_y1 = y1 + shift_y
-            orig_x2 = x2 + shift_x
-            orig_y2 = y2 + shift_y
-            
-            adjusted_item = {
-                "bbox": [orig_x1, orig_y1, orig_x2, orig_y2],
-                "confidence": item["confidence"]
-            }
-            
-            # 如果有掩码数据，需要调整掩码坐标
-            if "mask" in item:
-                mask = item["mask"]
-                # 预先读取原图尺寸以避免重复 I/O
-                img0 = cv2.imread(image_path)
-                if img0 is not None:
-                    orig_h, orig_w = img0.shape[:2]
-                    # 将掩码缩放到裁剪图尺寸（crop_h, crop_w），再贴回原图
-                    target_w = int(crop_w)
-                    target_h = int(crop_h)
-                    if mask.shape[1] != target_w or mask.shape[0] != target_h:
-                        try:
-                            mask_resized = cv2.resize(mask, (target_w, target_h), interpolation=cv2.INTER_NEAREST)
-                        except Exception:
-                            mask_resized = mask
-                    else:
-                        mask_resized = mask
-
-                    full_mask = np.zeros((orig_h, orig_w), dtype=mask_resized.dtype)
-                    x_start = int(shift_x)
-                    y_start = int(shift_y)
-                    x_end = min(x_start + target_w, orig_w)
-                    y_end = min(y_start + target_h, orig_h)
-                    paste_h = max(0, y_end - y_start)
-                    paste_w = max(0, x_end - x_start)
-                    if paste_h > 0 and paste_w > 0:
-                        full_mask[y_start:y_end, x_start:x_end] = mask_resized[:paste_h, :paste_w]
-                    adjusted_item["mask"] = full_mask
-            
-            adjusted_results.append(adjusted_item)
-        
-        output_data = adjusted_results
+        output_data = _results_to_output(semantic_results[0], crop)
     
     # 处理和显示结果
     if output_data:
-        logger.info(f"检测到 {len(output_data)} 个目标")
+        logger.info("检测到 %d 个目标", len(output_data))
         # 仅在调试模式下打印详细信息
         if logger.isEnabledFor(logging.DEBUG):
             for i, data in enumerate(output_data):
-                logger.debug(f"目标 {i+1}: 置信度={data['confidence']:.4f}, 边界框={data['bbox']}, 掩码={'有' if 'mask' in data else '无'}")
+                logger.debug("目标 %d: 置信度=%.4f, 边界框=%s, 掩码=%s", i + 1, data['confidence'], data['bbox'], '有' if 'mask' in data else '无')
     else:
         logger.info("未检测到目标")
     
     return output_data
-
@@ -1,12 +1,16 @@
 import os
+import math
 import logging
-import time
 import numpy as np
-import cv2
 from services.global_model_loader import get_global_model_loader
 from app_ui.set import get_settings_manager
 from app_ui.remote_sensing import is_remote_sensing_enabled
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 # 获取全局模型加载器实例
 model_loader = get_global_model_loader()
 logger = logging.getLogger(__name__)
@@ -14,23 +18,270 @@ logger = logging.getLogger(__name__)
 
 # 全局YOLO置信度阈值
 YOLO_CONFIDENCE_THRESHOLD = 0.5
+# 遥感裁剪图较长边不小于该值时分块批量推理
+YOLOV_TILE_MIN_SIDE = 1280
+# 分块之间的重叠比例
+YOLOV_TILE_OVERLAP = 0.1
+# 分块结果合并时的NMS IoU阈值
+YOLOV_TILE_NMS_IOU = 0.5
 
-def yolov_one(bboxes, image_path):
+def _tile_grid(w, h, overlap=YOLOV_TILE_OVERLAP):
     """
-    使用YOLO模型对图片的输入坐标区域进行推理
-    
+    将图片划分为2x2个带重叠的分块，每块约为原图一半尺寸
+
     Args:
-        bboxes: 边界框坐标列表，格式为[[x1, y1, x2, y2], ...]
-        image_path: 图片路径
-    
+        w: 图片宽度
+        h: 图片高度
+        overlap: 相邻分块的重叠比例
+
+    Returns:
+        分块列表，格式为[(x, y, tile_w, tile_h), ...]
+    """
+    tile_w = min(w, int(math.ceil(w / 2 * (1 + overlap))))
+    tile_h = min(h, int(math.ceil(h / 2 * (1 + overlap))))
+    xs = sorted({0, w - tile_w})
+    ys = sorted({0, h - tile_h})
+    return [(x, y, tile_w, tile_h) for y in ys for x in xs]
+
+def _tiled_inference(img, cancel_event=None):
+    """
+    分块批量推理：各分块合并为一次predict调用，坐标平移回整图后按类别做NMS去除重叠区域的重复框
+
+    Args:
+        img: 待推理的图片（ndarray）
+        cancel_event: 取消令牌，被置位时放弃推理
+
+    Returns:
+        与model_loader.run_yolov_inference相同形式的结果列表（仅含一个Results），失败时返回None
+    """
+    try:
+        import torch
+        import torchvision
+        from ultralytics.engine.results import Results
+
+        h, w = img.shape[:2]
+        grid = _tile_grid(w, h)
+        tiles = [img[y:y + th, x:x + tw] for x, y, tw, th in grid]
+        results = model_loader.run_yolov_inference(tiles, cancel_event=cancel_event)
+        if not results or len(results) != len(tiles):
+            return None
+
+        parts = []
+        for (x, y, _, _), result in zip(grid, results):
+            if result.boxes is None or len(result.boxes) == 0:
+                continue
+            data = result.boxes.data.clone()
+            data[:, :4] += data.new_tensor([x, y, x, y])
+            parts.append(data)
+
+        if parts:
+            data = torch.cat(parts)
+            keep = torchvision.ops.batched_nms(data[:, :4], data[:, 4], data[:, 5], YOLOV_TILE_NMS_IOU)
+            data = data[keep]
+        else:
+            data = torch.zeros((0, 6))
+        return [Results(orig_img=img, path="", names=results[0].names, boxes=data)]
+    except Exception as e:
+        logger.warning(f"分块推理失败，使用整图推理: {e}")
+        return None
+
+def _empty_detections():
+    """返回不含任何目标的SoA检测结果"""
+    return {
+        "bboxes": np.zeros((0, 4), dtype=np.float64),
+        "confidences": np.zeros((0,), dtype=np.float32),
+        "class_ids": np.zeros((0,), dtype=np.int32),
+    }
+
+def _select_detections(dets, mask):
+    """按布尔掩码或索引数组从SoA检测结果中选取目标"""
+    return {key: value[mask] for key, value in dets.items()}
+
+def _extract_detections(results, threshold=YOLO_CONFIDENCE_THRESHOLD):
+    """
+    一次性从推理结果中取回全部边界框、置信度和类别ID，并按置信度阈值过滤
+
+    Args:
+        results: YOLO推理结果列表
+        threshold: 置信度阈值
+
+    Returns:
+        dict: {"bboxes": (N, 4)的float64数组, "confidences": (N,)数组, "class_ids": (N,)的int32数组}
+    """
+    if not results or len(results) == 0 or results[0].boxes is None:
+        return _empty_detections()
+    boxes = results[0].boxes
+    conf = boxes.conf.cpu().numpy()
+    keep = conf >= threshold
+    return {
+        "bboxes": boxes.xyxy.cpu().numpy().astype(np.float64)[keep],
+        "confidences": conf[keep],
+        "class_ids": boxes.cls.cpu().numpy().astype(np.int32)[keep],
+    }
+
+def _output_to_detections(output_data):
+    """将字典列表形式的检测结果转换为SoA检测结果"""
+    if not output_data:
+        return _empty_detections()
+    return {
+        "bboxes": np.asarray([r["bbox"] for r in output_data], dtype=np.float64).reshape(-1, 4),
+        "confidences": np.asarray([r["confidence"] for r in output_data], dtype=np.float32),
+        "class_ids": np.asarray([r["class_id"] for r in output_data], dtype=np.int32),
+    }
+
+def detections_to_output(dets):
+    """
+    将SoA检测结果转换为字典列表，供仍使用字典接口的调用方
+
+    Args:
+        dets: SoA检测结果
+
     Returns:
         包含矩形框坐标、置信度和类别ID的列表，格式为[{"bbox": [x1, y1, x2, y2], "confidence": 置信度, "class_id": 类别ID}, ...]
     """
-    # 检查YOLO模型是否已加载，如果未加载则等待或返回空结果
-    if not model_loader.is_model_loaded("yolov"):
-        logger.warning("YOLO模型尚未加载完成，请稍后再试")
-        return []
-    
+    return [
+        {
+            "bbox": bbox,
+            "confidence": confidence,
+            "class_id": class_id
+        }
+        for bbox, confidence, class_id in zip(dets["bboxes"].tolist(), dets["confidences"].tolist(), dets["class_ids"].tolist())
+    ]
+
+def _center_in_any_np(cx, cy, rects):
+    """
+    判断每个中心点是否落在任一区域内（NumPy广播，一次比较全部中心点与区域）
+
+    Args:
+        cx, cy: (N,)的中心点坐标数组
+        rects: (M, 4)的float64区域数组
+
+    Returns:
+        (N,)的布尔数组
+    """
+    x1i, y1i, x2i, y2i = rects.T
+    cx = cx[:, None]
+    cy = cy[:, None]
+    return ((cx >= x1i) & (cx <= x2i) & (cy >= y1i) & (cy <= y2i)).any(axis=1)
+
+
+def _class_in_np(cls, ref_cls):
+    """判断每个类别ID是否出现在参考类别ID中（NumPy实现）"""
+    return np.isin(cls, ref_cls)
+
+
+_center_in_any = _center_in_any_np
+_class_in = _class_in_np
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _center_in_any_jit(cx, cy, rects):
+        """_center_in_any_np的numba实现，命中第一个区域即停止，不生成(N, M)中间数组"""
+        n = cx.size
+        keep = np.zeros(n, dtype=np.bool_)
+        for i in range(n):
+            for j in range(rects.shape[0]):
+                if rects[j, 0] <= cx[i] <= rects[j, 2] and rects[j, 1] <= cy[i] <= rects[j, 3]:
+                    keep[i] = True
+                    break
+        return keep
+
+    @njit(cache=True)
+    def _class_in_jit(cls, ref_cls):
+        """_class_in_np的numba实现"""
+        n = cls.size
+        keep = np.zeros(n, dtype=np.bool_)
+        for i in range(n):
+            for j in range(ref_cls.size):
+                if cls[i] == ref_cls[j]:
+                    keep[i] = True
+                    break
+        return keep
+
+    try:
+        # 导入时预热编译，失败则回退到NumPy实现
+        _probe = np.zeros(1, dtype=np.float64)
+        _center_in_any_jit(_probe, _probe, np.zeros((1, 4), dtype=np.float64))
+        _class_in_jit(np.zeros(1, dtype=np.int32), np.zeros(1, dtype=np.int32))
+        _center_in_any = _center_in_any_jit
+        _class_in = _class_in_jit
+    except Exception as e:
+        logger.warning(f"numba编译类别筛选函数失败，使用NumPy实现: {e}")
+
+
+def _centers_in_regions(xyxy, regions):
+    """
+    判断每个检测框的中心点是否落在任一输入区域内
+
+    Args:
+        xyxy: (N, 4)的检测框数组
+        regions: 输入区域，格式为[[x1, y1, x2, y2], ...]或(M, 4)数组
+
+    Returns:
+        (N,)的布尔数组
+    """
+    inb = np.ascontiguousarray(regions, dtype=np.float64).reshape(-1, 4)
+    if len(xyxy) == 0 or len(inb) == 0:
+        return np.zeros(len(xyxy), dtype=bool)
+    cx = (xyxy[:, 0] + xyxy[:, 2]) / 2
+    cy = (xyxy[:, 1] + xyxy[:, 3]) / 2
+    return _center_in_any(cx, cy, inb)
+
+def _crop_geometry(crop_rect, w, h):
+    """按原图尺寸收紧可见区域，返回(shift_x, shift_y, crop_w, crop_h)"""
+    shift_x = max(0, min(crop_rect.x(), w - 1))
+    shift_y = max(0, min(crop_rect.y(), h - 1))
+    crop_w = min(crop_rect.width(), w - shift_x)
+    crop_h = min(crop_rect.height(), h - shift_y)
+    return shift_x, shift_y, crop_w, crop_h
+
+def _read_crop(image_path, crop_rect):
+    """
+    读取原图中与画布可见区域对应的裁剪图（BGR ndarray）
+
+    优先使用QImageReader.setClipRect只解码该区域（QImage/QImageReader可在工作线程中安全使用，
+    画布上的QPixmap则不行）；图片带EXIF方向变换或读取失败时回退到cv2整图解码后切片
+
+    Args:
+        image_path: 图片路径
+        crop_rect: 可见区域（原图坐标）
+
+    Returns:
+        tuple: (crop, shift_x, shift_y, crop_w, crop_h)，区域无效或读取失败时返回None
+    """
+    try:
+        from PyQt6.QtCore import QRect
+        from PyQt6.QtGui import QImage, QImageReader, QImageIOHandler
+        reader = QImageReader(image_path)
+        size = reader.size()
+        if size.isValid() and reader.transformation() == QImageIOHandler.Transformation.TransformationNone:
+            shift_x, shift_y, crop_w, crop_h = _crop_geometry(crop_rect, size.width(), size.height())
+            if crop_w <= 0 or crop_h <= 0:
+                return None
+            reader.setClipRect(QRect(shift_x, shift_y, crop_w, crop_h))
+            qimg = reader.read()
+            if not qimg.isNull() and qimg.width() == crop_w and qimg.height() == crop_h:
+                qimg = qimg.convertToFormat(QImage.Format.Format_BGR888)
+                ptr = qimg.constBits()
+                ptr.setsize(qimg.sizeInBytes())
+                arr = np.frombuffer(ptr, dtype=np.uint8).reshape(crop_h, qimg.bytesPerLine())
+                crop = arr[:, :crop_w * 3].reshape(crop_h, crop_w, 3).copy()
+                return crop, shift_x, shift_y, crop_w, crop_h
+    except Exception as e:
+        logger.debug(f"按区域解码失败，回退到整图解码: {e}")
+
+    # 仅遥感模式需要OpenCV，延迟导入以缩短启动时间
+    import cv2
+    img = cv2.imread(image_path)
+    if img is None:
+        return None
+    h, w = img.shape[:2]
+    shift_x, shift_y, crop_w, crop_h = _crop_geometry(crop_rect, w, h)
+    if crop_w <= 0 or crop_h <= 0:
+        return None
+    return img[shift_y:shift_y + crop_h, shift_x:shift_x + crop_w], shift_x, shift_y, crop_w, crop_h
+
+def _sync_custom_weight():
+    """若设置中指定了自定义YOLO权重且与当前模型不一致，则切换到该权重"""
     try:
         settings_mgr = get_settings_manager()
         custom_path = getattr(settings_mgr, 'custom_yolov_weight', None)
@@ -42,104 +293,135 @@ def yolov_one(bboxes, image_path):
     except Exception:
         pass
 
-    # 线程安全地运行当前 YOLO 模型的推理
-    results = model_loader.run_yolov_inference(image_path)
-    
-    # 提取矩形框坐标、置信度和类别ID
-    output_data = []
-    if results and len(results) > 0:
-        # 获取检测结果
-        boxes = results[0].boxes
-        if boxes is not None:
-            for box in boxes:
-                # 获取置信度
-                confidence = float(box.conf[0].cpu().numpy())
-                
-                # 使用全局置信度阈值过滤结果
-                if confidence >= YOLO_CONFIDENCE_THRESHOLD:
-                    # 获取边界框坐标
-                    bbox = box.xyxy[0].cpu().numpy().tolist()
-                    # 保留两位小数
-                    bbox = [round(coord, 2) for coord in bbox]
-                    
-                    # 获取类别ID
-                    class_id = int(box.cls[0].cpu().numpy())
-                    
-                    # 检查边界框是否在输入的坐标区域内
-                    for input_bbox in bboxes:
-                        x1, y1, x2, y2 = input_bbox
-                        # 简单检查边界框中心点是否在输入区域内
-                        center_x = (bbox[0] + bbox[2]) / 2
-                        center_y = (bbox[1] + bbox[3]) / 2
-                        
-                        if x1 <= center_x <= x2 and y1 <= center_y <= y2:
-                            output_data.append({
-                                "bbox": bbox,
-                                "confidence": confidence,
-                                "class_id": class_id
-                            })
-                            break  # 只要在一个输入区域内就添加，避免重复
+def yolov_one_soa(bboxes, image_path, results=None, dets=None):
+    """
+    使用YOLO模型对图片的输入坐标区域进行推理，结果以SoA形式返回
+    
+    Args:
+        bboxes: 边界框坐标列表，格式为[[x1, y1, x2, y2], ...]，也可直接传入(N, 4)的float64数组
+        image_path: 图片路径
+        results: 可选，当前模型在该图片上已有的推理结果，提供时不再重复推理
+        dets: 可选，已从推理结果中提取的全图SoA检测结果，提供时不再推理和提取
+    
+    Returns:
+        tuple: (SoA检测结果, 是否成功)
+    """
+    # 检查YOLO模型是否已加载，如果未加载则等待或返回空结果
+    if not model_loader.is_model_loaded("yolov"):
+        logger.warning("YOLO模型尚未加载完成，请稍后再试")
+        return _empty_detections(), False
+    
+    if dets is None:
+        if results is None:
+            _sync_custom_weight()
+
+            # 线程安全地运行当前 YOLO 模型的推理
+            results = model_loader.run_yolov_inference(image_path)
+        
+        # 一次性取回矩形框坐标、置信度和类别ID，并使用全局置信度阈值过滤结果
+        dets = _extract_detections(results)
+    
+    # 坐标保留两位小数（不修改调用方传入的结果）
+    dets = dict(dets, bboxes=np.round(dets["bboxes"], 2))
+    
+    # 只保留中心点落在任一输入区域内的边界框（每个框至多保留一次）
+    dets = _select_detections(dets, _centers_in_regions(dets["bboxes"], bboxes))
     
     # 如果没有检测到目标，尝试使用不同的权重文件
-    if not output_data:
+    if len(dets["class_ids"]) == 0:
         logger.info("当前权重文件未检测到目标，尝试使用其他权重文件...")
         success, new_output_data = model_loader.try_different_yolov_weights(bboxes, image_path, YOLO_CONFIDENCE_THRESHOLD)
         if success:
-            output_data = new_output_data
+            dets = _output_to_detections(new_output_data)
             logger.info("找到合适的权重文件并成功检测到目标")
         else:
             logger.warning("yolov一阶段失败：尝试了所有权重文件，但没有找到能检测到目标的权重")
 
-    # 返回结果列表和成功标志
-    return output_data, bool(output_data)
+    # 返回结果和成功标志
+    return dets, len(dets["class_ids"]) > 0
 
-def yolov_two(image_path):
+def yolov_one(bboxes, image_path, results=None):
     """
-    使用YOLO模型对地址图片进行推理
+    使用YOLO模型对图片的输入坐标区域进行推理
     
     Args:
+        bboxes: 边界框坐标列表，格式为[[x1, y1, x2, y2], ...]，也可直接传入(N, 4)的float64数组
         image_path: 图片路径
+        results: 可选，当前模型在该图片上已有的推理结果，提供时不再重复推理
     
     Returns:
         包含矩形框坐标、置信度和类别ID的列表，格式为[{"bbox": [x1, y1, x2, y2], "confidence": 置信度, "class_id": 类别ID}, ...]
     """
+    dets, success = yolov_one_soa(bboxes, image_path, results)
+    return detections_to_output(dets), success
+
+def yolov_two_soa(image_path, results=None):
+    """
+    使用YOLO模型对地址图片进行推理，结果以SoA形式返回
+    
+    Args:
+        image_path: 图片路径
+        results: 可选，当前模型在该图片上已有的推理结果，提供时不再重复推理
+    
+    Returns:
+        SoA检测结果：{"bboxes": (N, 4)数组, "confidences": (N,)数组, "class_ids": (N,)数组}
+    """
     # 检查YOLO模型是否已加载，如果未加载则等待或返回空结果
     if not model_loader.is_model_loaded("yolov"):
         logger.warning("YOLO模型尚未加载完成，请稍后再试")
-        return []
+        return _empty_detections()
     
     # 线程安全地运行当前 YOLO 模型的推理
-    results = model_loader.run_yolov_inference(image_path)
-    
-    # 提取矩形框坐标、置信度和类别ID
-    output_data = []
-    if results and len(results) > 0:
-        # 获取检测结果
-        boxes = results[0].boxes
-        if boxes is not None:
-            for box in boxes:
-                # 获取置信度
-                confidence = float(box.conf[0].cpu().numpy())
-                
-                # 使用全局置信度阈值过滤结果
-                if confidence >= YOLO_CONFIDENCE_THRESHOLD:
-                    # 获取边界框坐标
-                    bbox = box.xyxy[0].cpu().numpy().tolist()
-                    
-                    # 获取类别ID
-                    class_id = int(box.cls[0].cpu().numpy())
-                    
-                    output_data.append({
-                        "bbox": bbox,
-                        "confidence": confidence,
-                        "class_id": class_id
-                    })
+    if results is None:
+        results = model_loader.run_yolov_inference(image_path)
+    
+    # 一次性取回矩形框坐标、置信度和类别ID，并使用全局置信度阈值过滤结果
+    dets = _extract_detections(results)
     
     # 如果没有检测到目标，输出提示信息
-    if not output_data:
+    if len(dets["class_ids"]) == 0:
         logger.info("yolov第二阶段无结果")
     
-    return output_data
+    return dets
+
+def yolov_two(image_path, results=None):
+    """
+    使用YOLO模型对地址图片进行推理
+    
+    Args:
+        image_path: 图片路径
+        results: 可选，当前模型在该图片上已有的推理结果，提供时不再重复推理
+    
+    Returns:
+        包含矩形框坐标、置信度和类别ID的列表，格式为[{"bbox": [x1, y1, x2, y2], "confidence": 置信度, "class_id": 类别ID}, ...]
+    """
+    return detections_to_output(yolov_two_soa(image_path, results))
+
+def filter_detections_by_class(one_dets, two_dets):
+    """
+    使用第一阶段SoA结果的类别ID为基准对第二阶段SoA结果进行筛选
+    
+    Args:
+        one_dets: yolov_one_soa输出的SoA检测结果
+        two_dets: yolov_two_soa输出的SoA检测结果
+    
+    Returns:
+        筛选后的SoA检测结果
+    """
+    one_ids = one_dets["class_ids"]
+    two_ids = two_dets["class_ids"]
+    if len(one_ids) == 0 or len(two_ids) == 0:
+        if len(two_ids) == 0 and len(one_ids) > 0:
+            logger.info("yolov结果不匹配")
+        return _empty_detections()
+    
+    filtered = _select_detections(two_dets, _class_in(two_ids, one_ids))
+    
+    # 如果没有匹配的结果，输出提示信息
+    if len(filtered["class_ids"]) == 0:
+        logger.info("yolov结果不匹配")
+    
+    return filtered
 
 def filter_results_by_class(yolov_one_results, yolov_two_results):
     """
@@ -152,20 +434,17 @@ def filter_results_by_class(yolov_one_results, yolov_two_results):
     Returns:
         筛选后的结果列表，格式为[{"bbox": [x1, y1, x2, y2], "confidence": 置信度, "class_id": 类别ID}, ...]
     """
-    # 提取yolov_one结果中的所有类别ID
-    yolov_one_class_ids = set()
-    for result in yolov_one_results:
-        yolov_one_class_ids.add(result["class_id"])
-    
     # 如果yolov_one结果中没有类别ID，返回空列表
-    if not yolov_one_class_ids:
+    if not yolov_one_results or not yolov_two_results:
+        if not yolov_two_results and yolov_one_results:
+            logger.info("yolov结果不匹配")
         return []
     
-    # 筛选yolov_two结果中类别ID与yolov_one结果中类别ID相同的目标
-    filtered_results = []
-    for result in yolov_two_results:
-        if result["class_id"] in yolov_one_class_ids:
-            filtered_results.append(result)
+    # 一次性提取两组结果的类别ID，向量化筛选yolov_two结果中类别ID与yolov_one结果中类别ID相同的目标
+    one_ids = np.fromiter((r["class_id"] for r in yolov_one_results), dtype=np.int64, count=len(yolov_one_results))
+    two_ids = np.fromiter((r["class_id"] for r in yolov_two_results), dtype=np.int64, count=len(yolov_two_results))
+    mask = np.isin(two_ids, one_ids)
+    filtered_results = [yolov_two_results[i] for i in np.flatnonzero(mask)]
     
     # 如果没有匹配的结果，输出提示信息
     if not filtered_results:
@@ -174,17 +453,21 @@ def filter_results_by_class(yolov_one_results, yolov_two_results):
     return filtered_results
 
 
+# yolov_inference被取代/取消时返回的成功标志；为假值，只判断真假的调用方按失败处理即可
+YOLOV_CANCELLED = None
+
 def yolov_inference(bboxes, image_path, main_window=None):
     """
     使用YOLOV模型进行推理
     
     Args:
-        bboxes: 边界框坐标列表，格式为[[x1, y1, x2, y2], ...]
+        bboxes: 边界框坐标列表，格式为[[x1, y1, x2, y2], ...]，也可直接传入(N, 4)的float64数组
         image_path: 图片路径
         main_window: 主窗口对象，用于获取画布信息（遥感模式使用）
     
     Returns:
-        包含矩形框坐标的列表，格式为[[x1, y1, x2, y2], ...]
+        (bbox_list, success)：bbox_list为[[x1, y1, x2, y2], ...]；success为True/False，
+        推理被切换图片取代或取消时为YOLOV_CANCELLED（None），调用方应直接丢弃结果而不是回退到YOLOE
     """
     # 检查YOLOV模型是否已加载，如果未加载则等待或返回空结果
     if not model_loader.is_model_loaded("yolov"):
@@ -193,7 +476,7 @@ def yolov_inference(bboxes, image_path, main_window=None):
     
     # 检查是否启用遥感模式
     remote_enabled = False
-    use_cropped_path = None
+    cropped = False
     run_image = None
     shift_x = 0
     shift_y = 0
@@ -225,86 +508,88 @@ def yolov_inference(bboxes, image_path, main_window=None):
                     img_w = int(pixmap.width())
                     img_h = int(pixmap.height())
                     if not (crop_rect.width() >= img_w and crop_rect.height() >= img_h):
-                            # 文件级裁剪原图
-                            img = cv2.imread(image_path)
-                            if img is not None:
-                                h, w = img.shape[:2]
-                                shift_x = max(0, min(crop_rect.x(), w - 1))
-                                shift_y = max(0, min(crop_rect.y(), h - 1))
-                                crop_w = min(crop_rect.width(), w - shift_x)
-                                crop_h = min(crop_rect.height(), h - shift_y)
+                            # 文件级裁剪原图（只解码可见区域）
+                            region = _read_crop(image_path, crop_rect)
+                            if region is not None:
+                                crop, shift_x, shift_y, crop_w, crop_h = region
+                                # 裁剪图以ndarray直接传入推理，不落盘
+                                cropped = True
+                                run_image = crop
+                                
+                                # 调整边界框坐标到裁剪图：整体平移后与裁剪区域求交集，只保留有效边界框
+                                b = np.array(bboxes, dtype=np.float64).reshape(-1, 4)
+                                b -= (shift_x, shift_y, shift_x, shift_y)
+                                np.clip(b, 0, (crop_w, crop_h, crop_w, crop_h), out=b)
+                                valid = (b[:, 2] > b[:, 0]) & (b[:, 3] > b[:, 1])
                                 
-                                if crop_w > 0 and crop_h > 0:
-                                    x1 = shift_x
-                                    y1 = shift_y
-                                    x2 = shift_x + crop_w
-                                    y2 = shift_y + crop_h
-                                    crop = img[y1:y2, x1:x2]
-                                    ts = int(time.time() * 1000)
-                                    temp_dir = os.path.join(os.getcwd(), 'temp_crops')
-                                    os.makedirs(temp_dir, exist_ok=True)
-                                    use_cropped_path = os.path.join(temp_dir, f'yolov_crop_{ts}.png')
-                                    run_image = crop
-                                    
-                                    # 调整边界框坐标到裁剪图
-                                    adjusted_bboxes = []
-                                    for bbox in bboxes:
-                                        x1, y1, x2, y2 = bbox
-                                        # 计算边界框与裁剪区域的交集
-                                        new_x1 = max(0, x1 - shift_x)
-                                        new_y1 = max(0, y1 - shift_y)
-                                        new_x2 = min(crop_w, x2 - shift_x)
-                                        new_y2 = min(crop_h, y2 - shift_y)
-                                        
-                                        # 只保留有效边界框
-                                        if new_x2 > new_x1 and new_y2 > new_y1:
-                                            adjusted_bboxes.append([new_x1, new_y1, new_x2, new_y2])
-                                    
-                                    if adjusted_bboxes:
-                                        bboxes = adjusted_bboxes
-                                    else:
-                                        # 如果没有有效的边界框，取消裁剪
-                                        use_cropped_path = None
+                                if valid.any():
+                                    bboxes = b[valid]
+                                else:
+                                    # 如果没有有效的边界框，取消裁剪
+                                    cropped = False
+                                    run_image = None
         except Exception as e:
             logger.warning(f"遥感模式裁剪失败，使用原图: {e}")
-            use_cropped_path = None
+            cropped = False
+            run_image = None
     
-    # 使用裁剪图路径或原图路径进行推理
-    run_path = use_cropped_path if use_cropped_path else image_path
+    # 使用裁剪图或原图路径进行推理
+    run_input = run_image if cropped else image_path
+    token = None
     
     try:
+        # 换到另一张图片的推理会取代本图片尚未完成的推理；切换图片时也会被取消
+        token = model_loader.new_yolov_token(image_path)
+
+        # 两个阶段使用同一模型对同一图片推理，只做一次前向，结果在两阶段间共享
+        _sync_custom_weight()
+        model_before = model_loader.get_model("yolov")
+        shared_results = None
+        if run_image is not None and max(run_image.shape[:2]) >= YOLOV_TILE_MIN_SIDE:
+            # 大尺寸遥感裁剪图分块批量推理，避免整图缩放后丢失小目标
+            shared_results = _tiled_inference(run_image, cancel_event=token)
+        if shared_results is None and not token.is_set():
+            shared_results = model_loader.run_yolov_inference(run_input, cancel_event=token)
+        if token.is_set():
+            logger.info("yolov推理已被取代，放弃本次结果")
+            return [], YOLOV_CANCELLED
+
+        # 单阶段：全图检测结果只提取一次，第一阶段为其中中心点落在输入区域内的子集，第二阶段即全图结果
+        all_dets = _extract_detections(shared_results)
+
         # First stage using the provided bboxes, now returns (results, success_flag)
-        one_results, one_success = yolov_one(bboxes, (run_image if run_image is not None else run_path))
+        one_dets, one_success = yolov_one_soa(bboxes, run_input, dets=all_dets)
 
+        if token.is_set():
+            return [], YOLOV_CANCELLED
         # 只有当第一阶段成功时才执行第二阶段
         if not one_success:
             return [], False
 
-        # 第二阶段执行
-        two_results = yolov_two((run_image if run_image is not None else run_path))
+        # 第二阶段直接复用全图结果；若第一阶段回退切换了权重，则需用新权重重新推理
+        if model_loader.get_model("yolov") is model_before:
+            two_dets = all_dets
+        else:
+            two_dets = yolov_two_soa(run_input)
+
+        if token.is_set():
+            return [], YOLOV_CANCELLED
 
         # Filter results by class consistency
-        filtered = filter_results_by_class(one_results, two_results)
-
-        # Extract bbox coordinates
-        bbox_list = [item['bbox'] for item in filtered if isinstance(item, dict) and 'bbox' in item]
+        filtered = filter_detections_by_class(one_dets, two_dets)
+        xyxy = filtered["bboxes"]
         
-        # 如果使用了裁剪图，将结果坐标映射回原图
-        if use_cropped_path and crop_w and crop_h:
-            adjusted_results = []
-            for bbox in bbox_list:
-                x1, y1, x2, y2 = bbox
-                # 将坐标映射回原图
-                orig_x1 = x1 + shift_x
-                orig_y1 = y1 + shift_y
-                orig_x2 = x2 + shift_x
-                orig_y2 = y2 + shift_y
-                adjusted_results.append([orig_x1, orig_y1, orig_x2, orig_y2])
-            return adjusted_results, bool(adjusted_results)
+        # 如果使用了裁剪图，将结果坐标整体映射回原图
+        if cropped and crop_w and crop_h:
+            xyxy = xyxy + (shift_x, shift_y, shift_x, shift_y)
         
-        success = bool(bbox_list)
-        return bbox_list, success
+        bbox_list = xyxy.tolist()
+        return bbox_list, bool(bbox_list)
     except Exception as e:
+        # 推理被取消导致的异常不回退到YOLOE
+        if token is not None and token.is_set():
+            logger.info(f"yolov推理已被取消: {e}")
+            return [], YOLOV_CANCELLED
         # 错误日志并返回失败标志
         logger.error(f"yolov_inference 错误: {e}")
         return [], False
@@ -1,18 +1,114 @@
 import os
+import re
 import sys
+import hashlib
 import logging
+import threading
+from typing import Optional
 from PyQt6.QtWidgets import QFileDialog, QMessageBox, QListWidgetItem
-from PyQt6.QtGui import QImage, QIcon, QPixmap
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtGui import QImage, QIcon, QPixmap, QImageReader
+from PyQt6.QtCore import Qt, QSize, QTimer, QObject, QRunnable, pyqtSignal, QStandardPaths
 
 logger = logging.getLogger(__name__)
 
+# 可选：natsort提供C加速的自然排序键，未安装时使用下面的正则实现
+try:
+    from natsort import natsort_keygen, ns
+    _natsort_key = natsort_keygen(alg=ns.IGNORECASE)
+except ImportError:
+    _natsort_key = None
+
 class ImageProcessingConfig:# 图片处理配置类
     SUPPORTED_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp']
     SUPPORTED_FORMATS = ['jpg', 'jpeg', 'png', 'bmp', 'tif', 'tiff', 'webp']
     LARGE_DATASET_THRESHOLD = 1000
     MEMORY_OPTIMIZE_THRESHOLD = 5000
 
+# 资源列表缩略图尺寸（与资源列表的图标尺寸一致）
+THUMBNAIL_SIZE = QSize(80, 80)
+# 带Alpha通道的缩略图交给主线程前转换的像素格式（光栅绘制引擎下QPixmap的原生格式）
+_THUMBNAIL_FORMAT = QImage.Format.Format_ARGB32_Premultiplied
+
+# 扩展名集合，用于O(1)判断
+_SUPPORTED_EXT_SET = frozenset(ImageProcessingConfig.SUPPORTED_EXTENSIONS)
+
+def iter_image_files(directory):
+    """递归遍历目录，逐个产出支持格式的图片路径
+    
+    顺序与os.walk一致：先产出当前目录的文件，再依次进入子目录；不跟随目录符号链接
+    
+    Args:
+        directory: 根目录
+        
+    Yields:
+        str: 图片文件路径
+    """
+    subdirs = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
+                except OSError:
+                    pass
+                if os.path.splitext(entry.name)[1].lower() in _SUPPORTED_EXT_SET:
+                    yield entry.path
+    except OSError as e:
+        logger.warning(f"无法读取目录 {directory}: {e}")
+        return
+    for sub in subdirs:
+        yield from iter_image_files(sub)
+
+_DIGITS_RE = re.compile(r'(\d+)')
+
+def natural_sort_key(name):
+    """文件名自然排序键（不区分大小写）：img_2 排在 img_10 之前
+    
+    Args:
+        name: 文件名
+        
+    Returns:
+        排序键，用于sort/sorted的key参数
+    """
+    if _natsort_key is not None:
+        return _natsort_key(name)
+    parts = _DIGITS_RE.split(name.lower())
+    # 奇数位为数字段，按整数比较；偶数位为文本段（位置固定，不会出现int与str比较）
+    parts[1::2] = [int(p) for p in parts[1::2]]
+    return parts
+
+def list_image_entries(directory):
+    """单次scandir列出目录（不递归）中支持格式的图片，按文件名自然排序
+    
+    Args:
+        directory: 目录路径
+        
+    Returns:
+        list: (文件名, 文件路径) 元组列表，目录不可读时返回空列表
+    """
+    entries = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                # 与glob的'*.ext'保持一致，忽略隐藏文件
+                if entry.name.startswith('.'):
+                    continue
+                if os.path.splitext(entry.name)[1].lower() not in _SUPPORTED_EXT_SET:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                entries.append((entry.name, entry.path))
+    except OSError as e:
+        logger.warning(f"无法读取目录 {directory}: {e}")
+        return []
+    entries.sort(key=lambda e: natural_sort_key(e[0]))
+    return entries
+
 def load_image_directory(main_window):
     """加载图片目录功能
     
@@ -30,29 +126,33 @@ def load_image_directory(main_window):
         
         if directory and os.path.isdir(directory):
             # 获取目录中的所有图片文件
-            image_files = []
-            
-            for root, dirs, files in os.walk(directory):
-                for file in files:
-                    if any(file.lower().endswith(ext) for ext in ImageProcessingConfig.SUPPORTED_EXTENSIONS):
-                        image_files.append(os.path.join(root, file))
+            image_files = list(iter_image_files(directory))
             
             if image_files:
                 # 清空当前资源列表
                 main_window.resource_list.clear()
                 
                 # 设置新的图片列表
-                main_window.images = image_files
+                main_window._set_images(image_files)
+                
+                # 插入期间暂停列表重绘并屏蔽信号，避免逐项插入时反复刷新布局
+                rl = main_window.resource_list
+                size_hint = QSize(110, 130)
+                rl.setUpdatesEnabled(False)
+                rl.blockSignals(True)
+                try:
+                    # 为每个图片文件创建列表项
+                    for file_path in image_files:
+                        item = QListWidgetItem(os.path.basename(file_path))
+                        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                        item.setSizeHint(size_hint)
+                        rl.addItem(item)
+                finally:
+                    rl.blockSignals(False)
+                    rl.setUpdatesEnabled(True)
                 
-                # 为每个图片文件创建列表项
-                for i, file_path in enumerate(image_files):
-                    item = QListWidgetItem(os.path.basename(file_path))
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                    item.setSizeHint(QSize(110, 130))
-                    main_window.resource_list.addItem(item)
-                    # 优化：只加载前10项的缩略图，其余项在滚动时加载
-                    if i < 10:
-                        main_window._load_thumbnail_for_item(file_path, i)
+                # 只加载可见项的缩略图，其余项在滚动时加载；放到事件循环中执行，等列表布局生效
+                QTimer.singleShot(0, main_window._on_resource_list_scrolled)
                 
                 # 更新窗口标题
                 main_window.setWindowTitle(f'手动标注工具 - {directory}')
@@ -70,6 +170,176 @@ def load_image_directory(main_window):
         QMessageBox.critical(main_window, "错误", f"加载图片目录时发生错误: {str(e)}")
 
 
+def read_scaled_image(image_path: str, size: QSize = THUMBNAIL_SIZE) -> Optional[QImage]:
+    """按目标尺寸解码图片（保持宽高比）
+    
+    通过QImageReader.setScaledSize让解码器直接输出缩小后的图像，JPEG等格式可在解码阶段缩放，无需先解码整幅原图
+    
+    Args:
+        image_path (str): 图片文件路径
+        size (QSize): 目标尺寸上限
+        
+    Returns:
+        QImage: 缩小后的图片，解码失败时返回None
+    """
+    reader = QImageReader(image_path)
+    reader.setAutoTransform(True)
+    src_size = reader.size()
+    # 原图本身不超过目标尺寸时按原尺寸解码，避免在解码阶段放大小图
+    needs_scale = src_size.width() > size.width() or src_size.height() > size.height()
+    if src_size.isValid() and needs_scale:
+        reader.setScaledSize(src_size.scaled(size, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return None
+    if not src_size.isValid() and (image.width() > size.width() or image.height() > size.height()):
+        # 无法预先获知尺寸的格式，解码后再缩放
+        image = image.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    return image
+
+
+class ThumbnailDiskCache:
+    """缩略图磁盘缓存：以(原图绝对路径, 修改时间, 缩略图尺寸)为键保存缩小后的PNG，
+    再次打开目录时直接读取几KB的小图，无需解码原图
+
+    只使用QImage读写，可在工作线程中调用；总大小超过max_bytes时按最近使用时间淘汰
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 200 * 1024 * 1024):
+        if cache_dir is None:
+            base = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericCacheLocation)
+            if not base:
+                base = os.path.join(os.path.expanduser('~'), '.cache')
+            cache_dir = os.path.join(base, 'moonlight', 'thumbs')
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._evicted = False
+
+    def _entry_path(self, image_path: str, size: QSize) -> Optional[str]:
+        """计算缓存文件路径；原图不存在时返回None"""
+        try:
+            st = os.stat(image_path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(image_path)}|{st.st_mtime_ns}|{st.st_size}|{size.width()}x{size.height()}"
+        return os.path.join(self.cache_dir, hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest() + '.png')
+
+    def get(self, image_path: str, size: QSize = THUMBNAIL_SIZE) -> Optional[QImage]:
+        """读取缓存的缩略图，未命中时返回None"""
+        entry = self._entry_path(image_path, size)
+        if entry is None or not os.path.exists(entry):
+            return None
+        image = QImage(entry)
+        if image.isNull():
+            return None
+        try:
+            # 更新访问时间，用于按最近使用淘汰
+            os.utime(entry)
+        except OSError:
+            pass
+        return image
+
+    def put(self, image_path: str, image: QImage, size: QSize = THUMBNAIL_SIZE) -> None:
+        """保存缩略图；缓存文件已存在时不重复写入"""
+        entry = self._entry_path(image_path, size)
+        if entry is None or os.path.exists(entry):
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # 先写临时文件再替换，避免其他线程读到写了一半的文件
+            tmp = f"{entry}.{threading.get_ident()}.tmp"
+            if image.save(tmp, 'PNG'):
+                os.replace(tmp, entry)
+            elif os.path.exists(tmp):
+                os.remove(tmp)
+        except OSError as e:
+            logger.debug(f"写入缩略图缓存失败 {image_path}: {e}")
+            return
+        # 每次会话首次写入时检查一次缓存总大小
+        with self._lock:
+            if self._evicted:
+                return
+            self._evicted = True
+        self.evict()
+
+    def evict(self) -> None:
+        """缓存总大小超过max_bytes时，按最近使用时间从旧到新删除缓存文件"""
+        try:
+            entries = []
+            total = 0
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith('.png'):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+                if total <= self.max_bytes:
+                    break
+        except OSError as e:
+            logger.debug(f"清理缩略图缓存失败: {e}")
+
+
+_thumbnail_disk_cache: Optional[ThumbnailDiskCache] = None
+_thumbnail_disk_cache_lock = threading.Lock()
+
+
+def get_thumbnail_disk_cache() -> ThumbnailDiskCache:
+    """返回全局缩略图磁盘缓存（首次调用时创建）"""
+    global _thumbnail_disk_cache
+    if _thumbnail_disk_cache is None:
+        with _thumbnail_disk_cache_lock:
+            if _thumbnail_disk_cache is None:
+                _thumbnail_disk_cache = ThumbnailDiskCache()
+    return _thumbnail_disk_cache
+
+
+class ThumbnailSignals(QObject):
+    """缩略图加载完成信号；需在主线程创建，工作线程发射时自动排队到主线程处理"""
+    loaded = pyqtSignal(str, int, QImage)
+
+
+class ThumbnailTask(QRunnable):
+    """在QThreadPool工作线程中解码缩略图，完成后通过signals.loaded发回主线程"""
+
+    def __init__(self, file_path: str, list_idx: int, signals: ThumbnailSignals, size: QSize = THUMBNAIL_SIZE):
+        super().__init__()
+        self.file_path = file_path
+        self.list_idx = list_idx
+        self.signals = signals
+        self.size = size
+
+    def run(self) -> None:
+        image = None
+        try:
+            cache = get_thumbnail_disk_cache()
+            image = cache.get(self.file_path, self.size)
+            if image is None:
+                image = read_scaled_image(self.file_path, self.size)
+                if image is not None:
+                    cache.put(self.file_path, image, self.size)
+            # 带Alpha通道的图片在工作线程中预乘，主线程QPixmap.fromImage时无需再逐像素转换；
+            # 不透明图片（如JPEG解码得到的RGB32）本身即可直接使用，保持原样
+            if image is not None and image.hasAlphaChannel() and image.format() != _THUMBNAIL_FORMAT:
+                image = image.convertToFormat(_THUMBNAIL_FORMAT)
+        except Exception as e:
+            logger.error(f"解码缩略图时发生错误 {self.file_path}: {e}")
+        self.signals.loaded.emit(self.file_path, self.list_idx, image if image is not None else QImage())
+
+
 def load_image_safe(image_path: str) -> QImage:
     """安全加载图片文件
     
@@ -90,12 +360,18 @@ def load_image_safe(image_path: str) -> QImage:
             logger.warning(f"不支持的图片格式: {image_path}")
             return None
             
-        # 尝试加载图片
-        image = QImage(image_path)
-        if image.isNull():
+        # 先只解析文件头，损坏或截断的文件无需完整解码即可排除
+        reader = QImageReader(image_path)
+        if not reader.canRead() or reader.size().isEmpty():
             logger.warning(f"无法加载图片: {image_path}")
             return None
             
+        # 文件头有效时再完整解码
+        image = reader.read()
+        if image.isNull():
+            logger.warning(f"无法加载图片: {image_path}, {reader.errorString()}")
+            return None
+            
         return image
         
     except Exception as e:
@@ -123,7 +399,7 @@ def load_image(main_window) -> None:
                 main_window.resource_list.clear()
                 
                 # 设置新的图片列表
-                main_window.images = [file_path]
+                main_window._set_images([file_path])
                 
                 # 为图片文件创建列表项
                 item = QListWidgetItem(os.path.basename(file_path))
@@ -1,39 +1,125 @@
+import os
+import time
+import queue
 import logging
+import threading
 import gc
 
-try:
-    import torch
-except Exception:
-    torch = None
+# torch 模块引用缓存：None 表示尚未导入，False 表示不可用
+_torch = None
 
 logger = logging.getLogger(__name__)
 
+# free_torch_memory 两次实际清理之间的最短间隔（秒）
+_FREE_MIN_INTERVAL = 1.0
+# CUDA 缓存中未被占用的显存低于该值（字节）时不调用 empty_cache
+_FREE_CUDA_MIN_CACHED = 64 * 1024 * 1024
+# 上次实际清理的时间（time.monotonic）
+_last_free = 0.0
+# 推理结束后延迟释放 CUDA 缓存的时间（秒）；期间又有推理结束则重新计时
+_CUDA_RELEASE_DELAY = 0.2
+# 已保留显存占显卡总显存的比例超过该值时才释放 CUDA 缓存
+_CUDA_RESERVED_RATIO = 0.8
+# 后台释放请求队列（容量为1，重复请求直接合并）与工作线程
+_cuda_release_queue = queue.Queue(maxsize=1)
+_cuda_release_thread = None
+_cuda_release_lock = threading.Lock()
 
-def free_torch_memory():
+# 推理过程中遥感裁剪图的临时文件名前缀
+_TEMP_CROP_PREFIXES = ("yolov_crop_", "sam_mask_crop_", "sam_obb_crop_")
+
+
+def _get_torch():
+    """延迟导入 torch 并缓存模块引用，避免启动时加载；不可用时返回 None"""
+    global _torch
+    if _torch is None:
+        try:
+            import torch
+            _torch = torch
+        except Exception:
+            _torch = False
+    return _torch or None
+
+
+def _release_cuda_cache(torch, force=False):
+    """释放 CUDA 缓存显存；非强制时仅在显存紧张且缓存足够多时调用 empty_cache"""
+    try:
+        reserved = torch.cuda.memory_reserved()
+        cached = reserved - torch.cuda.memory_allocated()
+        total = torch.cuda.get_device_properties(torch.cuda.current_device()).total_memory
+        if force or (cached >= _FREE_CUDA_MIN_CACHED and reserved > _CUDA_RESERVED_RATIO * total):
+            torch.cuda.empty_cache()
+    except Exception:
+        pass
+    # 兼容可能存在的进程间缓存收集
+    try:
+        if hasattr(torch.cuda, 'ipc_collect'):
+            torch.cuda.ipc_collect()
+    except Exception:
+        pass
+    # 重置峰值统计（可选，便于后续监控）
+    try:
+        torch.cuda.reset_peak_memory_stats()
+    except Exception:
+        pass
+
+
+def _cuda_release_worker():
+    """后台线程：收到释放请求后等待 _CUDA_RELEASE_DELAY 秒，期间无新请求才释放 CUDA 缓存"""
+    while True:
+        _cuda_release_queue.get()
+        # 推理连续进行时不断推迟释放，保持 CUDA 流水线不被 empty_cache 的隐式同步打断
+        while True:
+            try:
+                _cuda_release_queue.get(timeout=_CUDA_RELEASE_DELAY)
+            except queue.Empty:
+                break
+        torch = _get_torch()
+        if torch is not None:
+            _release_cuda_cache(torch)
+
+
+def _schedule_cuda_release():
+    """请求后台线程延迟释放 CUDA 缓存（必要时启动线程），不阻塞调用方"""
+    global _cuda_release_thread
+    with _cuda_release_lock:
+        if _cuda_release_thread is None:
+            _cuda_release_thread = threading.Thread(target=_cuda_release_worker, name="cuda-release", daemon=True)
+            _cuda_release_thread.start()
+    try:
+        _cuda_release_queue.put_nowait('clean')
+    except queue.Full:
+        # 已有未处理的请求，合并即可
+        pass
+
+
+def free_torch_memory(force=False):
     """释放由推理过程产生的显存与内存（不影响模型对象）。
 
     - 优先释放 CUDA/MPS 的缓存显存（若可用）。
     - 触发 Python GC 以回收无引用对象的内存。
     - 整体设计为安全、快速，不依赖具体推理对象引用。
+    - 节流：距上次清理不足 _FREE_MIN_INTERVAL 秒时直接返回；CUDA 缓存的空闲显存
+      不足 _FREE_CUDA_MIN_CACHED 时不调用 empty_cache。force=True 时忽略以上条件。
+    - empty_cache 会隐式同步：非强制时交给后台线程在推理空闲 _CUDA_RELEASE_DELAY 秒后执行，
+      且仅在已保留显存超过总显存的 _CUDA_RESERVED_RATIO 时释放；force=True 时同步释放。
+    - 推理临时对象只存活于 0/1 代，常规清理只回收到 1 代（gc.collect(1)），
+      跳过代价最高的 2 代全量扫描；force=True 时执行完整回收。
     """
+    global _last_free
     try:
+        now = time.monotonic()
+        if not force and now - _last_free < _FREE_MIN_INTERVAL:
+            return
+        _last_free = now
+
+        torch = _get_torch()
         # 释放 GPU 显存缓存（CUDA）
         if torch is not None and hasattr(torch, 'cuda') and torch.cuda.is_available():
-            try:
-                torch.cuda.empty_cache()
-            except Exception:
-                pass
-            # 兼容可能存在的进程间缓存收集
-            try:
-                if hasattr(torch.cuda, 'ipc_collect'):
-                    torch.cuda.ipc_collect()
-            except Exception:
-                pass
-            # 重置峰值统计（可选，便于后续监控）
-            try:
-                torch.cuda.reset_peak_memory_stats()
-            except Exception:
-                pass
+            if force:
+                _release_cuda_cache(torch, force=True)
+            else:
+                _schedule_cuda_release()
 
         # 释放 GPU 显存缓存（Apple MPS）
         if torch is not None and hasattr(torch, 'mps') and hasattr(torch.mps, 'empty_cache'):
@@ -44,7 +130,10 @@ def free_torch_memory():
 
         # 触发 Python 垃圾回收（CPU 内存）
         try:
-            gc.collect()
+            if force:
+                gc.collect()
+            else:
+                gc.collect(1)
         except Exception:
             pass
     except Exception as e:
@@ -55,6 +144,43 @@ def free_torch_memory():
             pass
 
 
+def clean_temp_crops(temp_dir=None, max_age_seconds=3600):
+    """清理遗留的遥感裁剪临时文件（启动时调用）。
+
+    - 只删除推理裁剪产生的文件（按文件名前缀识别），不触碰目录中的其他文件。
+    - 仅删除修改时间早于 max_age_seconds 的文件，避免误删正在使用的裁剪图。
+
+    Args:
+        temp_dir: 临时目录，默认为当前工作目录下的 temp_crops
+        max_age_seconds: 文件最短保留时间（秒）
+
+    Returns:
+        int: 删除的文件数量
+    """
+    removed = 0
+    try:
+        temp_dir = temp_dir or os.path.join(os.getcwd(), 'temp_crops')
+        if not os.path.isdir(temp_dir):
+            return 0
+        cutoff = time.time() - max_age_seconds
+        with os.scandir(temp_dir) as it:
+            for entry in it:
+                try:
+                    if not entry.is_file() or not entry.name.startswith(_TEMP_CROP_PREFIXES):
+                        continue
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except Exception:
+                    # 单个文件清理失败不影响整体
+                    pass
+        if removed:
+            logger.info(f"已清理遗留裁剪临时文件 {removed} 个")
+    except Exception as e:
+        logger.debug(f"clean_temp_crops encountered error: {e}")
+    return removed
+
+
 def cleansampoint(mask_sam_manager):
     """
     清理SAM推理的输入点
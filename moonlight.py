@@ -5,18 +5,20 @@ from PyQt6.QtWidgets import (QApplication, QWidget, QHBoxLayout, QVBoxLayout,
                              QGraphicsRectItem, QMessageBox, QProgressBar, 
                              QDialog, QMainWindow, QMenu)
 
-from PyQt6.QtCore import (Qt, QPoint, QSize)
-from PyQt6.QtGui import QPixmap, QImage, QPen, QColor, QBrush, QPainter, QIcon, QCursor, QPainterPath, QRegion, QImageReader
+from PyQt6.QtCore import (Qt, QPoint, QRect, QSize, QThread, QThreadPool, QTimer, QEasingCurve, QVariantAnimation, QDir, QFile, pyqtSignal)
+from PyQt6.QtGui import QPixmap, QImage, QPen, QColor, QBrush, QPainter, QIcon, QCursor, QPainterPath, QRegion, QImageReader, QGuiApplication
 import sys
 import os
 BASE_DIR = os.path.dirname(__file__)
-for _p in ("app_ui","inference","sam_ops","algorithms","io_ops","services","utils"):
-    sys.path.append(os.path.join(BASE_DIR, _p))
+# 子目录一次性插入到脚本目录之后（位于标准库和site-packages之前），并避免重复插入
+_EXTRA_PATHS = [os.path.join(BASE_DIR, _p) for _p in ("app_ui","inference","sam_ops","algorithms","io_ops","services","utils")]
+sys.path[1:1] = [_p for _p in _EXTRA_PATHS if _p not in sys.path]
 os.environ['QT_IMAGEIO_MAXALLOC'] = '0'
 QImageReader.setAllocationLimit(0)
-import glob
 import logging
 import time
+from collections import OrderedDict
+from operator import attrgetter
 import numpy as np
 from typing import List, Optional, Tuple, Dict, Any, Callable, Union
 from app_ui.labelsgl import ParentLabelList
@@ -28,19 +30,191 @@ from services.auto_annotation_manager import get_auto_annotation_manager
 from app_ui.mouse_decorator import MouseDecoratorManager
 from algorithms.image_resize import adjust_current_image_to_1080p
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 from services.workspace_manager import WorkspaceResourceManager
 from app_ui.canvas import GraphicsCanvas
 
+# 模式管理模块，首次切换模式时导入
+_PM = None
+
+def _pm():
+    """返回Pattern_management模块，首次调用时导入并缓存"""
+    global _PM
+    if _PM is None:
+        import Pattern_management
+        _PM = Pattern_management
+    return _PM
+
+# 边缘区域查找表，下标为4位边缘编码：左=1、上=2、下=4、右=8；
+# 多个边缘同时命中时（窗口极小）与逐项判断的优先级一致：左 > 右，上 > 下
+_RESIZE_AREAS = (
+    None, 'left', 'top', 'top_left',
+    'bottom', 'bottom_left', 'top', 'top_left',
+    'right', 'left', 'top_right', 'top_left',
+    'bottom_right', 'bottom_left', 'top_right', 'top_left',
+)
+
+# acc目录注册为Qt搜索路径前缀，图标统一以"acc:文件名"引用（打包后从_MEIPASS解析）
+_ACC_DIR = os.path.join(getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__))), 'acc')
+QDir.addSearchPath('acc', _ACC_DIR)
+
+# 资源列表可见范围探测：沿对角线最多探测的点数（避免探测点恰好落在列表项间隔上）
+_THUMB_PROBE_STEPS = 8
+# 可见范围上下各预加载多少屏的缩略图，快速滚动时减少空白
+_THUMB_PREFETCH_SCREENS = 2
+# 缩略图解码任务优先级：可见项先于预加载项执行
+_THUMB_PRIORITY_VISIBLE = 1
+_THUMB_PRIORITY_PREFETCH = 0
+
+# 一次C层调用取出子标签的(x_center, y_center, width, height)
+_BBOX_GETTER = attrgetter('x_center', 'y_center', 'width', 'height')
+
+# 资源列表上同时挂载真实缩略图的列表项上限，超出后最久未用的项换回占位图标
+_THUMB_LRU_MAX = 512
+# 缩略图QIcon缓存上限（按(绝对路径, mtime)去重，跨目录重载复用）；不超过挂载上限，否则被换下的图标仍被缓存引用
+_THUMB_ICON_CACHE_MAX = _THUMB_LRU_MAX
+
+# 顶部栏按钮图标尺寸
+_ICON_SIZE_45 = QSize(45, 45)
+
+# 顶部栏按钮样式表（只在创建按钮时设置一次）
+_TOOL_BTN_QSS = """
+    QPushButton {
+        background-color: #F5F5F5;
+        color: black;
+        border: 1px solid #D0D0D0;
+        border-radius: 4px;
+        font-weight: bold;
+    }
+    QPushButton:hover {
+        background-color: #E8E8E8;
+    }
+"""
+# AI按钮：未设置active属性时为默认样式，自动标注开启/关闭时通过active属性切换，无需重新设置样式表
+_AI_BTN_QSS = _TOOL_BTN_QSS + """
+    QPushButton[active="true"] {
+        background-color: #3498DB;
+        color: white;
+        border: none;
+    }
+    QPushButton[active="true"]:hover {
+        background-color: #2980B9;
+    }
+    QPushButton[active="false"] {
+        background-color: #445566;
+        color: white;
+        border: none;
+    }
+    QPushButton[active="false"]:hover {
+        background-color: #546676;
+    }
+"""
+_TITLE_BTN_QSS = """QPushButton {background-color: transparent;color: #333333;border: none;font-size: 16px;}QPushButton:hover {background-color: #EFEFE7;}"""
+# Solo模式动画时长（毫秒）
+_SOLO_ANIM_MS = 250
+_CLOSE_BTN_QSS = """QPushButton {background-color: transparent;color: #333333;border: none;font-size: 16px;}QPushButton:hover {background-color: #F9E3E3;}"""
+
+class _ScreenCache:
+    """缓存主屏幕几何信息，主屏幕切换或其几何变化时失效"""
+    _geometry: Optional[QRect] = None
+    _app_connected = False
+    _screen = None
+
+    @classmethod
+    def _invalidate(cls, *args) -> None:
+        cls._geometry = None
+
+    @classmethod
+    def get_primary(cls) -> QRect:
+        """返回主屏幕几何区域（首次调用或失效后重新查询）"""
+        if cls._geometry is None:
+            screen = QGuiApplication.primaryScreen()
+            try:
+                if not cls._app_connected:
+                    QGuiApplication.instance().primaryScreenChanged.connect(cls._invalidate)
+                    cls._app_connected = True
+                if screen is not cls._screen:
+                    screen.geometryChanged.connect(cls._invalidate)
+                    cls._screen = screen
+            except Exception:
+                pass
+            cls._geometry = screen.geometry()
+        return cls._geometry
+
+class _WorkspaceScanWorker(QThread):
+    """在后台线程中扫描工作区图片，完成后通过done信号把文件列表交回主线程"""
+    done = pyqtSignal(list)
+
+    def __init__(self, resource_manager):
+        super().__init__()
+        self.resource_manager = resource_manager
+
+    def run(self):
+        files = []
+        try:
+            files = self.resource_manager.scan_resources()
+        except Exception as e:
+            logger.error(f"后台扫描工作区失败: {e}", exc_info=True)
+        self.done.emit(files)
+
+def _detect_rounded_mask() -> bool:
+    """判断是否为无边框窗口设置圆角遮罩
+
+    无合成/低色深的显示环境（远程桌面、offscreen/vnc等平台插件）下圆角无视觉收益，跳过遮罩以节省重绘开销；
+    环境变量 MOONLIGHT_ROUNDED_MASK=0/1 可强制关闭/开启
+
+    Returns:
+        bool: 是否使用圆角遮罩
+    """
+    env = os.environ.get('MOONLIGHT_ROUNDED_MASK')
+    if env in ('0', '1'):
+        return env == '1'
+    try:
+        if QGuiApplication.platformName() in ('offscreen', 'minimal', 'vnc', 'linuxfb', 'eglfs'):
+            return False
+        screen = QGuiApplication.primaryScreen()
+        return screen is not None and screen.depth() >= 24
+    except Exception:
+        return True
+
 class MainWindow(QMainWindow):
+    # 按文件名缓存的按钮图标（None表示图标文件不存在）
+    _icon_cache: Dict[str, Optional[QIcon]] = {}
+    # 资源列表缩略图图标缓存，键为(绝对路径, mtime_ns)，按LRU淘汰
+    _thumb_icon_cache: "OrderedDict[Tuple[str, int], QIcon]" = OrderedDict()
+    # 边缘区域对应的鼠标指针形状
+    _CURSOR_MAP = {
+        'left': Qt.CursorShape.SizeHorCursor, 'right': Qt.CursorShape.SizeHorCursor,
+        'top': Qt.CursorShape.SizeVerCursor, 'bottom': Qt.CursorShape.SizeVerCursor,
+        'top_left': Qt.CursorShape.SizeFDiagCursor, 'bottom_right': Qt.CursorShape.SizeFDiagCursor,
+        'top_right': Qt.CursorShape.SizeBDiagCursor, 'bottom_left': Qt.CursorShape.SizeBDiagCursor,
+    }
 
     def __init__(self):
         super().__init__()
         self.images: List[str] = []
+        # 路径 -> 在self.images中的下标，导航时O(1)定位当前图片
+        self._image_idx: Dict[str, int] = {}
         self.current_image_path: Optional[str] = None
         self.resource_manager = WorkspaceResourceManager()
         self.resource_manager.main_window = self
+        # 缩略图在线程池中解码，完成后经信号回到主线程设置图标
+        self._thumb_pending = set()
+        # 缩略图专用线程池，与推理等其他后台任务隔离，关闭窗口时可单独清空
+        self._thumb_pool = QThreadPool(self)
+        self._thumb_pool.setMaxThreadCount(max(2, (os.cpu_count() or 2) // 2))
+        self._thumb_signals = LIM.ThumbnailSignals()
+        self._thumb_signals.loaded.connect(self._on_thumbnail_loaded)
+        # 已挂载缩略图的行号（LRU顺序），被淘汰的行换回共享的占位图标
+        self._icon_lru: "OrderedDict[int, QIcon]" = OrderedDict()
+        placeholder = QPixmap(80, 80)
+        placeholder.fill(QColor('#FAFAF2'))
+        self._placeholder_icon = QIcon(placeholder)
+        # 滚动事件合并：一连串valueChanged每50ms最多处理一次
+        self._scroll_thumb_timer = QTimer(self)
+        self._scroll_thumb_timer.setSingleShot(True)
+        self._scroll_thumb_timer.setInterval(50)
+        self._scroll_thumb_timer.timeout.connect(self._on_resource_list_scrolled)
         self.setWindowFlag(Qt.WindowType.FramelessWindowHint, True)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground, True)
         self._drag_position = None
@@ -49,33 +223,68 @@ class MainWindow(QMainWindow):
         self._resize_enabled = False  # 是否正在调整大小
         self._resize_margin = 5  # 边缘检测的边距
         self._corner_radius = 12
+        # 窗口宽高与内部（非边缘）区域缓存，在resizeEvent中刷新
+        self._rw = 0
+        self._rh = 0
+        self._inner_rect = None
+        # 圆角遮罩缓存：尺寸未变时不重建；拖动调整大小期间最多每50ms重建一次
+        self._last_mask_key = None
+        self._use_rounded_mask = _detect_rounded_mask()
+        self._mask_timer = QTimer(self)
+        self._mask_timer.setSingleShot(True)
+        self._mask_timer.setInterval(50)
+        self._mask_timer.timeout.connect(self._apply_window_mask)
+        # 悬停时的边缘检测按显示帧率合并执行，只处理最新一次的鼠标位置
+        self._pending_hover_pos = None
+        # 当前由边缘检测设置的鼠标指针对应的区域（None表示未设置），只在区域变化时调用Qt
+        self._cursor_state: Optional[str] = None
+        self._hover_timer = QTimer(self)
+        self._hover_timer.setSingleShot(True)
+        self._hover_timer.setInterval(16)
+        self._hover_timer.timeout.connect(self._process_pending_hover)
         
         # 设置窗口图标
-        import os
-        from PyQt6.QtGui import QIcon
-        base = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
-        icon_path = os.path.join(base, "acc", "logo.ico")
-        if os.path.exists(icon_path):
-            self.setWindowIcon(QIcon(icon_path))
+        window_icon = self._load_icon('logo.ico')
+        if window_icon is not None:
+            self.setWindowIcon(window_icon)
         
-        # 初始化自动矩形框绘制器
-        self.auto_rect_pen = None
+        # 分辨率调整后台线程（algorithms.image_resize中创建）
+        self._resize_worker = None
+        # 工作区后台扫描线程
+        self._scan_worker = None
         # 新增：自由标注模式状态
         self.free_mode = False
         # 自动标注状态
         self.auto_annotation_enabled = False
+        # AI按钮下拉菜单及其中的自动标注开关，首次打开菜单时创建
+        self._ai_menu = None
+        self._auto_annotation_action = None
         self.obb_rect_axis_aligned = False
         # 记录模型加载是否出现错误（用于决定启动时自动标注初始状态）
         self._model_loading_had_error = False
         # 底部栏展开状态（用于控制上拉/收起）
         self.bottom_expanded = False
         self._solo_mode = False
+        # Solo模式动画及进入前记录的控件尺寸，首次切换时创建
+        self._solo_anim = None
+        self._solo_orig_widths = None
+        self._solo_orig_bottom_h = None
+        # 当前动画的(setter, 起始值, 目标值)轨迹列表及结束回调，每次切换时重新设置
+        self._solo_tracks = []
+        self._solo_on_finished = None
+        # 以下控件在initUI中创建；预先置为None，使用处直接判断is not None，无需hasattr
+        self.resource_list = None
+        self.control_panel = None
+        self.component_bar = None
+        self.bottom_toolbar = None
+        self.parent_label_list = None
+        self.canvas = None
         self.initUI()
 
     def initUI(self) -> None:
         try:
             self.setWindowTitle('moonlight')
-            screen = QApplication.primaryScreen().geometry()
+            screen = _ScreenCache.get_primary()
             width = min(1200, screen.width())
             height = min(800, screen.height())
             self.resize(width, height)
@@ -131,101 +340,84 @@ class MainWindow(QMainWindow):
             # 初始化键盘快捷键
             init_keyboard_shortcuts(self)
         except Exception as e:
-            logger.error(f"初始化UI时发生错误: {e}")
-            import traceback
-            logger.error(f"错误堆栈信息: {traceback.format_exc()}")
+            logger.error(f"初始化UI时发生错误: {e}", exc_info=True)
             QMessageBox.critical(self, "错误", f"初始化界面失败: {e}")
     def toggle_rect_mode(self, checked: bool) -> None:
-        from Pattern_management import toggle_rect_mode as pm_toggle_rect_mode
-        pm_toggle_rect_mode(self, checked)
+        _pm().toggle_rect_mode(self, checked)
     
     def toggle_polygon_mode(self, checked: bool) -> None:
-        from Pattern_management import toggle_polygon_mode as pm_toggle_polygon_mode
-        pm_toggle_polygon_mode(self, checked)
+        _pm().toggle_polygon_mode(self, checked)
             
     def toggle_pan_mode(self, checked: bool) -> None:
-        from Pattern_management import toggle_pan_mode as pm_toggle_pan_mode
-        pm_toggle_pan_mode(self, checked)
+        _pm().toggle_pan_mode(self, checked)
             
     def _on_mask_input_mode_changed(self, checked: bool) -> None:
-        from Pattern_management import _on_mask_input_mode_changed as pm_mask_input_changed
-        pm_mask_input_changed(self, checked)
+        _pm()._on_mask_input_mode_changed(self, checked)
 
     def _remove_bbox_hint(self, hint_item):
-        from Pattern_management import _remove_bbox_hint as pm_remove_bbox_hint
-        pm_remove_bbox_hint(self, hint_item)
+        _pm()._remove_bbox_hint(self, hint_item)
 
     def _on_obb_input_mode_changed(self, checked: bool) -> None:
-        from Pattern_management import _on_obb_input_mode_changed as pm_obb_input_changed
-        pm_obb_input_changed(self, checked)
+        _pm()._on_obb_input_mode_changed(self, checked)
 
     def _on_obb_rect_type_changed(self) -> None:
         try:
             axis = False
-            if hasattr(self, 'obb_rect_axis_btn') and self.obb_rect_axis_btn.isChecked():
+            btn = getattr(self, 'obb_rect_axis_btn', None)
+            if btn is not None and btn.isChecked():
                 axis = True
             self.obb_rect_axis_aligned = axis
         except Exception:
             self.obb_rect_axis_aligned = False
 
     def toggle_mask_mode(self, checked: bool) -> None:
-        from Pattern_management import toggle_mask_mode as pm_toggle_mask_mode
-        pm_toggle_mask_mode(self, checked)
+        _pm().toggle_mask_mode(self, checked)
             
     def toggle_obb_mode(self, checked: bool) -> None:
-        from Pattern_management import toggle_obb_mode as pm_toggle_obb_mode
-        pm_toggle_obb_mode(self, checked)
+        _pm().toggle_obb_mode(self, checked)
     def toggle_free_mode(self, checked: bool) -> None:
-        from Pattern_management import toggle_free_mode as pm_toggle_free_mode
-        pm_toggle_free_mode(self, checked)
+        _pm().toggle_free_mode(self, checked)
 
     def _on_brush_selected(self, brush_type: str, checked: bool) -> None:
-        from Pattern_management import _on_brush_selected as pm_on_brush_selected
-        pm_on_brush_selected(self, brush_type, checked)
+        _pm()._on_brush_selected(self, brush_type, checked)
+
+    def _load_icon(self, name: str) -> Optional[QIcon]:
+        """加载acc目录下的图标并缓存，只在首次使用时访问文件系统
+        
+        Args:
+            name: 图标文件名
+            
+        Returns:
+            QIcon: 图标对象，文件不存在时返回None
+        """
+        if name not in MainWindow._icon_cache:
+            icon_path = f'acc:{name}'
+            MainWindow._icon_cache[name] = QIcon(icon_path) if QFile.exists(icon_path) else None
+        return MainWindow._icon_cache[name]
 
     def create_top_toolbar(self) -> None:
         self.top_toolbar = QFrame()
         self.top_toolbar.setFixedHeight(45)  # 设置工具栏高度
-        self.top_toolbar.setStyleSheet("background-color: #FAFAF2; color: #333333; border-bottom: 1px solid #E6E4D6;")
+        # 底部阴影用静态边框绘制，不使用QGraphicsDropShadowEffect（图形效果会使整个工具栏每次重绘都走离屏合成）
+        self.top_toolbar.setStyleSheet("background-color: #FAFAF2; color: #333333; border-bottom: 2px solid rgba(0, 0, 0, 15);")
         title_layout = QHBoxLayout(self.top_toolbar)  # 创建标题栏布局
         title_layout.setContentsMargins(5, 0, 0, 0)  # 设置标题栏布局边距
         self.title_label = QLabel("moonlight")
         self.title_label.setStyleSheet("font-weight: bold;")  # 设置标题栏文字为加粗
         title_layout.addWidget(self.title_label)
-        try:
-            from PyQt6.QtWidgets import QGraphicsDropShadowEffect
-            from PyQt6.QtGui import QColor
-            shadow = QGraphicsDropShadowEffect(self)
-            shadow.setBlurRadius(12)
-            shadow.setOffset(0, 2)
-            shadow.setColor(QColor(0, 0, 0, 30))
-            self.top_toolbar.setGraphicsEffect(shadow)
-        except Exception:
-            pass
         
         # 添加加载图片目录按钮
         self.load_btn = QPushButton()
         self.load_btn.setFixedSize(45, 30)
         # 设置加载图片目录按钮图标
-        load_icon_path = os.path.join(os.path.dirname(__file__), 'acc', 'openimage.png')
-        if os.path.exists(load_icon_path):
-            self.load_btn.setIcon(QIcon(load_icon_path))
-            self.load_btn.setIconSize(QSize(45, 45))
+        load_icon = self._load_icon('openimage.png')
+        if load_icon is not None:
+            self.load_btn.setIcon(load_icon)
+            self.load_btn.setIconSize(_ICON_SIZE_45)
             self.load_btn.setToolTip('加载图片目录')  # 添加工具提示
         else:
             self.load_btn.setText('加载图片目录')  # 如果图标不存在，显示文字
-        self.load_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #F5F5F5;
-                color: black;
-                border: 1px solid #D0D0D0;
-                border-radius: 4px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #E8E8E8;
-            }
-        """)
+        self.load_btn.setStyleSheet(_TOOL_BTN_QSS)
         self.load_btn.clicked.connect(self.load_image_directory)
         title_layout.addWidget(self.load_btn)
         
@@ -234,24 +426,13 @@ class MainWindow(QMainWindow):
         self.ai_btn = QPushButton()
         self.ai_btn.setFixedSize(40, 30)
         # 设置AI按钮图标
-        ai_icon_path = os.path.join(os.path.dirname(__file__), 'acc', 'aizidong.png')
-        if os.path.exists(ai_icon_path):
-            self.ai_btn.setIcon(QIcon(ai_icon_path))
-            self.ai_btn.setIconSize(QSize(45, 45))
+        ai_icon = self._load_icon('aizidong.png')
+        if ai_icon is not None:
+            self.ai_btn.setIcon(ai_icon)
+            self.ai_btn.setIconSize(_ICON_SIZE_45)
         else:
             self.ai_btn.setText('AI')  # 如果图标不存在，显示文字
-        self.ai_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #F5F5F5;
-                color: black;
-                border: 1px solid #D0D0D0;
-                border-radius: 4px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #E8E8E8;
-            }
-        """)
+        self.ai_btn.setStyleSheet(_AI_BTN_QSS)
         # 连接按钮到AI菜单功能
         self.ai_btn.clicked.connect(self.show_ai_menu)
         title_layout.addWidget(self.ai_btn)
@@ -282,25 +463,14 @@ class MainWindow(QMainWindow):
         self.settings_btn = QPushButton()
         self.settings_btn.setFixedSize(30, 30)
         # 设置设置按钮图标
-        settings_icon_path = os.path.join(os.path.dirname(__file__), 'acc', 'setimage.png')
-        if os.path.exists(settings_icon_path):
-            self.settings_btn.setIcon(QIcon(settings_icon_path))
-            self.settings_btn.setIconSize(QSize(45, 45))
+        settings_icon = self._load_icon('setimage.png')
+        if settings_icon is not None:
+            self.settings_btn.setIcon(settings_icon)
+            self.settings_btn.setIconSize(_ICON_SIZE_45)
             self.settings_btn.setToolTip('设置')  # 添加工具提示
         else:
             self.settings_btn.setText('设置')  # 如果图标不存在，显示文字
-        self.settings_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #F5F5F5;
-                color: black;
-                border: 1px solid #D0D0D0;
-                border-radius: 4px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #E8E8E8;
-            }
-        """)
+        self.settings_btn.setStyleSheet(_TOOL_BTN_QSS)
         # 导入设置模块并连接按钮点击事件
         from set import get_settings_manager
         self.settings_manager = get_settings_manager()
@@ -312,93 +482,105 @@ class MainWindow(QMainWindow):
         
         self.minimize_btn = QPushButton("—")
         self.minimize_btn.setFixedSize(30, 30)
-        self.minimize_btn.setStyleSheet("""QPushButton {background-color: transparent;color: #333333;border: none;font-size: 16px;}QPushButton:hover {background-color: #EFEFE7;}
-""")
+        self.minimize_btn.setStyleSheet(_TITLE_BTN_QSS)
         self.minimize_btn.clicked.connect(self.showMinimized)
         title_layout.addWidget(self.minimize_btn)
         # 最大化/还原按钮
         self.fullscreen_btn = QPushButton("□")
         self.fullscreen_btn.setFixedSize(30, 30)
-        self.fullscreen_btn.setStyleSheet("""QPushButton {background-color: transparent;color: #333333;border: none;font-size: 16px;}QPushButton:hover {background-color: #EFEFE7;}""")
+        self.fullscreen_btn.setStyleSheet(_TITLE_BTN_QSS)
         self.fullscreen_btn.clicked.connect(self.toggle_fullscreen)
         title_layout.addWidget(self.fullscreen_btn)
         # 关闭按钮
         self.close_btn = QPushButton("✕")
         self.close_btn.setFixedSize(30, 30)
-        self.close_btn.setStyleSheet("""QPushButton {background-color: transparent;color: #333333;border: none;font-size: 16px;}QPushButton:hover {background-color: #F9E3E3;}""")
+        self.close_btn.setStyleSheet(_CLOSE_BTN_QSS)
         self.close_btn.clicked.connect(self.close)
         title_layout.addWidget(self.close_btn)
     def toggle_solo_mode(self, checked: bool) -> None:
         try:
-            from PyQt6.QtCore import QPropertyAnimation, QEasingCurve, QParallelAnimationGroup
-            widgets = []
-            if hasattr(self, 'resource_list') and self.resource_list:
-                widgets.append(self.resource_list)
-            if hasattr(self, 'control_panel') and self.control_panel:
-                widgets.append(self.control_panel)
-            if hasattr(self, 'component_bar') and self.component_bar:
-                widgets.append(self.component_bar)
-            bottom = getattr(self, 'bottom_toolbar', None)
-
-            if not hasattr(self, '_solo_orig_widths'):
+            widgets = [w for w in (self.resource_list, self.control_panel, self.component_bar) if w is not None]
+            bottom = self.bottom_toolbar
+
+            if self._solo_orig_widths is None:
                 self._solo_orig_widths = {w: max(1, w.width()) for w in widgets}
-            if bottom and not hasattr(self, '_solo_orig_bottom_h'):
+            if bottom is not None and self._solo_orig_bottom_h is None:
                 self._solo_orig_bottom_h = max(1, bottom.height())
 
-            group = QParallelAnimationGroup(self)
+            # 所有控件共用一个QVariantAnimation驱动（进度0→1），每帧在一次回调中批量设置尺寸
+            anim = self._solo_anim
+            if anim is None:
+                anim = QVariantAnimation(self)
+                anim.setStartValue(0.0)
+                anim.setEndValue(1.0)
+                anim.setDuration(_SOLO_ANIM_MS)
+                anim.setEasingCurve(QEasingCurve.Type.InOutCubic)
+                anim.valueChanged.connect(self._solo_step)
+                anim.finished.connect(self._solo_finished)
+                self._solo_anim = anim
+            anim.stop()
+
+            tracks = []  # (设置函数, 起始值, 目标值)
             for w in widgets:
                 if not checked:
                     w.setVisible(True)
-                w.setMaximumWidth(w.width())
-                anim = QPropertyAnimation(w, b"maximumWidth", self)
-                anim.setDuration(250)
-                anim.setEasingCurve(QEasingCurve.Type.InOutCubic)
-                anim.setStartValue(w.width())
+                start = w.width()
+                w.setMaximumWidth(start)
                 target = 0 if checked else self._solo_orig_widths.get(w, max(1, w.width()))
-                anim.setEndValue(target)
-                group.addAnimation(anim)
+                tracks.append((w.setMaximumWidth, start, target))
 
-            if bottom:
+            if bottom is not None:
                 if not checked:
                     bottom.setVisible(True)
-                bottom.setMaximumHeight(bottom.height())
-                b_anim = QPropertyAnimation(bottom, b"maximumHeight", self)
-                b_anim.setDuration(250)
-                b_anim.setEasingCurve(QEasingCurve.Type.InOutCubic)
-                b_anim.setStartValue(bottom.height())
-                b_target = 0 if checked else getattr(self, '_solo_orig_bottom_h', max(1, bottom.height()))
-                b_anim.setEndValue(b_target)
-                group.addAnimation(b_anim)
+                start = bottom.height()
+                bottom.setMaximumHeight(start)
+                b_target = 0 if checked else (self._solo_orig_bottom_h or max(1, bottom.height()))
+                tracks.append((bottom.setMaximumHeight, start, b_target))
 
             def on_finished():
                 if checked:
                     for w in widgets:
                         w.setVisible(False)
-                    if bottom:
+                    if bottom is not None:
                         bottom.setVisible(False)
                     self.title_label.setText("moonlight • Solo")
                 else:
                     self.title_label.setText("moonlight")
 
-            group.finished.connect(on_finished)
-            self._solo_anim_group = group
-            group.start()
+            self._solo_tracks = tracks
+            self._solo_on_finished = on_finished
+            anim.start()
             self._solo_mode = checked
         except Exception as e:
             logger.error(f"切换Solo模式失败: {e}")
+    def _solo_step(self, t) -> None:
+        """Solo模式动画的一帧：按缓动后的进度t批量更新全部控件尺寸"""
+        try:
+            for setter, start, end in self._solo_tracks:
+                setter(int(round(start + (end - start) * t)))
+        except Exception as e:
+            self._solo_anim.stop()
+            logger.error(f"Solo模式动画失败: {e}")
+    def _solo_finished(self) -> None:
+        """Solo模式动画结束后的收尾"""
+        try:
+            if self._solo_on_finished is not None:
+                self._solo_on_finished()
+        except Exception as e:
+            logger.error(f"Solo模式动画收尾失败: {e}")
     def open_batch_annotation_window(self) -> None:
         """打开批量标注画布窗口，并按当前模式设置绘制方式。"""
         try:
             # 前置条件：必须选中至少一个父标签，且画布已加载图片
             selected_parent = None
-            if hasattr(self, 'parent_label_list') and self.parent_label_list:
+            if self.parent_label_list is not None:
                 try:
                     selected_parent = self.parent_label_list.get_selected()
                 except Exception:
                     selected_parent = None
 
             has_image = False
-            if hasattr(self, 'canvas') and self.canvas:
+            if self.canvas is not None:
                 has_image = getattr(self.canvas, 'image_item', None) is not None
 
             if not selected_parent and not has_image:
@@ -434,123 +616,81 @@ class MainWindow(QMainWindow):
             self.update_ai_button_style()
             
             if checked:
-                logger.info("自动标注模式已开启")
-                
-                # 初始化自动矩形框绘制器（如果尚未初始化）
-                if self.auto_rect_pen is None:
-                    from aotu_rect_pen import AutoRectPen
-                    self.auto_rect_pen = AutoRectPen(
-                        parent_label_list=self.parent_label_list,
-                        canvas_view=self.canvas,
-                        get_image_info_func=self.get_current_image_info
-                    )
-                
-                # 启用自动矩形框绘制器
-                if self.auto_rect_pen:
-                    self.auto_rect_pen.set_enabled(True)
-                    logger.info("自动矩形框绘制器已启用")
+                logger.debug("自动标注模式已开启")
                 
                 # 初始化自动标注管理器（如果尚未初始化）
-                if hasattr(self, 'canvas') and self.canvas.auto_annotation_manager is None:
+                if self.canvas is not None and self.canvas.auto_annotation_manager is None:
                     self.canvas.auto_annotation_manager = get_auto_annotation_manager(
                         self, self.canvas.parent_label_list, self.canvas
                     )
             else:
-                logger.info("自动标注模式已关闭")
-                
-                # 禁用自动矩形框绘制器
-                if self.auto_rect_pen:
-                    self.auto_rect_pen.set_enabled(False)
-                    logger.info("自动矩形框绘制器已禁用")
+                logger.debug("自动标注模式已关闭")
         except Exception as e:
-            logger.error(f"切换自动标注模式时发生错误: {e}")
-            import traceback
-            logger.error(f"错误堆栈信息: {traceback.format_exc()}")
+            logger.error(f"切换自动标注模式时发生错误: {e}", exc_info=True)
     
     def update_ai_button_style(self) -> None:
         """更新AI按钮的样式，根据自动标注状态改变背景色"""
         try:
-            # 重新设置图标以确保在样式更新后仍然显示
-            ai_icon_path = os.path.join(os.path.dirname(__file__), 'acc', 'aizidong.png')
-            if os.path.exists(ai_icon_path):
-                self.ai_btn.setIcon(QIcon(ai_icon_path))
-                self.ai_btn.setIconSize(QSize(45, 45))
-            
-            if self.auto_annotation_enabled:
-                # 自动标注开启时，AI按钮显示激活状态（蓝色背景）
-                self.ai_btn.setStyleSheet("""
-                    QPushButton {
-                        background-color: #3498DB;
-                        color: white;
-                        border: none;
-                        border-radius: 4px;
-                        font-weight: bold;
-                    }
-                    QPushButton:hover {
-                        background-color: #2980B9;
-                    }
-                """)
-            else:
-                # 自动标注关闭时，AI按钮显示默认状态
-                self.ai_btn.setStyleSheet("""
-                    QPushButton {
-                        background-color: #445566;
-                        color: white;
-                        border: none;
-                        border-radius: 4px;
-                        font-weight: bold;
-                    }
-                    QPushButton:hover {
-                        background-color: #546676;
-                    }
-                """)
+            # 自动标注开启时显示激活状态（蓝色背景），关闭时显示深色状态；
+            # 样式规则已在_AI_BTN_QSS中，这里只切换属性并重新polish，不重新解析样式表
+            self.ai_btn.setProperty("active", bool(self.auto_annotation_enabled))
+            style = self.ai_btn.style()
+            style.unpolish(self.ai_btn)
+            style.polish(self.ai_btn)
         except Exception as e:
             logger.error(f"更新AI按钮样式时发生错误: {e}")
     
+    def _build_ai_menu(self) -> QMenu:
+        """创建AI按钮的下拉菜单（只在首次打开时创建，之后复用）"""
+        menu = QMenu(self)
+        
+        # 设置菜单样式
+        menu.setStyleSheet("""
+            QMenu {
+                background-color: #2C3E50;
+                color: white;
+                border: 1px solid #445566;
+                border-radius: 4px;
+                padding: 5px;
+            }
+            QMenu::item {
+                background-color: transparent;
+                padding: 8px 20px;
+                border-radius: 3px;
+            }
+            QMenu::item:selected {
+                background-color: #445566;
+            }
+            QMenu::item:disabled {
+                color: #7F8C8D;
+            }
+            QMenu::item:checked {
+                background-color: #3498DB;
+            }
+        """)
+        
+        # 添加自动标注开关
+        self._auto_annotation_action = menu.addAction("自动标注")
+        self._auto_annotation_action.setCheckable(True)
+        self._auto_annotation_action.triggered.connect(self.toggle_auto_annotation)
+        
+        # 添加批量标注功能
+        batch_annotation_action = menu.addAction("批量标注")
+        batch_annotation_action.triggered.connect(self.open_batch_annotation_window)
+        return menu
+    
     def show_ai_menu(self) -> None:
         """显示AI按钮的下拉菜单"""
         try:
-            # 创建下拉菜单
-            menu = QMenu(self)
+            if self._ai_menu is None:
+                self._ai_menu = self._build_ai_menu()
             
-            # 设置菜单样式
-            menu.setStyleSheet("""
-                QMenu {
-                    background-color: #2C3E50;
-                    color: white;
-                    border: 1px solid #445566;
-                    border-radius: 4px;
-                    padding: 5px;
-                }
-                QMenu::item {
-                    background-color: transparent;
-                    padding: 8px 20px;
-                    border-radius: 3px;
-                }
-                QMenu::item:selected {
-                    background-color: #445566;
-                }
-                QMenu::item:disabled {
-                    color: #7F8C8D;
-                }
-                QMenu::item:checked {
-                    background-color: #3498DB;
-                }
-            """)
-            
-            # 添加自动标注开关
-            auto_annotation_action = menu.addAction("自动标注")
-            auto_annotation_action.setCheckable(True)
-            auto_annotation_action.setChecked(self.auto_annotation_enabled)
-            auto_annotation_action.triggered.connect(self.toggle_auto_annotation)
-            
-            # 添加批量标注功能
-            batch_annotation_action = menu.addAction("批量标注")
-            batch_annotation_action.triggered.connect(self.open_batch_annotation_window)
+            # 同步自动标注开关状态（不触发triggered信号）
+            self._auto_annotation_action.setChecked(self.auto_annotation_enabled)
             
             # 在按钮下方显示菜单
             button_pos = self.ai_btn.mapToGlobal(self.ai_btn.rect().bottomLeft())
-            menu.exec(button_pos)
+            self._ai_menu.exec(button_pos)
             
         except Exception as e:
             logger.error(f"显示AI菜单时发生错误: {e}")
@@ -569,13 +709,17 @@ class MainWindow(QMainWindow):
             default_height = 40
             expanded_height = 80
             if getattr(self, 'bottom_expanded', False):
-                self.bottom_toolbar.setFixedHeight(default_height)
-                self.bottom_toggle_btn.setText("▲")
-                self.bottom_expanded = False
+                height, text = default_height, "▲"
             else:
-                self.bottom_toolbar.setFixedHeight(expanded_height)
-                self.bottom_toggle_btn.setText("▼")
-                self.bottom_expanded = True
+                height, text = expanded_height, "▼"
+            # 高度与按钮文字在一次更新中完成，只触发一次重绘
+            self.bottom_toolbar.setUpdatesEnabled(False)
+            try:
+                self.bottom_toolbar.setFixedHeight(height)
+                self.bottom_toggle_btn.setText(text)
+            finally:
+                self.bottom_toolbar.setUpdatesEnabled(True)
+            self.bottom_expanded = not getattr(self, 'bottom_expanded', False)
         except Exception as e:
             logger.error(f"切换底部栏失败: {e}")
 
@@ -606,19 +750,34 @@ class MainWindow(QMainWindow):
                 self.move(event.globalPosition().toPoint() - self._drag_position)
                 event.accept()
         else:
-            # 检查鼠标是否在窗口边缘，并设置相应的鼠标指针
-            resize_area = self._get_resize_area(event.pos())
-            if resize_area:
-                self._set_cursor_for_resize_area(resize_area)
-            else:
-                self.unsetCursor()
+            # 记录最新位置，由定时器在下一帧检查是否在窗口边缘并设置鼠标指针
+            self._pending_hover_pos = event.pos()
+            if not self._hover_timer.isActive():
+                self._hover_timer.start()
             super().mouseMoveEvent(event)
+    def _process_pending_hover(self) -> None:
+        """处理合并后的悬停位置：检查鼠标是否在窗口边缘，并设置相应的鼠标指针"""
+        pos = self._pending_hover_pos
+        self._pending_hover_pos = None
+        if pos is None or self._resize_enabled or self._is_dragging:
+            return
+        resize_area = self._get_resize_area(pos)
+        if resize_area:
+            self._set_cursor_for_resize_area(resize_area)
+        elif self._cursor_state is not None:
+            self.unsetCursor()
+            self._cursor_state = None
     def mouseReleaseEvent(self, event) -> None:
         if event.button() == Qt.MouseButton.LeftButton:
+            was_resizing = self._resize_enabled
             self._is_dragging = False
             self._drag_position = None
             self._resize_enabled = False
             self._resize_area = None
+            if was_resizing and self._use_rounded_mask:
+                # 调整大小结束，立即按最终尺寸更新遮罩
+                self._mask_timer.stop()
+                self._apply_window_mask()
             event.accept()
         else:
             super().mouseReleaseEvent(event)
@@ -626,8 +785,26 @@ class MainWindow(QMainWindow):
     def resizeEvent(self, event) -> None:
         try:
             super().resizeEvent(event)
+            self._update_resize_cache()
+            if self._use_rounded_mask:
+                if self._resize_enabled:
+                    # 拖动调整大小期间合并遮罩重建
+                    if not self._mask_timer.isActive():
+                        self._mask_timer.start()
+                else:
+                    self._apply_window_mask()
+        except Exception:
+            pass
+
+    def _apply_window_mask(self) -> None:
+        """按当前尺寸设置圆角遮罩；尺寸与圆角半径未变化时跳过"""
+        try:
             radius = getattr(self, '_corner_radius', 12)
             rect = self.rect()
+            key = (rect.width(), rect.height(), radius)
+            if key == self._last_mask_key:
+                return
+            self._last_mask_key = key
             path = QPainterPath()
             path.addRoundedRect(rect, radius, radius)
             region = QRegion(path.toFillPolygon().toPolygon())
@@ -635,6 +812,14 @@ class MainWindow(QMainWindow):
         except Exception:
             pass
             
+    def _update_resize_cache(self) -> None:
+        """缓存窗口宽高和内部区域（left, top, right, bottom），供边缘检测使用"""
+        margin = self._resize_margin
+        self._rw = self.width()
+        self._rh = self.height()
+        # 边缘判断使用闭区间，内部区域为开区间
+        self._inner_rect = (margin + 1, margin + 1, self._rw - margin - 1, self._rh - margin - 1)
+
     def _get_resize_area(self, pos):
         """检测鼠标是否在窗口边缘区域
         
@@ -644,34 +829,19 @@ class MainWindow(QMainWindow):
         Returns:
             str: 返回边缘区域类型，None表示不在边缘区域
         """
-        rect = self.rect()
+        if self._inner_rect is None:
+            self._update_resize_cache()
         x, y = pos.x(), pos.y()
-        margin = self._resize_margin
         
-        # 检查是否在左边缘
-        if x <= margin:
-            if y <= margin:
-                return 'top_left'
-            elif y >= rect.height() - margin:
-                return 'bottom_left'
-            else:
-                return 'left'
-        # 检查是否在右边缘
-        elif x >= rect.width() - margin:
-            if y <= margin:
-                return 'top_right'
-            elif y >= rect.height() - margin:
-                return 'bottom_right'
-            else:
-                return 'right'
-        # 检查是否在上边缘
-        elif y <= margin:
-            return 'top'
-        # 检查是否在下边缘
-        elif y >= rect.height() - margin:
-            return 'bottom'
-            
-        return None
+        # 绝大多数移动发生在窗口内部，一次包围盒判断即可排除
+        l, t, r, b = self._inner_rect
+        if l <= x <= r and t <= y <= b:
+            return None
+        
+        # 四个边缘判断合成一个编码后查表，无需逐项分支
+        m = self._resize_margin
+        code = (x <= m) | ((y <= m) << 1) | ((y >= self._rh - m) << 2) | ((x >= self._rw - m) << 3)
+        return _RESIZE_AREAS[code]
         
     def _set_cursor_for_resize_area(self, area):
         """根据边缘区域设置鼠标指针
@@ -679,14 +849,12 @@ class MainWindow(QMainWindow):
         Args:
             area: 边缘区域类型
         """
-        if area in ('left', 'right'):
-            self.setCursor(Qt.CursorShape.SizeHorCursor)
-        elif area in ('top', 'bottom'):
-            self.setCursor(Qt.CursorShape.SizeVerCursor)
-        elif area in ('top_left', 'bottom_right'):
-            self.setCursor(Qt.CursorShape.SizeFDiagCursor)
-        elif area in ('top_right', 'bottom_left'):
-            self.setCursor(Qt.CursorShape.SizeBDiagCursor)
+        if area == self._cursor_state:
+            return
+        cursor = self._CURSOR_MAP.get(area)
+        if cursor is not None:
+            self._cursor_state = area
+            self.setCursor(cursor)
             
     def _resize_window(self, event):
         """调整窗口大小
@@ -698,52 +866,53 @@ class MainWindow(QMainWindow):
             return
             
         global_pos = event.globalPosition().toPoint()
-        rect = self.geometry()
+        current = self.geometry()
+        rect = QRect(current)
         
-        if self._resize_area == 'left':
-            new_width = rect.right() - global_pos.x()
-            if new_width > self.minimumWidth():
-                rect.setLeft(global_pos.x())
-                self.setGeometry(rect)
-        elif self._resize_area == 'right':
-            new_width = global_pos.x() - rect.left()
-            if new_width > self.minimumWidth():
-                rect.setRight(global_pos.x())
-                self.setGeometry(rect)
-        elif self._resize_area == 'top':
-            new_height = rect.bottom() - global_pos.y()
-            if new_height > self.minimumHeight():
-                rect.setTop(global_pos.y())
-                self.setGeometry(rect)
-        elif self._resize_area == 'bottom':
-            new_height = global_pos.y() - rect.top()
-            if new_height > self.minimumHeight():
-                rect.setBottom(global_pos.y())
-                self.setGeometry(rect)
-        elif self._resize_area == 'top_left':
-            new_width = rect.right() - global_pos.x()
-            new_height = rect.bottom() - global_pos.y()
-            if new_width > self.minimumWidth() and new_height > self.minimumHeight():
-                rect.setTopLeft(global_pos)
-                self.setGeometry(rect)
-        elif self._resize_area == 'top_right':
-            new_width = global_pos.x() - rect.left()
-            new_height = rect.bottom() - global_pos.y()
-            if new_width > self.minimumWidth() and new_height > self.minimumHeight():
-                rect.setTopRight(global_pos)
-                self.setGeometry(rect)
-        elif self._resize_area == 'bottom_left':
-            new_width = rect.right() - global_pos.x()
-            new_height = global_pos.y() - rect.top()
-            if new_width > self.minimumWidth() and new_height > self.minimumHeight():
-                rect.setBottomLeft(global_pos)
-                self.setGeometry(rect)
-        elif self._resize_area == 'bottom_right':
-            new_width = global_pos.x() - rect.left()
-            new_height = global_pos.y() - rect.top()
-            if new_width > self.minimumWidth() and new_height > self.minimumHeight():
-                rect.setBottomRight(global_pos)
+        # 位置与尺寸未变化时不调用setGeometry；调整期间暂停重绘，几何更新完成后统一重绘一次
+        self.setUpdatesEnabled(False)
+        try:
+            if self._resize_area == 'left':
+                new_width = rect.right() - global_pos.x()
+                if new_width > self.minimumWidth():
+                    rect.setLeft(global_pos.x())
+            elif self._resize_area == 'right':
+                new_width = global_pos.x() - rect.left()
+                if new_width > self.minimumWidth():
+                    rect.setRight(global_pos.x())
+            elif self._resize_area == 'top':
+                new_height = rect.bottom() - global_pos.y()
+                if new_height > self.minimumHeight():
+                    rect.setTop(global_pos.y())
+            elif self._resize_area == 'bottom':
+                new_height = global_pos.y() - rect.top()
+                if new_height > self.minimumHeight():
+                    rect.setBottom(global_pos.y())
+            elif self._resize_area == 'top_left':
+                new_width = rect.right() - global_pos.x()
+                new_height = rect.bottom() - global_pos.y()
+                if new_width > self.minimumWidth() and new_height > self.minimumHeight():
+                    rect.setTopLeft(global_pos)
+            elif self._resize_area == 'top_right':
+                new_width = global_pos.x() - rect.left()
+                new_height = rect.bottom() - global_pos.y()
+                if new_width > self.minimumWidth() and new_height > self.minimumHeight():
+                    rect.setTopRight(global_pos)
+            elif self._resize_area == 'bottom_left':
+                new_width = rect.right() - global_pos.x()
+                new_height = global_pos.y() - rect.top()
+                if new_width > self.minimumWidth() and new_height > self.minimumHeight():
+                    rect.setBottomLeft(global_pos)
+            elif self._resize_area == 'bottom_right':
+                new_width = global_pos.x() - rect.left()
+                new_height = global_pos.y() - rect.top()
+                if new_width > self.minimumWidth() and new_height > self.minimumHeight():
+                    rect.setBottomRight(global_pos)
+            if rect != current:
                 self.setGeometry(rect)
+        finally:
+            self.setUpdatesEnabled(True)
+            self.update()
     def load_image_directory(self) -> None:
         """加载图片目录功能"""
         LIM.load_image_directory(self)
@@ -760,6 +929,12 @@ class MainWindow(QMainWindow):
         self.resource_list.setTextElideMode(Qt.TextElideMode.ElideMiddle)  # 添加这行
         self.resource_list.setVerticalScrollMode(QListWidget.ScrollMode.ScrollPerPixel)
         self.resource_list.setHorizontalScrollMode(QListWidget.ScrollMode.ScrollPerPixel)
+        # 所有列表项尺寸一致，布局时无需逐项查询sizeHint；大目录下分批布局，不阻塞首屏显示
+        self.resource_list.setUniformItemSizes(True)
+        self.resource_list.setLayoutMode(QListWidget.LayoutMode.Batched)
+        self.resource_list.setBatchSize(200)
+        # 列表clear()会重置模型，行号随之失效
+        self.resource_list.model().modelReset.connect(self._icon_lru.clear)
         self.resource_list.setStyleSheet("background-color: #FAFAF2; color: #333333; border: 1px solid #E6E4D6;")
 
     def _create_control_panel(self) -> None:
@@ -788,8 +963,8 @@ class MainWindow(QMainWindow):
     def _setup_event_connections(self) -> None:
         try:
             # 连接滚动条滚动事件
-            self.resource_list.verticalScrollBar().valueChanged.connect(self._on_resource_list_scrolled)
-            self.resource_list.horizontalScrollBar().valueChanged.connect(self._on_resource_list_scrolled)
+            self.resource_list.verticalScrollBar().valueChanged.connect(self._schedule_visible_thumbnails)
+            self.resource_list.horizontalScrollBar().valueChanged.connect(self._schedule_visible_thumbnails)
             
             # 添加资源列表点击事件连接
             self.resource_list.itemClicked.connect(self.on_resource_selected)
@@ -798,9 +973,9 @@ class MainWindow(QMainWindow):
             self.export_dataset_btn.clicked.connect(self.show_export_dataset_dialog)
 
             # 连接父标签列表变化信号，刷新画布
-            if hasattr(self, 'parent_label_list') and self.parent_label_list:
+            if self.parent_label_list is not None:
                 try:
-                    self.parent_label_list.labels_changed.connect(lambda: (self.canvas.update_rects() if hasattr(self, 'canvas') and self.canvas else None))
+                    self.parent_label_list.labels_changed.connect(lambda: (self.canvas.update_rects() if self.canvas is not None else None))
                 except Exception:
                     pass
                 try:
@@ -812,14 +987,12 @@ class MainWindow(QMainWindow):
                 except Exception:
                     pass
         except Exception as e:
-            logger.error(f"设置事件连接时发生错误: {e}")
-            import traceback
-            logger.error(f"错误堆栈信息: {traceback.format_exc()}")
+            logger.error(f"设置事件连接时发生错误: {e}", exc_info=True)
 
     def _on_child_label_hovered(self, child):
         try:
             from app_ui.choose_moon import highlight_child_label
-            if hasattr(self, 'canvas') and self.canvas:
+            if self.canvas is not None:
                 highlight_child_label(self.canvas, child)
         except Exception:
             pass
@@ -827,7 +1000,7 @@ class MainWindow(QMainWindow):
     def _on_child_label_delete_requested(self, child):
         try:
             from app_ui.delet_moon import delete_child_label_by_object
-            if hasattr(self, 'canvas') and self.canvas:
+            if self.canvas is not None:
                 delete_child_label_by_object(self.canvas, child)
         except Exception:
             pass
@@ -835,27 +1008,65 @@ class MainWindow(QMainWindow):
     def init_workspace(self) -> None:
 
         try:
-            
+            if self._scan_worker is not None and self._scan_worker.isRunning():
+                return
+            # 目录扫描放到后台线程，窗口先显示；扫描结果经done信号回到主线程填充列表
             self.setWindowTitle('手动标注工具 - 正在扫描工作区...')
-            QApplication.processEvents()
-            files = self.resource_manager.scan_resources()
+            worker = _WorkspaceScanWorker(self.resource_manager)
+            worker.done.connect(self._on_workspace_scanned)
+            worker.finished.connect(worker.deleteLater)
+            worker.finished.connect(lambda: setattr(self, '_scan_worker', None))
+            self._scan_worker = worker
+            worker.start()
+
+        except Exception as e:
+            logger.error(f"初始化工作区时发生错误: {e}", exc_info=True)
+            QMessageBox.warning(self, "警告", f"初始化工作区失败: {e}")
+            self.setWindowTitle('手动标注工具')
+
+    def _on_workspace_scanned(self, files: List[str]) -> None:
+        """工作区扫描完成后在主线程更新资源列表"""
+        try:
             self.resource_list.clear()
+            self._set_images(files)
             if files:
-                self.images = files
-                if len(files) > 0:
-                    self.parent_label_list.set_current_image_info(
-                        files[0], total=len(files), current_idx=0)
-            else:
-                self.images = []
+                self.parent_label_list.set_current_image_info(
+                    files[0], total=len(files), current_idx=0)
             self.setWindowTitle('moonlight')
 
         except Exception as e:
-            logger.error(f"初始化工作区时发生错误: {e}")
-            import traceback
-            logger.error(f"错误堆栈信息: {traceback.format_exc()}")
+            logger.error(f"初始化工作区时发生错误: {e}", exc_info=True)
             QMessageBox.warning(self, "警告", f"初始化工作区失败: {e}")
             self.setWindowTitle('手动标注工具')
-    def _load_thumbnail_for_item(self, file_path: str, list_idx: int) -> None:
+    @staticmethod
+    def _thumb_icon_key(file_path: str) -> Optional[Tuple[str, int]]:
+        """缩略图缓存键：文件修改后mtime变化，旧图标自然失效"""
+        try:
+            return os.path.abspath(file_path), os.stat(file_path).st_mtime_ns
+        except OSError:
+            return None
+
+    @classmethod
+    def _get_cached_thumb_icon(cls, key: Optional[Tuple[str, int]]) -> Optional[QIcon]:
+        """命中时返回缓存的图标并刷新其LRU位置"""
+        if key is None:
+            return None
+        icon = cls._thumb_icon_cache.get(key)
+        if icon is not None:
+            cls._thumb_icon_cache.move_to_end(key)
+        return icon
+
+    @classmethod
+    def _put_cached_thumb_icon(cls, key: Optional[Tuple[str, int]], icon: QIcon) -> None:
+        if key is None:
+            return
+        cls._thumb_icon_cache[key] = icon
+        cls._thumb_icon_cache.move_to_end(key)
+        while len(cls._thumb_icon_cache) > _THUMB_ICON_CACHE_MAX:
+            cls._thumb_icon_cache.popitem(last=False)
+
+    def _load_thumbnail_for_item(self, file_path: str, list_idx: int,
+                                 priority: int = _THUMB_PRIORITY_VISIBLE) -> None:
 
         try:
             # 检查列表项是否存在
@@ -864,31 +1075,83 @@ class MainWindow(QMainWindow):
                 return
                 
             # 如果已经有图标，跳过
-            if not item.icon().isNull():
+            if list_idx in self._icon_lru:
+                self._icon_lru.move_to_end(list_idx)
                 return
-                
-            # 加载图片
-            image = self.resource_manager.load_image_safe(file_path)
-            if not image:
+
+            # 同一文件之前已生成过图标，直接复用，无需再次解码
+            icon = self._get_cached_thumb_icon(self._thumb_icon_key(file_path))
+            if icon is not None:
+                self._set_item_thumbnail(list_idx, item, icon)
+                return
+
+            # 已在后台解码中，跳过
+            key = (file_path, list_idx)
+            if key in self._thumb_pending:
                 return
                 
-            # 创建缩略图
-            thumbnail = QPixmap.fromImage(image).scaled(
-                        80, 80, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+            if not self.resource_manager.is_valid_image_path(file_path):
+                logger.warning(f"无效的图片路径: {file_path}")
+                return
 
-            # 设置图标
-            item.setIcon(QIcon(thumbnail))
+            # 在线程池中按缩略图尺寸解码，避免在UI线程解码整幅原图
+            self._thumb_pending.add(key)
+            self._thumb_pool.start(LIM.ThumbnailTask(file_path, list_idx, self._thumb_signals), priority)
 
         except Exception as e:
             logger.error(f"为列表项加载缩略图时发生错误 {file_path}: {e}")
 
+    def _on_thumbnail_loaded(self, file_path: str, list_idx: int, image: QImage) -> None:
+        """后台缩略图解码完成后在主线程设置列表项图标"""
+        try:
+            self._thumb_pending.discard((file_path, list_idx))
+            if image.isNull():
+                logger.warning(f"无法加载图片: {file_path}")
+                return
+            # 列表可能已被重建，确认该位置仍是同一张图片
+            if list_idx >= len(self.images) or self.images[list_idx] != file_path:
+                return
+            item = self.resource_list.item(list_idx)
+            if item and list_idx not in self._icon_lru:
+                icon = QIcon(QPixmap.fromImage(image))
+                self._put_cached_thumb_icon(self._thumb_icon_key(file_path), icon)
+                self._set_item_thumbnail(list_idx, item, icon)
+        except Exception as e:
+            logger.error(f"设置缩略图时发生错误 {file_path}: {e}")
+
+    def _set_item_thumbnail(self, list_idx: int, item: QListWidgetItem, icon: QIcon) -> None:
+        """为列表项挂载缩略图，超过上限时把最久未用的项换回占位图标以限制内存"""
+        item.setIcon(icon)
+        self._icon_lru[list_idx] = icon
+        self._icon_lru.move_to_end(list_idx)
+        while len(self._icon_lru) > _THUMB_LRU_MAX:
+            old_idx, _ = self._icon_lru.popitem(last=False)
+            old_item = self.resource_list.item(old_idx)
+            if old_item is not None:
+                old_item.setIcon(self._placeholder_icon)
+            # 同时丢弃图标缓存中的对应项，使换下的图标真正被释放
+            if old_idx < len(self.images):
+                old_key = self._thumb_icon_key(self.images[old_idx])
+                if old_key is not None:
+                    self._thumb_icon_cache.pop(old_key, None)
+
     def on_resource_selected(self, item: QListWidgetItem) -> None:
 
         try:
             idx = self.resource_list.row(item)
             if 0 <= idx < len(self.images):
                 image_path = self.images[idx]
+                # 点击的正是画布上已显示的图片（如键盘翻页后setCurrentRow选中的项），无需重新解码
+                if image_path == self.current_image_path and self.canvas.is_image_current(image_path):
+                    return
                 if self.resource_manager.is_valid_image_path(image_path):
+                    # 切换图片时取消上一张图片仍在进行的yolov推理
+                    if image_path != self.current_image_path:
+                        try:
+                            from services.global_model_loader import get_global_model_loader
+                            get_global_model_loader().cancel_yolov_inference()
+                        except Exception:
+                            pass
                     # 设置当前图片路径
                     self.current_image_path = image_path
                     # 使用GraphicsCanvas的load_image方法加载图片
@@ -901,25 +1164,55 @@ class MainWindow(QMainWindow):
         except Exception as e:
             logger.error(f"处理资源选择事件时发生错误: {e}")
 
+    def _schedule_visible_thumbnails(self) -> None:
+        """滚动时合并处理：50ms内的多次滚动只触发一次可见项缩略图加载"""
+        if not self._scroll_thumb_timer.isActive():
+            self._scroll_thumb_timer.start()
+
+    def _probe_row(self, start: QPoint, step: int) -> int:
+        """从start沿对角线方向逐点调用indexAt，返回首个命中的行号，未命中返回-1"""
+        for k in range(_THUMB_PROBE_STEPS):
+            index = self.resource_list.indexAt(QPoint(start.x() + step * k, start.y() + step * k))
+            if index.isValid():
+                return index.row()
+        return -1
+
+    def _visible_row_range(self) -> Tuple[int, int]:
+        """通过indexAt直接求出视口内可见项的行号范围，无需遍历全部列表项"""
+        count = self.resource_list.count()
+        if count == 0:
+            return 0, -1
+        vp = self.resource_list.viewport().rect()
+        step = max(1, self.resource_list.spacing())
+        first = self._probe_row(vp.topLeft(), step)
+        last = self._probe_row(vp.bottomRight(), -step)
+        if first < 0:
+            first = 0
+        if last < 0:
+            # 视口右下角未命中（列表不足一屏或尚未完成布局）：按网格尺寸估算一屏的项数，
+            # 避免布局未完成时把全部列表项都当作可见
+            spacing = self.resource_list.spacing()
+            cols = max(1, vp.width() // (110 + 2 * spacing))
+            rows = max(1, vp.height() // (130 + 2 * spacing) + 1)
+            last = min(count - 1, first + cols * rows)
+        return first, min(count - 1, last)
+
     def _on_resource_list_scrolled(self) -> None:
         """处理资源列表滚动事件，加载可见的图片预览"""
         try:
-            # 遍历所有列表项
-            for i in range(self.resource_list.count()):
-                item = self.resource_list.item(i)
-                if not item:
-                    continue
-                    
-                # 如果已经有图标，跳过
-                if not item.icon().isNull():
-                    continue
-                    
-                # 检查项是否可见
-                rect = self.resource_list.visualItemRect(item)
-                if self.resource_list.viewport().rect().intersects(rect):
-                    # 项可见，加载缩略图
-                    if i < len(self.images):
-                        self._load_thumbnail_for_item(self.images[i], i)
+            first, last = self._visible_row_range()
+            if last < first:
+                return
+            end = min(last, len(self.images) - 1)
+            buffer = (last - first + 1) * _THUMB_PREFETCH_SCREENS
+            pre_first = max(0, first - buffer)
+            pre_last = min(len(self.images) - 1, last + buffer)
+            # 先处理上下预加载区（低优先级），再处理可见区（高优先级），可见项在LRU中也最新
+            for i in (*range(pre_first, first), *range(end + 1, pre_last + 1)):
+                self._load_thumbnail_for_item(self.images[i], i, _THUMB_PRIORITY_PREFETCH)
+            for i in range(first, end + 1):
+                # 已有图标的项仅刷新LRU位置，其余项加载缩略图
+                self._load_thumbnail_for_item(self.images[i], i, _THUMB_PRIORITY_VISIBLE)
         except Exception as e:
             logger.error(f"处理资源列表滚动事件时发生错误: {e}")
 
@@ -931,24 +1224,33 @@ class MainWindow(QMainWindow):
                 return
             dir_path = os.path.dirname(image_path)
 
-            files = []
-            for ext in LIM.ImageProcessingConfig.SUPPORTED_FORMATS:
-                pattern = os.path.join(dir_path, f'*.{ext}')
-                files.extend(glob.glob(pattern))
-            files = sorted(files, key=lambda x: os.path.basename(x).lower())
-            self.resource_list.clear()
-            self.images = files
-            # 为每个图片文件创建列表项
-            for i, file_path in enumerate(files):
-                item = QListWidgetItem(os.path.basename(file_path))
+            # 单次scandir列出目录，替代按扩展名逐个glob
+            entries = LIM.list_image_entries(dir_path)
+            files = [path for _, path in entries]
+            rl = self.resource_list
+            size_hint = QSize(110, 130)
+            # 先在列表外一次性构造好全部列表项（此时尚无视图/模型开销）
+            items = [QListWidgetItem(name) for name, _ in entries]
+            for item in items:
                 item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                item.setSizeHint(QSize(110, 130))
-                self.resource_list.addItem(item)
-                self._load_thumbnail_for_item(file_path, i)
+                item.setSizeHint(size_hint)
+            # 重建期间暂停重绘并屏蔽信号，避免逐项插入时反复布局
+            rl.setUpdatesEnabled(False)
+            rl.blockSignals(True)
+            try:
+                rl.clear()
+                self._set_images(files)
+                for item in items:
+                    rl.addItem(item)
+            finally:
+                rl.blockSignals(False)
+                rl.setUpdatesEnabled(True)
+            # 只为可见项加载缩略图；放到下一轮事件循环，等视口几何和布局生效
+            QTimer.singleShot(0, self._on_resource_list_scrolled)
             base_name = os.path.basename(image_path)
             current_idx = 0
-            for i in range(len(files)):
-                if os.path.basename(files[i]) == base_name:
+            for i, (name, _) in enumerate(entries):
+                if name == base_name:
                     current_idx = i
                     break
 
@@ -967,10 +1269,13 @@ class MainWindow(QMainWindow):
             if not self.resource_manager.is_valid_image_path(image_path):
                 logger.warning(f"尝试显示无效图片: {image_path}")
                 return
+            # 同一张图片已显示在画布上（如列表只有一张时翻页），无需重复加载
+            if image_path == self.current_image_path and self.canvas.is_image_current(image_path):
+                return
             self.current_image_path = image_path
 
-            if image_path in self.images:
-                idx = self.images.index(image_path)
+            idx = self._image_idx.get(image_path, -1)
+            if idx >= 0:
                 self.parent_label_list.set_current_image_info(
                     image_path, total=len(self.images), current_idx=idx)
             else:
@@ -986,17 +1291,24 @@ class MainWindow(QMainWindow):
             logger.error(f"显示图片时发生错误 {image_path}: {e}")
             self.setWindowTitle('手动标注工具')
 
+    def _set_images(self, files: List[str]) -> None:
+        """设置资源图片列表，并同步重建路径到下标的索引
+        
+        Args:
+            files: 图片路径列表（顺序与资源列表一致）
+        """
+        self.images = files
+        self._image_idx = {p: i for i, p in enumerate(files)}
+
     def get_current_image_info(self) -> Optional[str]:
 
-        return getattr(self, 'current_image_path', None)
+        return self.current_image_path
 
     def refresh_child_labels_for_current_image(self) -> None:
         """刷新当前图片的子标签显示"""
         try:
-            if hasattr(self, 'current_image_path') and self.current_image_path:
-                current_idx = 0
-                if self.current_image_path in self.images:
-                    current_idx = self.images.index(self.current_image_path)
+            if self.current_image_path:
+                current_idx = max(0, self._image_idx.get(self.current_image_path, 0))
 
                 self.parent_label_list.set_current_image_info(
                     self.current_image_path, 
@@ -1008,21 +1320,12 @@ class MainWindow(QMainWindow):
     def get_existing_bboxes(self, image_path: str) -> List[Tuple[float, float, float, float]]:
 
         try:
-            existing_boxes = []
             parent = self.parent_label_list.get_selected()
-
-            if (not parent or 
-                not hasattr(parent, 'children_by_image') or 
-                image_path not in parent.children_by_image):
-                return existing_boxes
-
-            for child in parent.children_by_image[image_path]:
-                if getattr(child, 'is_placeholder', False):
-                    continue
-                existing_boxes.append((
-                    child.x_center, child.y_center, child.width, child.height))
-
-            return existing_boxes
+            children = getattr(parent, 'children_by_image', {}).get(image_path) if parent else None
+            if not children:
+                return []
+            # ChildLabel在__init__中都设置了is_placeholder，直接读取属性
+            return [_BBOX_GETTER(child) for child in children if not child.is_placeholder]
 
         except Exception as e:
             logger.error(f"获取已存在标注框时发生错误: {e}")
@@ -1051,7 +1354,7 @@ class MainWindow(QMainWindow):
     def show_previous_image(self) -> None:
         """显示上一张图片"""
         try:
-            if not hasattr(self, 'images') or not self.images:
+            if not self.images:
                 return
                 
             current_image_path = self.get_current_image_info()
@@ -1064,9 +1367,7 @@ class MainWindow(QMainWindow):
                 return
                 
             # 获取当前图片索引
-            current_idx = -1
-            if current_image_path in self.images:
-                current_idx = self.images.index(current_image_path)
+            current_idx = self._image_idx.get(current_image_path, -1)
                 
             # 计算上一张图片索引
             prev_idx = current_idx - 1
@@ -1087,7 +1388,7 @@ class MainWindow(QMainWindow):
     def show_next_image(self) -> None:
         """显示下一张图片"""
         try:
-            if not hasattr(self, 'images') or not self.images:
+            if not self.images:
                 return
                 
             current_image_path = self.get_current_image_info()
@@ -1100,9 +1401,7 @@ class MainWindow(QMainWindow):
                 return
                 
             # 获取当前图片索引
-            current_idx = -1
-            if current_image_path in self.images:
-                current_idx = self.images.index(current_image_path)
+            current_idx = self._image_idx.get(current_image_path, -1)
                 
             # 计算下一张图片索引
             next_idx = current_idx + 1
@@ -1122,12 +1421,8 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event) -> None:
 
         try:
-            # 停止自动矩形框绘制器
-            if hasattr(self, 'auto_rect_pen') and self.auto_rect_pen:
-                self.auto_rect_pen.stop()
-                logger.info("自动矩形框绘制器已停止")
             try:
-                if hasattr(self, '_resize_worker') and self._resize_worker:
+                if self._resize_worker:
                     if self._resize_worker.isRunning():
                         self._resize_worker.quit()
                         self._resize_worker.wait(3000)
@@ -1136,6 +1431,18 @@ class MainWindow(QMainWindow):
                             self._resize_worker.wait(1000)
             except Exception:
                 pass
+            # 等待工作区后台扫描结束，避免线程仍在运行时对象被销毁
+            try:
+                if self._scan_worker is not None and self._scan_worker.isRunning():
+                    self._scan_worker.wait(3000)
+            except Exception:
+                pass
+            # 丢弃尚未开始的缩略图任务，并等待正在解码的任务结束
+            try:
+                self._thumb_pool.clear()
+                self._thumb_pool.waitForDone(2000)
+            except Exception:
+                pass
 
             import gc
             gc.collect()
@@ -1185,6 +1492,9 @@ def main():
             app.setWindowIcon(QIcon(icon_path))
         window = MainWindow()
         window.show()
+        # 清理上次运行遗留的遥感裁剪临时文件
+        from io_ops.clean import clean_temp_crops
+        clean_temp_crops()
         # 初始化全局模型加载器（在后台线程中加载模型）
         from services.global_model_loader import get_global_model_loader
         global_model_loader = get_global_model_loader()
@@ -1208,12 +1518,15 @@ def main():
         sys.exit(app.exec())
 
     except Exception as e:
-        logger.critical(f"启动应用程序时发生严重错误: {e}")
-        import traceback
-        logger.critical(f"错误堆栈信息: {traceback.format_exc()}")
+        logger.critical(f"启动应用程序时发生严重错误: {e}", exc_info=True)
         if 'app' in locals():
             QMessageBox.critical(None, "严重错误", f"应用程序启动失败: {e}")
         sys.exit(1)
 
 if __name__ == '__main__':
+    # 仅作为程序入口运行时配置日志；日志级别由环境变量 MOONLIGHT_LOGLEVEL 控制（默认WARNING）
+    # force=True：即使依赖库在导入时已配置过根日志处理器，也以此处的级别为准
+    logging.basicConfig(level=os.environ.get('MOONLIGHT_LOGLEVEL', 'WARNING').upper(),
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        force=True)
     main()
@@ -9,10 +9,59 @@ import numpy as np
 import cv2
 from algorithms.minimum_bounding_rectangle import MinimumBoundingBox
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _masks_to_numpy(masks):
+    """
+    将一个结果中的全部掩码一次性拷贝到主机内存
+    
+    逐个mask.cpu()会为每个掩码发起一次设备到主机的同步拷贝；整批转换只同步一次
+    
+    Args:
+        masks: (N, H, W)掩码张量或数组
+        
+    Returns:
+        (N, H, W) numpy数组
+    """
+    if hasattr(masks, 'detach'):
+        return masks.detach().cpu().numpy()
+    return np.asarray(masks)
+
+
+def _first_occurrence_mask(keys):
+    """
+    对(N, K)去重键矩阵求首次出现掩码：每组相同的键只保留下标最小的一行
+    
+    Args:
+        keys: (N, K)数组
+        
+    Returns:
+        (N,)布尔数组
+    """
+    keep = np.zeros(len(keys), dtype=bool)
+    if len(keys):
+        _, first_idx = np.unique(keys, axis=0, return_index=True)
+        keep[first_idx] = True
+    return keep
+
+
+def _polygon_area_center(polygon_points):
+    """
+    计算多边形面积（鞋带公式，由cv2.contourArea在C中完成）与顶点均值中心
+    
+    Args:
+        polygon_points: 多边形点集，(N, 2)数组或[(x1, y1), ...]
+        
+    Returns:
+        (area, center_x, center_y)
+    """
+    pts = np.asarray(polygon_points, dtype=np.float32).reshape(-1, 2)
+    area = abs(float(cv2.contourArea(pts)))
+    center_x, center_y = pts.mean(axis=0, dtype=np.float64)
+    return area, float(center_x), float(center_y)
+
+
 class AutoPenManager(QObject):
     """MASK模式自动绘制管理器，负责MASK子标签的创建与绘制"""
     
@@ -42,6 +91,8 @@ class AutoPenManager(QObject):
             'confidence_threshold': 0.3,
             'polygon_simplify_epsilon': 2.0,
         }
+        # 掩码二值化输出缓冲区，按掩码尺寸惰性分配并复用
+        self._mask_buf = None
         
         logger.info("MASK模式自动绘制管理器初始化完成")
     
@@ -75,48 +126,56 @@ class AutoPenManager(QObject):
                     # 检查结果中是否有掩码数据
                     if hasattr(result, 'masks') and result.masks is not None:
                         masks = result.masks.data  # 获取掩码数据
+                        # 整批掩码一次拷贝到主机内存
+                        masks_np = _masks_to_numpy(masks)
                         
-                        for i, mask in enumerate(masks):
-                            # 将掩码转换为numpy数组
-                            mask_np = mask.cpu().numpy() if hasattr(mask, 'cpu') else np.array(mask)
-                            
-                            polygon_points = self.extract_polygon_from_mask(mask_np, image_width, image_height)
+                        # 第一遍：提取全部掩码的多边形，并把中心与面积累积到数组中
+                        n_masks = len(masks_np)
+                        cand_idx = []
+                        cand_polygons = []
+                        cx = np.empty(n_masks)
+                        cy = np.empty(n_masks)
+                        areas = np.empty(n_masks)
+                        for i in range(n_masks):
+                            polygon_points = self.extract_polygon_from_mask(masks_np[i], image_width, image_height)
                             
                             if not polygon_points or len(polygon_points) < self.config['min_polygon_points']:
                                 logger.debug(f"MASK模式掩码 {i} 提取的多边形点数不足，跳过")
                                 continue
                             
-                            # 计算多边形的几何中心（用于去重检查）
-                            center_x = sum(p[0] for p in polygon_points) / len(polygon_points)
-                            center_y = sum(p[1] for p in polygon_points) / len(polygon_points)
-                            
-                            # 计算多边形面积（使用鞋带公式）
-                            area = 0.0
-                            n = len(polygon_points)
-                            for i in range(n):
-                                j = (i + 1) % n
-                                area += polygon_points[i][0] * polygon_points[j][1]
-                                area -= polygon_points[j][0] * polygon_points[i][1]
-                            area = abs(area) / 2.0
+                            # 计算多边形的几何中心（用于去重检查）与面积（鞋带公式），一次向量化完成
+                            area, center_x, center_y = _polygon_area_center(polygon_points)
                             
                             # 检查面积是否满足要求
                             if area < self.config['min_bbox_area']:
                                 logger.debug(f"MASK模式多边形面积过小，跳过: {area}")
                                 continue
                             
-                            # 归一化中心点坐标用于去重检查
-                            norm_center_x = center_x / image_width
-                            norm_center_y = center_y / image_height
-                            
-                            # 四舍五入到3位小数，用于比较
-                            center_x_rounded = round(norm_center_x, 3)
-                            center_y_rounded = round(norm_center_y, 3)
-                            area_rounded = round(area, 0)
+                            k = len(cand_idx)
+                            cx[k], cy[k], areas[k] = center_x, center_y, area
+                            cand_idx.append(i)
+                            cand_polygons.append(polygon_points)
+                        
+                        # 第二遍：一次性计算全部候选的去重键（归一化中心保留3位小数、面积取整），
+                        # 同一结果内相同的键只保留第一个
+                        n_cand = len(cand_idx)
+                        keys = np.stack([
+                            np.round(cx[:n_cand] / image_width, 3),
+                            np.round(cy[:n_cand] / image_height, 3),
+                            np.round(areas[:n_cand]),
+                        ], axis=1)
+                        keep = _first_occurrence_mask(keys)
+                        
+                        for k in np.flatnonzero(keep):
+                            i = cand_idx[k]
+                            mask = masks[i]
+                            mask_np = masks_np[i]
+                            polygon_points = cand_polygons[k]
                             
-                            # 检查是否已经创建了相似位置和大小的多边形标签
-                            label_key = (center_x_rounded, center_y_rounded, area_rounded)
+                            # 检查之前的结果中是否已经创建了相似位置和大小的多边形标签
+                            label_key = tuple(keys[k].tolist())
                             if label_key in created_label_info:
-                                logger.debug(f"MASK模式发现重复多边形标签，跳过: 中心({center_x_rounded}, {center_y_rounded}), 面积{area_rounded}")
+                                logger.debug(f"MASK模式发现重复多边形标签，跳过: 中心({label_key[0]}, {label_key[1]}), 面积{label_key[2]}")
                                 continue
                             
                             # 提取置信度
@@ -126,7 +185,9 @@ class AutoPenManager(QObject):
                             
                             # 创建多边形子标签
                             child = self.create_child_labels_from_polygon(
-                                polygon_points, image_info, image_width, image_height, mask_confidence, mask_data=mask_np
+                                polygon_points, image_info, image_width, image_height, mask_confidence,
+                                # 标签长期持有掩码数据，复制出独立数组，避免引用整批掩码
+                                mask_data=mask_np.copy()
                             )
                             
                             if child:
@@ -208,13 +269,20 @@ class AutoPenManager(QObject):
             logger.debug(f"开始从掩码提取多边形轮廓，掩码形状: {mask.shape}, 掩码类型: {mask.dtype}")
             
             # 确保掩码是二值图像
-            if mask.dtype != np.uint8:
+            if mask.dtype == np.bool_:
+                # 布尔掩码按字节重解释为0/1，findContours只区分零与非零，无需复制
+                mask = mask.view(np.uint8)
+            elif mask.dtype != np.uint8:
                 logger.debug(f"将掩码从 {mask.dtype} 转换为 uint8")
-                mask = (mask > 0.5).astype(np.uint8) * 255
+                # cv2.compare单次SIMD遍历直接输出0/255，写入复用的缓冲区
+                src = np.ascontiguousarray(mask, dtype=np.float32)
+                if self._mask_buf is None or self._mask_buf.shape != src.shape:
+                    self._mask_buf = np.empty(src.shape, dtype=np.uint8)
+                mask = cv2.compare(src, 0.5, cv2.CMP_GT, dst=self._mask_buf)
             
-            # 使用OpenCV查找轮廓 - 使用CHAIN_APPROX_NONE获取所有轮廓点
+            # 使用OpenCV查找轮廓 - TC89_KCOS在追踪边界时即完成链码压缩，不再输出每个边界像素
             logger.debug("使用OpenCV查找轮廓")
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_TC89_KCOS)
             
             logger.debug(f"找到 {len(contours)} 个轮廓")
             
@@ -226,39 +294,19 @@ class AutoPenManager(QObject):
             largest_contour = max(contours, key=cv2.contourArea)
             logger.debug(f"最大轮廓面积: {cv2.contourArea(largest_contour)}")
             
-            # 获取所有轮廓点（不进行简化）
-            polygon_points = []
-            for point in largest_contour:
-                x, y = point[0]
-                # 确保坐标在图像范围内
-                x = max(0, min(image_width - 1, int(x)))
-                y = max(0, min(image_height - 1, int(y)))
-                polygon_points.append((x, y))
-            
-            logger.debug(f"提取的多边形点数: {len(polygon_points)}")
+            # 统一做一次Douglas-Peucker简化，epsilon为像素单位的绝对容差
+            epsilon = float(self.config['polygon_simplify_epsilon'])
+            pts = cv2.approxPolyDP(largest_contour, epsilon, True).reshape(-1, 2)
+            logger.debug(f"轮廓点数: {len(largest_contour)}，简化后的多边形点数: {len(pts)}")
             
-            # 如果点数太多，进行适度的简化以减少计算量
-            if len(polygon_points) > 100:
-                logger.warning(f"多边形点数过多 ({len(polygon_points)} > 100)，进行进一步简化")
-                
-                # 使用更小的epsilon值进行简化，保留更多细节
-                epsilon = 0.002 * cv2.arcLength(largest_contour, True)
-                logger.debug(f"使用 epsilon={epsilon} 简化轮廓")
-                approx_polygon = cv2.approxPolyDP(largest_contour, epsilon, True)
-                
-                # 重新提取简化后的点
-                polygon_points = []
-                for point in approx_polygon:
-                    x, y = point[0]
-                    # 确保坐标在图像范围内
-                    x = max(0, min(image_width - 1, int(x)))
-                    y = max(0, min(image_height - 1, int(y)))
-                    polygon_points.append((x, y))
-                
-                logger.debug(f"简化后的多边形点数: {len(polygon_points)}")
+            # 确保坐标在图像范围内（对最终点集做一次向量化裁剪）
+            pts = pts.astype(np.int32, copy=True)
+            np.clip(pts[:, 0], 0, image_width - 1, out=pts[:, 0])
+            np.clip(pts[:, 1], 0, image_height - 1, out=pts[:, 1])
             
             logger.debug("成功提取多边形轮廓")
-            return polygon_points
+            # 下游按[(x, y), ...]使用，仅在返回时转换一次
+            return list(map(tuple, pts.tolist()))
             
         except Exception as e:
             logger.error(f"从掩码提取多边形时发生错误: {str(e)}")
@@ -425,12 +473,13 @@ class AutoPenManager(QObject):
                     if hasattr(result, 'masks') and result.masks is not None:
                         masks = result.masks.data  # 获取掩码数据
                         logger.info(f"找到 {len(masks) if masks is not None else 0} 个掩码")
+                        # 整批掩码一次拷贝到主机内存
+                        masks_np = _masks_to_numpy(masks)
                         
                         for i, mask in enumerate(masks):
                             logger.info(f"处理掩码 {i}")
                             
-                            # 将掩码转换为numpy数组
-                            mask_np = mask.cpu().numpy() if hasattr(mask, 'cpu') else np.array(mask)
+                            mask_np = masks_np[i]
                             logger.info(f"掩码形状: {mask_np.shape}, 掩码类型: {mask_np.dtype}")
                             
                             # 提取掩码的轮廓
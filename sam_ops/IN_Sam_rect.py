@@ -427,7 +427,7 @@ class SAMInferenceManager(QObject):
                             logger.info(f"SAM 未返回 mask，bbox (sanitized): {sanitized_bbox}")
                         continue
 
-                    # 使用 mask 创建多边形并创建子标签（复用 aotu_rect_pen 的坐标映射逻辑）
+                    # 使用 mask 创建多边形并创建子标签
                     try:
                         polygon_points = []
                         mask_arr = np.asarray(mask)
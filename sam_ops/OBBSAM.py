@@ -348,13 +348,16 @@ class SAMInferenceManager(QObject):
                                 # 填充 data 到原图尺寸
                                 if hasattr(res.masks, 'data') and res.masks.data is not None and orig_w and orig_h:
                                     full_masks = []
-                                    for mk in res.masks.data:
-                                        mk_np = mk.cpu().numpy() if hasattr(mk, 'cpu') else np.array(mk)
-                                        if mk_np.dtype != np.uint8:
-                                            mk_bin = (mk_np > 0.5).astype(np.uint8)
-                                        else:
-                                            mk_bin = (mk_np > 0).astype(np.uint8)
-                                        full = np.zeros((int(orig_h), int(orig_w)), dtype=np.uint8)
+                                    mask_stack = res.masks.data
+                                    mask_stack = mask_stack.cpu().numpy() if hasattr(mask_stack, 'cpu') else np.asarray(mask_stack)
+                                    # 二值化为 0/1，保持与下游兼容；整组掩码一次二值化
+                                    if mask_stack.dtype != np.uint8:
+                                        mask_bins = (mask_stack > 0.5).astype(np.uint8)
+                                    else:
+                                        mask_bins = (mask_stack > 0).astype(np.uint8)
+                                    # 所有掩码共用一次分配的 (N, H, W) uint8 缓冲区，逐个目标只取视图，避免每个目标单独分配整幅掩码
+                                    full_stack = np.zeros((len(mask_bins), int(orig_h), int(orig_w)), dtype=np.uint8)
+                                    for full, mk_bin in zip(full_stack, mask_bins):
                                         try:
                                             full[int(shift_y):int(shift_y)+int(crop_h), int(shift_x):int(shift_x)+int(crop_w)] = mk_bin
                                         except Exception:
@@ -1,44 +1,73 @@
+import numpy as np
+
+# 与已有子标签外接框IoU达到该值即视为重复
+DUPLICATE_IOU_THRESHOLD = 0.5
+
+
+def _child_box(child):
+    # 子标签的外接框(x1, y1, x2, y2)：优先四点坐标，其次多边形顶点，最后中心点+宽高
+    pts = getattr(child, 'points', None)
+    if isinstance(pts, list) and len(pts) >= 8:
+        xs = (pts[0], pts[2], pts[4], pts[6])
+        ys = (pts[1], pts[3], pts[5], pts[7])
+        return (min(xs), min(ys), max(xs), max(ys))
+    pp = getattr(child, 'polygon_points', None)
+    if isinstance(pp, list) and len(pp) > 0:
+        xs = [p[0] for p in pp]
+        ys = [p[1] for p in pp]
+        return (min(xs), min(ys), max(xs), max(ys))
+    xc = getattr(child, 'x_center', None)
+    yc = getattr(child, 'y_center', None)
+    w = getattr(child, 'width', None)
+    h = getattr(child, 'height', None)
+    if xc is None or yc is None or w is None or h is None:
+        return None
+    return (xc - w / 2.0, yc - h / 2.0, xc + w / 2.0, yc + h / 2.0)
+
+
+def _existing_boxes(selected_parent, image_info):
+    # 收集当前图片下所有非占位子标签的外接框，返回(M, 4)数组
+    boxes = []
+    for child in selected_parent.children_by_image.get(image_info, []):
+        if getattr(child, 'is_placeholder', False):
+            continue
+        box = _child_box(child)
+        if box is not None:
+            boxes.append(box)
+    return np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+
+def iou_matrix(cand, existing):
+    # 广播计算(N, 4)候选框与(M, 4)已有框两两之间的IoU，返回(N, M)
+    cand = np.asarray(cand, dtype=np.float64).reshape(-1, 4)
+    existing = np.asarray(existing, dtype=np.float64).reshape(-1, 4)
+    c = cand[:, None, :]
+    e = existing[None, :, :]
+    iw = np.clip(np.minimum(c[..., 2], e[..., 2]) - np.maximum(c[..., 0], e[..., 0]), 0.0, None)
+    ih = np.clip(np.minimum(c[..., 3], e[..., 3]) - np.maximum(c[..., 1], e[..., 1]), 0.0, None)
+    inter = iw * ih
+    a1 = np.clip(c[..., 2] - c[..., 0], 0.0, None) * np.clip(c[..., 3] - c[..., 1], 0.0, None)
+    a2 = np.clip(e[..., 2] - e[..., 0], 0.0, None) * np.clip(e[..., 3] - e[..., 1], 0.0, None)
+    union = a1 + a2 - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def iou_keep_mask(cand, existing, thr=DUPLICATE_IOU_THRESHOLD):
+    # 候选框中与任一已有框IoU都低于thr的保留（True）
+    cand = np.asarray(cand, dtype=np.float64).reshape(-1, 4)
+    existing = np.asarray(existing, dtype=np.float64).reshape(-1, 4)
+    if len(cand) == 0 or len(existing) == 0:
+        return np.ones(len(cand), dtype=bool)
+    return ~(iou_matrix(cand, existing) >= thr).any(axis=1)
+
+
 def is_duplicate_rect(selected_parent, image_info, bbox, tol=1.0):
     try:
         if not selected_parent or not image_info or not isinstance(bbox, (list, tuple)) or len(bbox) < 4:
             return False
         b1 = (float(bbox[0]), float(bbox[1]), float(bbox[2]), float(bbox[3]))
-        for child in selected_parent.children_by_image.get(image_info, []):
-            if getattr(child, 'is_placeholder', False):
-                continue
-            pts = getattr(child, 'points', None)
-            if isinstance(pts, list) and len(pts) >= 8:
-                xs = [pts[0], pts[2], pts[4], pts[6]]
-                ys = [pts[1], pts[3], pts[5], pts[7]]
-                b2 = (min(xs), min(ys), max(xs), max(ys))
-            else:
-                pp = getattr(child, 'polygon_points', None)
-                if isinstance(pp, list) and len(pp) > 0:
-                    xs = [p[0] for p in pp]
-                    ys = [p[1] for p in pp]
-                    b2 = (min(xs), min(ys), max(xs), max(ys))
-                else:
-                    xc = getattr(child, 'x_center', None)
-                    yc = getattr(child, 'y_center', None)
-                    w = getattr(child, 'width', None)
-                    h = getattr(child, 'height', None)
-                    if xc is None or yc is None or w is None or h is None:
-                        continue
-                    b2 = (xc - w / 2.0, yc - h / 2.0, xc + w / 2.0, yc + h / 2.0)
-            ix1 = max(b1[0], b2[0])
-            iy1 = max(b1[1], b2[1])
-            ix2 = min(b1[2], b2[2])
-            iy2 = min(b1[3], b2[3])
-            iw = max(0.0, ix2 - ix1)
-            ih = max(0.0, iy2 - iy1)
-            inter = iw * ih
-            a1 = max(0.0, b1[2] - b1[0]) * max(0.0, b1[3] - b1[1])
-            a2 = max(0.0, b2[2] - b2[0]) * max(0.0, b2[3] - b2[1])
-            union = a1 + a2 - inter
-            iou = inter / union if union > 0 else 0.0
-            if iou >= 0.5:
-                return True
-        return False
+        existing = _existing_boxes(selected_parent, image_info)
+        return not iou_keep_mask([b1], existing)[0]
     except Exception:
         return False
 
@@ -49,41 +78,7 @@ def is_duplicate_polygon(selected_parent, image_info, polygon_points, image_widt
         xs = [p[0] for p in polygon_points]
         ys = [p[1] for p in polygon_points]
         b1 = (min(xs), min(ys), max(xs), max(ys))
-        for child in selected_parent.children_by_image.get(image_info, []):
-            if getattr(child, 'is_placeholder', False):
-                continue
-            pts = getattr(child, 'points', None)
-            if isinstance(pts, list) and len(pts) >= 8:
-                cxs = [pts[0], pts[2], pts[4], pts[6]]
-                cys = [pts[1], pts[3], pts[5], pts[7]]
-                b2 = (min(cxs), min(cys), max(cxs), max(cys))
-            else:
-                pp = getattr(child, 'polygon_points', None)
-                if isinstance(pp, list) and len(pp) > 0:
-                    cxs = [p[0] for p in pp]
-                    cys = [p[1] for p in pp]
-                    b2 = (min(cxs), min(cys), max(cxs), max(cys))
-                else:
-                    xc = getattr(child, 'x_center', None)
-                    yc = getattr(child, 'y_center', None)
-                    w = getattr(child, 'width', None)
-                    h = getattr(child, 'height', None)
-                    if xc is None or yc is None or w is None or h is None:
-                        continue
-                    b2 = (xc - w / 2.0, yc - h / 2.0, xc + w / 2.0, yc + h / 2.0)
-            ix1 = max(b1[0], b2[0])
-            iy1 = max(b1[1], b2[1])
-            ix2 = min(b1[2], b2[2])
-            iy2 = min(b1[3], b2[3])
-            iw = max(0.0, ix2 - ix1)
-            ih = max(0.0, iy2 - iy1)
-            inter = iw * ih
-            a1 = max(0.0, b1[2] - b1[0]) * max(0.0, b1[3] - b1[1])
-            a2 = max(0.0, b2[2] - b2[0]) * max(0.0, b2[3] - b2[1])
-            union = a1 + a2 - inter
-            iou = inter / union if union > 0 else 0.0
-            if iou >= 0.5:
-                return True
-        return False
+        existing = _existing_boxes(selected_parent, image_info)
+        return not iou_keep_mask([b1], existing)[0]
     except Exception:
         return False
@@ -266,9 +266,7 @@ class AutoAnnotationManager(QObject):
             return True
             
         except Exception as e:
-            logger.error(f"处理OBB模式点击时发生错误: {e}")
-            import traceback
-            logger.error(f"错误详情: {traceback.format_exc()}")
+            logger.error(f"处理OBB模式点击时发生错误: {e}", exc_info=True)
             return False
 
     def _remove_temp_item(self, item):
@@ -433,9 +431,7 @@ class AutoAnnotationManager(QObject):
                 logger.warning("OBB模式未启用，跳过处理")
             
         except Exception as e:
-            logger.error(f"处理OBB推理结果时发生错误: {e}")
-            import traceback
-            logger.error(f"错误详情: {traceback.format_exc()}")
+            logger.error(f"处理OBB推理结果时发生错误: {e}", exc_info=True)
             self.annotation_error.emit(f"处理OBB推理结果时发生错误: {e}")
     
     
@@ -14,6 +14,11 @@ except Exception:
 
 logger = logging.getLogger(__name__)
 
+# YOLOE量化模式（环境变量 YOLOE_QUANT=int8 启用CPU动态INT8量化，其余取值保持FP32）
+YOLOE_QUANT = os.environ.get("YOLOE_QUANT", "").strip().lower()
+# 检测模型TensorRT加速开关（环境变量 YOLOV_TRT=1 启用，仅在CUDA可用时生效）
+YOLOV_TRT = os.environ.get("YOLOV_TRT", "0") == "1"
+
 class GlobalModelLoader(QObject):
     """全局模型加载器，负责在软件启动时在后台线程加载所有模型"""
     
@@ -29,10 +34,15 @@ class GlobalModelLoader(QObject):
         self.models = {}
         self.sam_paths = {"sam2": None, "sam3": None}
         self.active_sam_type = None
+        # YOLOE实际生效的量化模式，None表示FP32
+        self.yoloe_quant = None
         self.loading_threads = {}
         self.is_loading = False
         # 用于保护 yolov 模型切换与推理的锁，防止并发切换导致竞态
         self._yolov_lock = threading.RLock()
+        # 当前 yolov 推理的取消令牌；新的推理或切换图片时置位旧令牌
+        self._yolov_token = None
+        self._yolov_token_key = None
         # 用于保护 SAM 模型切换与加载的锁
         self._sam_lock = threading.RLock()
         
@@ -417,6 +427,8 @@ class GlobalModelLoader(QObject):
             
             # 加载模型
             model = YOLOE(model_path)
+            if YOLOE_QUANT == "int8":
+                self._quantize_yoloe_int8(model)
             self.models["yoloe"] = model
             
             self.loading_progress.emit(model_name, 100)
@@ -428,6 +440,30 @@ class GlobalModelLoader(QObject):
             logger.error(error_msg)
             self.loading_error.emit(model_name, error_msg)
     
+    def _quantize_yoloe_int8(self, model):
+        """
+        对YOLOE模型做CPU动态INT8量化（权重int8，激活运行时量化），失败时保持FP32
+
+        视觉提示推理依赖PyTorch模型本身，无法换用导出的OpenVINO/TensorRT引擎，
+        因此这里只量化nn.Linear层，量化后的模型只能在CPU上运行
+
+        Args:
+            model: ultralytics YOLOE模型
+        """
+        try:
+            import torch
+            if torch.cuda.is_available():
+                logger.info("检测到CUDA，YOLOE INT8动态量化仅适用于CPU，保持FP32")
+                return
+            model.model = torch.ao.quantization.quantize_dynamic(
+                model.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            self.yoloe_quant = "int8"
+            logger.info("YOLOE模型已启用INT8动态量化")
+        except Exception as e:
+            self.yoloe_quant = None
+            logger.warning(f"YOLOE INT8量化失败，使用FP32模型: {e}")
+
     def _load_yolo_model(self):
         """加载YOLO模型"""
         # 已加载则跳过
@@ -507,8 +543,9 @@ class GlobalModelLoader(QObject):
 
             self.loading_progress.emit(model_name, 50)
             
-            # 加载模型
+            # 加载模型（后台加载时允许首次导出TensorRT引擎）
             model = loader_cls(model_path)
+            model = self._maybe_tensorrt(model, model_path, loader_cls, allow_export=True)
             self.models["yolov"] = model
             
             self.loading_progress.emit(model_name, 100)
@@ -520,6 +557,42 @@ class GlobalModelLoader(QObject):
             logger.error(error_msg)
             self.loading_error.emit(model_name, error_msg)
     
+    def _maybe_tensorrt(self, model, weight_path, loader_cls, allow_export=False):
+        """YOLOV_TRT开启且CUDA可用时，改用权重旁缓存的TensorRT FP16引擎（.engine）
+        
+        Args:
+            model: 已加载的PyTorch检测模型
+            weight_path: 权重文件路径，引擎缓存在同目录同名的.engine文件
+            loader_cls: 加载模型使用的Ultralytics模型类（YOLO或RTDETR；RTDETR不支持引擎，直接返回原模型）
+            allow_export: 引擎不存在时是否导出（耗时较长，仅在后台加载时允许）
+            
+        Returns:
+            TensorRT引擎模型，不可用时返回原模型
+        """
+        if not YOLOV_TRT:
+            return model
+        try:
+            from ultralytics import RTDETR
+            # RTDETR加载器不接受task参数也无法加载.engine文件，跳过导出，避免白白耗时后每次启动回退
+            if loader_cls is RTDETR:
+                return model
+            import torch
+            if not torch.cuda.is_available():
+                return model
+            engine_path = os.path.splitext(weight_path)[0] + ".engine"
+            if not os.path.exists(engine_path):
+                if not allow_export:
+                    return model
+                logger.info(f"首次导出TensorRT引擎: {engine_path}")
+                # 动态批量以支持分块批量推理
+                engine_path = model.export(format="engine", half=True, dynamic=True, imgsz=640, batch=16, workspace=4)
+            engine_model = loader_cls(engine_path, task="detect")
+            logger.info(f"使用TensorRT引擎: {engine_path}")
+            return engine_model
+        except Exception as e:
+            logger.warning(f"TensorRT引擎不可用，使用PyTorch模型: {e}")
+            return model
+
     def get_model(self, model_name):
         """获取已加载的模型
         
@@ -612,13 +685,16 @@ class GlobalModelLoader(QObject):
                     lower_name = os.path.basename(weight_path).lower()
                     if "rtdetr" in lower_name or "rtdtr" in lower_name:
                         from ultralytics import RTDETR
-                        model = RTDETR(weight_path)
+                        loader_cls = RTDETR
                     else:
                         from ultralytics import YOLO
-                        model = YOLO(weight_path)
+                        loader_cls = YOLO
+                    model = loader_cls(weight_path)
                 except Exception as ie:
                     logger.error(f"未安装Ultralytics或目标模型不可用: {ie}")
                     return False
+                # 切换时只复用已导出的引擎，不在持锁期间做耗时导出
+                model = self._maybe_tensorrt(model, weight_path, loader_cls, allow_export=False)
                 self.models["yolov"] = model
             logger.info(f"YOLO模型切换成功: {weight_path}")
             return True
@@ -727,33 +803,30 @@ class GlobalModelLoader(QObject):
             # 使用新的权重文件进行推理（在 run_yolov_inference 中会使用锁）
             results = self.run_yolov_inference(image_path)
             
-            # 提取矩形框坐标、置信度和类别ID
+            # 提取矩形框坐标、置信度和类别ID：一次性取回并整体保留两位小数
             output_data = []
             if results and len(results) > 0:
                 boxes = results[0].boxes
-                if boxes is not None:
-                    for box in boxes:
-                        confidence = float(box.conf[0].cpu().numpy())
-                        
-                        if confidence >= confidence_threshold:
-                            bbox = box.xyxy[0].cpu().numpy().tolist()
-                            # 保留两位小数
-                            bbox = [round(coord, 2) for coord in bbox]
-                            class_id = int(box.cls[0].cpu().numpy())
-                            
-                            # 检查边界框是否在输入的坐标区域内
-                            for input_bbox in bboxes:
-                                x1, y1, x2, y2 = input_bbox
-                                center_x = (bbox[0] + bbox[2]) / 2
-                                center_y = (bbox[1] + bbox[3]) / 2
-                                
-                                if x1 <= center_x <= x2 and y1 <= center_y <= y2:
-                                    output_data.append({
-                                        "bbox": bbox,
-                                        "confidence": confidence,
-                                        "class_id": class_id
-                                    })
-                                    break
+                if boxes is not None and len(boxes) > 0:
+                    conf = boxes.conf.cpu().numpy()
+                    xyxy = np.round(boxes.xyxy.cpu().numpy().astype(np.float64), 2)
+                    cls = boxes.cls.cpu().numpy().astype(np.int32)
+                    keep = conf >= confidence_threshold
+                    
+                    # 检查边界框中心点是否在任一输入的坐标区域内
+                    inb = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+                    cx = ((xyxy[:, 0] + xyxy[:, 2]) / 2)[:, None]
+                    cy = ((xyxy[:, 1] + xyxy[:, 3]) / 2)[:, None]
+                    keep &= ((cx >= inb[:, 0]) & (cx <= inb[:, 2]) & (cy >= inb[:, 1]) & (cy <= inb[:, 3])).any(axis=1)
+                    
+                    output_data = [
+                        {
+                            "bbox": bbox,
+                            "confidence": confidence,
+                            "class_id": class_id
+                        }
+                        for bbox, confidence, class_id in zip(xyxy[keep].tolist(), conf[keep].tolist(), cls[keep].tolist())
+                    ]
             
             # 如果检测到了目标，返回成功
             if output_data:
@@ -767,24 +840,56 @@ class GlobalModelLoader(QObject):
         logger.warning("尝试了所有权重文件，但没有找到能检测到目标的权重")
         return False, []
 
-    def run_yolov_inference(self, image_input):
+    def new_yolov_token(self, key=None):
+        """获取 yolov 推理取消令牌；key（通常为图片路径）变化时取消上一张图片仍在进行的推理
+
+        同一 key 的并发推理共享同一个令牌，互不取消。
+
+        Args:
+            key: 推理所属的图片标识
+
+        Returns:
+            threading.Event: 被置位表示该次推理已被取代或取消
+        """
+        with self._yolov_lock:
+            old = self._yolov_token
+            if old is not None and not old.is_set() and self._yolov_token_key == key:
+                return old
+            token = threading.Event()
+            self._yolov_token = token
+            self._yolov_token_key = key
+        if old is not None:
+            old.set()
+        return token
+
+    def cancel_yolov_inference(self):
+        """取消当前 yolov 推理（例如用户切换了图片）"""
+        token = self._yolov_token
+        if token is not None:
+            token.set()
+
+    def run_yolov_inference(self, image_input, cancel_event=None):
         """线程安全地在当前 yolov 模型上执行推理并返回原始模型输出（不进行后处理）。
 
-        支持传入文件路径或 numpy 图像数组。内部使用 `_yolov_lock` 保证并发安全。
+        支持传入文件路径、numpy 图像数组或它们的列表（列表时一次批量推理，结果与输入一一对应）。
+        内部使用 `_yolov_lock` 保证并发安全。
+        cancel_event 被置位时：前向开始前直接返回 None；前向结束后也返回 None，跳过后处理。
         """
         with self._yolov_lock:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
             model = self.models.get("yolov")
             if model is None:
                 return None
             try:
-                if isinstance(image_input, np.ndarray):
-                    results = model(image_input)
-                else:
-                    results = model(image_input)
-                return results
+                results = model(image_input)
             except Exception as e:
                 logger.error(f"运行YOLO推理时出错: {e}")
                 return None
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info("yolov推理已被取消，丢弃结果")
+                return None
+            return results
 
 # 创建全局模型加载器实例
 global_model_loader = None
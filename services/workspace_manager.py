@@ -30,7 +30,7 @@ class WorkspaceResourceManager:
 
         try:
             files = self._collect_image_files()
-            files = sorted(files, key=lambda x: os.path.basename(x).lower())
+            files.sort(key=lambda x: LIM.natural_sort_key(os.path.basename(x)))
 
             self._resource_list = files
             return files
@@ -68,11 +68,8 @@ class WorkspaceResourceManager:
             if not self.is_valid_image_path(file_path):
                 logger.warning(f"无效的图片路径: {file_path}")
                 return None
-            image = QImage(file_path)
-            if image.isNull():
-                logger.warning(f"无法加载图片: {file_path}")
-                return None
-            return image
+            # 与LIM.load_image_safe共用：先校验文件头再解码
+            return LIM.load_image_safe(file_path)
         except Exception as e:
             logger.error(f"加载图片时发生错误 {file_path}: {e}")
             return None